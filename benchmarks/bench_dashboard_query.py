@@ -0,0 +1,114 @@
+"""
+Litigation Dashboard filtering: the previous copy + isin masks + value_counts
+per rerun vs. DashboardQueryEngine's bitmap indexes and cached aggregates.
+
+Run from the repository root:
+    python benchmarks/bench_dashboard_query.py [--rows 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from services.dashboard_query import DashboardQueryEngine
+
+CAMPAIGN_COL = "Case Type"
+STATUS_COL = "Class Code Title"
+REFERRAL_COL = "Referred By Name (Full - Last, First)"
+
+
+def build_frame(rows: int) -> pd.DataFrame:
+    rng = random.Random(7)
+    campaigns = [f"Campaign {i}" for i in range(40)]
+    statuses = [f"Status {i}" for i in range(25)]
+    attorneys = [f"Attorney, {i}" for i in range(300)]
+    return pd.DataFrame({
+        "CaseID": [f"2024-{i:06d}" for i in range(rows)],
+        CAMPAIGN_COL: pd.Categorical([rng.choice(campaigns) for _ in range(rows)]),
+        STATUS_COL: pd.Categorical([rng.choice(statuses) for _ in range(rows)]),
+        REFERRAL_COL: pd.Categorical([rng.choice(attorneys) for _ in range(rows)]),
+        "Case Details First Party Name (First, Last)": [f"Client {i}" for i in range(rows)],
+        "Date Opened": pd.to_datetime("2020-01-01") + pd.to_timedelta([i % 1500 for i in range(rows)], unit="D"),
+    })
+
+
+def legacy_query(df: pd.DataFrame, filters: dict) -> tuple:
+    # The dashboard's filtering before DashboardQueryEngine
+    filtered_df = df.copy()
+    for column, values in filters.items():
+        if values:
+            filtered_df = filtered_df[filtered_df[column].isin(values)]
+    status_counts = filtered_df[STATUS_COL].value_counts()
+    referral_counts = filtered_df[REFERRAL_COL].value_counts()
+    return filtered_df, status_counts[status_counts > 0], referral_counts[referral_counts > 0]
+
+
+def engine_query(engine: DashboardQueryEngine, filters: dict) -> tuple:
+    return (
+        engine.frame(filters),
+        engine.value_counts(STATUS_COL, filters),
+        engine.value_counts(REFERRAL_COL, filters),
+    )
+
+
+def random_filters(rng: random.Random, df: pd.DataFrame) -> dict:
+    return {
+        column: rng.sample(list(df[column].cat.categories), rng.randint(0, 3))
+        for column in (CAMPAIGN_COL, STATUS_COL, REFERRAL_COL)
+    }
+
+
+def _time_all(fn, target, combos: list) -> tuple:
+    timings = []
+    results = []
+    for filters in combos:
+        start = time.perf_counter()
+        results.append(fn(target, filters))
+        timings.append(time.perf_counter() - start)
+    return results, timings
+
+
+def _summary(label: str, timings: list):
+    ordered = sorted(timings)
+    p50 = ordered[len(ordered) // 2] * 1000
+    worst = ordered[-1] * 1000
+    print(f"{label:<26} p50 {p50:7.2f} ms   max {worst:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    df = build_frame(args.rows)
+    rng = random.Random(11)
+    combos = [random_filters(rng, df) for _ in range(args.queries)]
+
+    legacy, legacy_timings = _time_all(legacy_query, df, combos)
+
+    start = time.perf_counter()
+    engine = DashboardQueryEngine(df)
+    for column in (CAMPAIGN_COL, STATUS_COL, REFERRAL_COL):
+        engine.options(column)
+    build_ms = (time.perf_counter() - start) * 1000
+    cold, cold_timings = _time_all(engine_query, engine, combos)
+    _, warm_timings = _time_all(engine_query, engine, combos)
+
+    for (legacy_df, legacy_status, legacy_referral), (frame, status, referral) in zip(legacy, cold):
+        assert frame.index.equals(legacy_df.index)
+        assert status.to_dict() == legacy_status.to_dict()
+        assert referral.to_dict() == legacy_referral.to_dict()
+
+    print(f"rows={args.rows} filter combinations={args.queries} engine setup={build_ms:.1f} ms")
+    _summary("copy + isin + value_counts", legacy_timings)
+    _summary("query engine (new filters)", cold_timings)
+    _summary("query engine (rerun)", warm_timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Batch DOCX generation: replace_text_in_docx_all per row (unzip, lxml parse,
+python-docx post-pass, save) vs. a compiled template rendered per row.
+
+Run from the repository root:
+    python benchmarks/bench_docx_render.py [--rows 1000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+from utils.docx_utils import load_docx_template, replace_text_in_docx_all
+
+
+def build_template(path: str):
+    doc = Document()
+    doc.sections[0].header.paragraphs[0].text = "Re: {{ClientName}} / Case {{CaseID}}"
+    doc.add_heading("Letter of Representation", level=1)
+    doc.add_paragraph("Dear {{Adjuster}},")
+    for i in range(60):
+        doc.add_paragraph(
+            f"Paragraph {i}: our client {{{{ClientName}}}} was injured on {{{{IncidentDate}}}}. "
+            "Please direct all further communication regarding this claim to our office."
+        )
+    table = doc.add_table(rows=3, cols=2)
+    for row, (label, key) in enumerate([("Client", "ClientName"), ("Case", "CaseID"), ("Date", "IncidentDate")]):
+        table.cell(row, 0).text = label
+        table.cell(row, 1).text = f"{{{{{key}}}}}"
+    doc.save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    rows = [
+        {"ClientName": f"Client {i}", "CaseID": f"2024-{i:05d}", "IncidentDate": "01/02/2024", "Adjuster": f"Adjuster {i % 9}"}
+        for i in range(args.rows)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template_path = os.path.join(tmp, "letter.docx")
+        build_template(template_path)
+
+        start = time.perf_counter()
+        for i, row in enumerate(rows):
+            replace_text_in_docx_all(template_path, row, os.path.join(tmp, "legacy", f"{i}.docx"))
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compiled = load_docx_template(template_path)
+        rendered = [compiled.render(row) for row in rows]
+        compiled_seconds = time.perf_counter() - start
+
+        legacy_text = "\n".join(p.text for p in Document(os.path.join(tmp, "legacy", "0.docx")).paragraphs)
+        compiled_text = "\n".join(p.text for p in Document(BytesIO(rendered[0])).paragraphs)
+        assert legacy_text == compiled_text
+
+    print(f"rows={args.rows}")
+    print(f"replace_text_in_docx_all: {legacy_seconds:7.2f} s  ({legacy_seconds / args.rows * 1000:6.2f} ms/row)")
+    print(f"compiled template       : {compiled_seconds:7.2f} s  ({compiled_seconds / args.rows * 1000:6.2f} ms/row)"
+          f"  {legacy_seconds / compiled_seconds:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
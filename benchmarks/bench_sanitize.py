@@ -0,0 +1,70 @@
+"""
+Dashboard table sanitization: the previous per-cell sanitize_text apply
+vs. sanitize_dataframe, which sanitizes each distinct value once.
+
+Run from the repository root:
+    python benchmarks/bench_sanitize.py [--rows 50000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from core import security
+from core.security import sanitize_dataframe, sanitize_text
+
+CASE_TYPES = ["Auto Accident", "Slip & Fall", "Medical Malpractice", "Dog Bite", "Premises <Liability>"]
+STATUSES = ["Open", "Closed", "Pending Review", "Settled", "In Litigation"]
+
+
+def build_frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "CaseID": [f"2024-{i:06d}" for i in range(rows)],
+        "Client Name": [f"Client O'Name {i}" for i in range(rows)],
+        "Case Type": pd.Categorical([CASE_TYPES[i % len(CASE_TYPES)] for i in range(rows)]),
+        "Class Code Title": [STATUSES[i % len(STATUSES)] for i in range(rows)],
+        "Referred By Name (Full - Last, First)": [f"Attorney, {i % 40}" for i in range(rows)],
+        "Incident Date": pd.to_datetime("2024-01-01") + pd.to_timedelta([i % 365 for i in range(rows)], unit="D"),
+    })
+
+
+def legacy_sanitize(df: pd.DataFrame) -> pd.DataFrame:
+    # The dashboard's table sanitization before sanitize_dataframe
+    clean_df = df.copy()
+    for col in clean_df.columns:
+        clean_df[col] = [sanitize_text(str(x)) for x in clean_df[col].tolist()]
+    return clean_df
+
+
+def _time(fn, df: pd.DataFrame) -> tuple:
+    start = time.perf_counter()
+    result = fn(df)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    df = build_frame(args.rows)
+    legacy, legacy_seconds = _time(legacy_sanitize, df)
+    security._sanitize_memo.clear()
+    cold, cold_seconds = _time(sanitize_dataframe, df)
+    warm, warm_seconds = _time(sanitize_dataframe, df)
+
+    for col in df.columns:
+        assert legacy[col].tolist() == cold[col].tolist() == warm[col].tolist(), col
+
+    cells = df.size
+    print(f"rows={args.rows} cells={cells}")
+    print(f"per-cell sanitize_text : {legacy_seconds * 1000:8.1f} ms")
+    print(f"sanitize_dataframe cold: {cold_seconds * 1000:8.1f} ms  ({legacy_seconds / cold_seconds:.1f}x)")
+    print(f"sanitize_dataframe warm: {warm_seconds * 1000:8.1f} ms  ({legacy_seconds / warm_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
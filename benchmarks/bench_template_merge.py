@@ -0,0 +1,73 @@
+"""
+Email template rendering: the previous per-row read/split/str.replace merge
+vs. the cached compiled template behind merge_template.
+
+Run from the repository root:
+    python benchmarks/bench_template_merge.py [--rows 10000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from email_automation.utils.template_engine import merge_template, get_template_cache_stats
+
+TEMPLATE = """Subject: Welcome to the firm, {{name}} (Case {{ID}})
+Body:
+<html><body>
+<p>Dear {{name}},</p>
+<p>Thank you for choosing us. Your case number is {{ID}} and you were referred by {{RA}}.</p>
+<p>Please complete the attached questionnaire for case {{ID}} at your earliest convenience.</p>
+""" + "<p>Important information about your claim, your rights and next steps.</p>\n" * 40 + """
+<p>Sincerely,<br>Intake Team</p>
+</body></html>
+"""
+
+
+def legacy_merge(template_path: str, replacements: dict) -> tuple:
+    # The merge_template implementation before templates were compiled and cached
+    with open(template_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    subject_line = content.split("Subject:")[1].split("Body:")[0].strip()
+    body_content = content.split("Body:")[1].strip()
+    for key, value in replacements.items():
+        subject_line = subject_line.replace(f"{{{{{key}}}}}", str(value))
+        body_content = body_content.replace(f"{{{{{key}}}}}", str(value))
+    cc_list = [replacements.get("ReferringAttorneyEmail", "")] if "ReferringAttorneyEmail" in replacements else []
+    return subject_line, body_content, cc_list
+
+
+def _time(fn, path: str, rows: list) -> tuple:
+    start = time.perf_counter()
+    results = [fn(path, row) for row in rows]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rows = [{"name": f"Client {i}", "RA": f"Attorney {i % 50}", "ID": f"2024-{i:05d}"} for i in range(args.rows)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "welcome.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(TEMPLATE)
+
+        legacy, legacy_s = _time(legacy_merge, path, rows)
+        compiled, compiled_s = _time(merge_template, path, rows)
+
+    assert legacy == compiled, "compiled template output differs from the legacy merge"
+    print(f"rows: {len(rows)}, template: {len(TEMPLATE)} chars")
+    print(f"{'method':<28}{'seconds':>10}{'rows/s':>12}")
+    print(f"{'legacy read+replace':<28}{legacy_s:>10.3f}{len(rows) / legacy_s:>12.0f}")
+    print(f"{'compiled (cached)':<28}{compiled_s:>10.3f}{len(rows) / compiled_s:>12.0f}")
+    print(f"speedup: {legacy_s / compiled_s:.1f}x, cache: {get_template_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Token counting throughput: count_tokens (BPE encoder if available, otherwise
+the calibrated estimator) vs. the legacy 4-chars-per-token heuristic.
+
+Run from the repository root:
+    python benchmarks/bench_token_counting.py [--docs 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.prompts.demand_example import EXAMPLE_DEMAND
+from utils.token_utils import (
+    clear_token_count_cache,
+    count_tokens,
+    estimate_tokens,
+    get_encoder,
+    trim_to_token_limit,
+)
+
+
+def _docs(n: int) -> list:
+    # Unique strings so the count_tokens memo cache does not flatter the numbers
+    return [f"Matter {i}. {EXAMPLE_DEMAND}" for i in range(n)]
+
+
+def _throughput(fn, docs: list) -> tuple:
+    start = time.perf_counter()
+    total = sum(fn(doc) for doc in docs)
+    elapsed = time.perf_counter() - start
+    chars = sum(len(doc) for doc in docs)
+    return total, elapsed, chars / elapsed / 1e6 if elapsed else float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=2000)
+    args = parser.parse_args()
+
+    docs = _docs(args.docs)
+    backend = "BPE" if get_encoder() is not None else "estimator"
+
+    clear_token_count_cache()
+    heuristic_tokens, heuristic_s, heuristic_mbps = _throughput(estimate_tokens, docs)
+    counted_tokens, counted_s, counted_mbps = _throughput(count_tokens, docs)
+    cached_tokens, cached_s, cached_mbps = _throughput(count_tokens, docs)
+
+    print(f"documents: {len(docs)} ({sum(len(d) for d in docs) / 1e6:.1f}M chars), count_tokens backend: {backend}")
+    print(f"{'method':<28}{'tokens':>12}{'seconds':>10}{'MB/s':>10}")
+    print(f"{'4-chars heuristic':<28}{heuristic_tokens:>12}{heuristic_s:>10.3f}{heuristic_mbps:>10.1f}")
+    print(f"{'count_tokens (cold)':<28}{counted_tokens:>12}{counted_s:>10.3f}{counted_mbps:>10.1f}")
+    print(f"{'count_tokens (memoized)':<28}{cached_tokens:>12}{cached_s:>10.3f}{cached_mbps:>10.1f}")
+
+    start = time.perf_counter()
+    for doc in docs[:200]:
+        trim_to_token_limit(doc, 60)
+    print(f"trim_to_token_limit(60) x200: {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -75,6 +75,13 @@ class AppConfig:
         # === OpenAI ===
         self.OPENAI_API_KEY = get_env("OPENAI_API_KEY")
         self.OPENAI_MODEL = get_env("OPENAI_MODEL", default="gpt-3.5-turbo")
+        self.OPENAI_CACHE_ENABLED = str(get_env("OPENAI_CACHE_ENABLED", required=False, default="false")).lower() == "true"
+        self.OPENAI_CACHE_TTL_SECONDS = int(get_env("OPENAI_CACHE_TTL_SECONDS", required=False, default="86400"))
+        self.OPENAI_CACHE_MAX_MB = int(get_env("OPENAI_CACHE_MAX_MB", required=False, default="100"))
+        self.OPENAI_RPM_LIMIT = int(get_env("OPENAI_RPM_LIMIT", required=False, default="0")) or None
+        self.OPENAI_TPM_LIMIT = int(get_env("OPENAI_TPM_LIMIT", required=False, default="0")) or None
+        self.OPENAI_COMPLETION_TOKEN_RESERVE = int(get_env("OPENAI_COMPLETION_TOKEN_RESERVE", required=False, default="500"))
+        self.OPENAI_RATE_LIMIT_RETRIES = int(get_env("OPENAI_RATE_LIMIT_RETRIES", required=False, default="5"))
 
         # === Microsoft Graph ===
         self.GRAPH_CLIENT_ID = get_env("GRAPH_CLIENT_ID", required=False)
@@ -86,6 +93,11 @@ class AppConfig:
         self.NEOS_API_KEY = get_env("NEOS_API_KEY", required=False)
         self.NEOS_BASE_URL = get_env("NEOS_BASE_URL", default="https://app.neosconnect.com/api/v1")
         self.NEOS_COMPANY_ID = get_env("NEOS_COMPANY_ID", required=False)
+        self.NEOS_BULK_CONCURRENCY = int(get_env("NEOS_BULK_CONCURRENCY", required=False, default="8"))
+        self.NEOS_BULK_CHUNK_SIZE = int(get_env("NEOS_BULK_CHUNK_SIZE", required=False, default="100"))
+        # Path of a bulk class-code endpoint, if the NEOS deployment has one (e.g. /cases/class-code/bulk);
+        # empty (the default) always uses per-case updates
+        self.NEOS_BULK_UPDATE_PATH = get_env("NEOS_BULK_UPDATE_PATH", required=False, default="")
 
         # === Dropbox ===
         self.DROPBOX_APP_KEY = get_env("DROPBOX_APP_KEY", required=False)
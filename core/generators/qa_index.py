@@ -0,0 +1,161 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import List, Dict
+from logger import logger
+
+# BM25 tuning (standard Okapi defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "did", "do", "does", "for",
+    "from", "had", "has", "have", "he", "her", "him", "his", "i", "if", "in", "is", "it",
+    "me", "my", "no", "not", "of", "on", "or", "she", "so", "that", "the", "their", "them",
+    "then", "there", "they", "this", "to", "was", "we", "were", "what", "when", "where",
+    "which", "who", "with", "yes", "you", "your", "q",
+}
+
+# Keyword profiles for the quote categories offered in the mediation UI.
+# Unknown categories fall back to the words of the category name itself.
+CATEGORY_KEYWORDS = {
+    "Liability": [
+        "fault", "negligent", "negligence", "careless", "warning", "warn", "sign", "caution",
+        "inspect", "inspection", "policy", "procedure", "training", "safety", "hazard",
+        "responsible", "duty", "should", "failed", "fix", "repair", "maintenance", "spill",
+        "wet", "broken", "defect", "complaint", "report", "supervisor", "knew", "aware",
+    ],
+    "Damages": [
+        "pain", "hurt", "injury", "injured", "surgery", "doctor", "hospital", "treatment",
+        "therapy", "medication", "bills", "medical", "cost", "paid", "work", "job", "wages",
+        "income", "missed", "lost", "disability", "limp", "sleep", "suffer", "daily",
+    ],
+    "Additional Harms": [
+        "anxiety", "depression", "fear", "nightmares", "embarrassed", "family", "children",
+        "hobby", "enjoy", "anymore", "relationship", "marriage", "scar", "emotional",
+        "stress", "afraid", "quality", "life", "activities", "lonely", "cry",
+    ],
+    "Facts": [
+        "happened", "date", "time", "where", "store", "street", "vehicle", "car", "drive",
+        "walking", "saw", "see", "remember", "morning", "night", "weather", "location",
+        "before", "after", "scene", "witness", "light",
+    ],
+    "Causation": [
+        "because", "caused", "cause", "result", "after", "since", "before", "prior",
+        "previous", "history", "diagnosed", "mri", "x-ray", "fracture", "herniated",
+        "accident", "fall", "fell", "impact", "struck", "hit", "pain", "started",
+    ],
+}
+
+
+def _strip(token: str, suffix: str, replacement: str = "") -> str:
+    if token.endswith(suffix) and len(token) - len(suffix) + len(replacement) >= 3:
+        return token[: -len(suffix)] + replacement
+    return token
+
+
+def _stem(token: str) -> str:
+    """
+    Very light suffix stripping so "warned"/"warning"/"warnings" share a term.
+    """
+    if token.endswith("ies"):
+        token = _strip(token, "ies", "y")
+    elif token.endswith("sses"):
+        token = _strip(token, "es")
+    elif token.endswith("s") and not token.endswith("ss"):
+        token = _strip(token, "s")
+    for suffix in ("ingly", "edly", "ing", "ed", "ly"):
+        if token.endswith(suffix):
+            token = _strip(token, suffix)
+            break
+    return _strip(token, "e") if len(token) > 3 else token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase, split on non-word characters, drop stopwords and stem.
+    """
+    return [_stem(t) for t in TOKEN_PATTERN.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+class QAIndex:
+    """
+    In-memory BM25 inverted index over deposition Q&A blocks
+    (as produced by quote_parser.parse_qa_blocks).
+    """
+
+    def __init__(self, blocks: List[Dict], k1: float = BM25_K1, b: float = BM25_B):
+        self.blocks = blocks
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)
+        self.doc_lengths = []
+
+        for doc_id, block in enumerate(blocks):
+            terms = tokenize(block.get("text", ""))
+            self.doc_lengths.append(len(terms))
+            for term, count in Counter(terms).items():
+                self.postings[term][doc_id] = count
+
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+
+    def _idf(self, term: str) -> float:
+        n_docs = len(self.doc_lengths)
+        doc_freq = len(self.postings.get(term, {}))
+        return math.log(1 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def score(self, query: List[str]) -> Dict[int, float]:
+        """
+        Score every block containing at least one query term.
+        `query` holds terms already passed through tokenize(); repeated terms weigh more.
+        Returns {block_index: bm25_score}; blocks with no matching terms are omitted.
+        """
+        scores = defaultdict(float)
+        for term, weight in Counter(query).items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for doc_id, freq in postings.items():
+                norm = 1 - self.b + self.b * (self.doc_lengths[doc_id] / (self.avg_length or 1))
+                scores[doc_id] += weight * idf * (freq * (self.k1 + 1)) / (freq + self.k1 * norm)
+        return dict(scores)
+
+    def top_n(self, query: List[str], n: int) -> List[int]:
+        """
+        Return the indices of the n best-scoring blocks, in transcript order.
+        """
+        scores = self.score(query)
+        best = sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))[:n]
+        return sorted(best)
+
+
+def category_query(category: str) -> List[str]:
+    """
+    Build the BM25 query terms for a quote category.
+    """
+    keywords = CATEGORY_KEYWORDS.get(category)
+    if keywords is None:
+        keywords = [category]
+    return [term for keyword in keywords for term in tokenize(keyword)]
+
+
+def select_candidate_blocks(blocks: List[Dict], categories: List[str], top_n: int) -> Dict[str, List[Dict]]:
+    """
+    Pick the top_n most relevant Q&A blocks for each category.
+    Returns {category: [blocks in transcript order]}; categories with no lexical
+    match get an empty list.
+    """
+    index = QAIndex(blocks)
+    candidates = {}
+    for category in categories:
+        candidates[category] = [blocks[i] for i in index.top_n(category_query(category), top_n)]
+
+    kept = len({id(b) for selected in candidates.values() for b in selected})
+    logger.info(
+        f"[QA_INDEX] Pre-filter kept {kept}/{len(blocks)} blocks across {len(categories)} categories "
+        f"(top_n={top_n})"
+    )
+    return candidates
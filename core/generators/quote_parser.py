@@ -1,7 +1,11 @@
+import os
 import re
-from typing import List, Dict
+import time
+import asyncio
+from typing import List, Dict, Callable
 from services.openai_client import OpenAIClient
-from utils.token_utils import trim_to_token_limit
+from utils.token_utils import trim_to_token_limit, count_tokens
+from utils.thread_utils import run_async
 from core.security import redact_log, mask_phi
 from core.error_handling import handle_error
 from logger import logger
@@ -10,6 +14,18 @@ openai = OpenAIClient()
 
 QUOTE_PROMPT_SYSTEM_MSG = "You are a legal assistant extracting deposition quotes for a mediation memo."
 
+# Concurrent chunk extraction limits
+QUOTE_CHUNK_CONCURRENCY = int(os.getenv("QUOTE_CHUNK_CONCURRENCY", "5"))
+QUOTE_CHUNK_TIMEOUT = float(os.getenv("QUOTE_CHUNK_TIMEOUT", "90"))
+QUOTE_CHUNK_RETRIES = int(os.getenv("QUOTE_CHUNK_RETRIES", "2"))
+
+# Q&A-aware chunking (token budget stays under the extraction prompt's trim limit)
+QA_CHUNK_TOKEN_BUDGET = int(os.getenv("QA_CHUNK_TOKEN_BUDGET", "3500"))
+QA_CHUNK_OVERLAP_BLOCKS = int(os.getenv("QA_CHUNK_OVERLAP_BLOCKS", "1"))
+
+PAGE_HEADER_PATTERN = re.compile(r"^(?:page|pg\.?)\s*(\d{1,5})\b", re.IGNORECASE)
+LINE_NUMBER_PATTERN = re.compile(r"^(\d{1,5})(?:[:\s\-]+|$)")
+
 # -----------------------------
 # 1. Normalize Deposition Lines
 # -----------------------------
@@ -36,40 +52,82 @@ def normalize_deposition_lines(text: str) -> List[str]:
 # -----------------------------
 # 2. Merge Q&A Blocks
 # -----------------------------
-def merge_multiline_qas(lines: List[str]) -> str:
+def parse_qa_blocks(lines: List[str]) -> List[Dict]:
     """
-    Merge multiline deposition Q&A blocks into a structured string.
+    Merge multiline deposition Q&A blocks, keeping page/line provenance.
+
+    Each block is {"text", "page_start", "line_start", "page_end", "line_end"}.
+    Pages come from "Page N" headers, or advance when transcript line numbers
+    restart; line values are None when the transcript carries no line numbers.
     """
     try:
         if not lines or not isinstance(lines, list):
             raise ValueError("Input lines are empty or invalid.")
 
-        merged = []
-        current_q = ""
-        current_a = ""
+        blocks = []
+        current = None
+        page = 1
+        last_line_no = None
+
+        def flush():
+            if current and (current["q"] or current["a"]):
+                blocks.append({
+                    "text": f"Q: {current['q'].strip()}\nA: {current['a'].strip()}",
+                    "page_start": current["page_start"],
+                    "line_start": current["line_start"],
+                    "page_end": current["page_end"],
+                    "line_end": current["line_end"],
+                })
+
+        for raw_line in lines:
+            page_match = PAGE_HEADER_PATTERN.match(raw_line)
+            if page_match:
+                page = int(page_match.group(1))
+                last_line_no = None
+                continue
 
-        for line in lines:
             # Remove line numbers
-            if re.match(r"^\d{1,5}[:\s\-]", line):
-                line = re.sub(r"^\d{1,5}[:\s\-]+", "", line).strip()
+            line, line_no = raw_line, None
+            number_match = LINE_NUMBER_PATTERN.match(raw_line)
+            if number_match:
+                line_no = int(number_match.group(1))
+                line = raw_line[number_match.end():].strip()
+                if last_line_no is not None and line_no < last_line_no:
+                    page += 1
+                last_line_no = line_no
+            if not line:
+                continue
 
             if line.startswith("Q:"):
-                if current_q or current_a:
-                    merged.append(f"Q: {current_q.strip()}\nA: {current_a.strip()}")
-                    current_q, current_a = "", ""
-                current_q += line[2:].strip()
-            elif line.startswith("A:"):
-                current_a += line[2:].strip() + " "
-            else:
-                if current_a:
-                    current_a += line + " "
-                elif current_q:
-                    current_q += " " + line
+                flush()
+                current = {
+                    "q": line[2:].strip(), "a": "",
+                    "page_start": page, "line_start": line_no,
+                    "page_end": page, "line_end": line_no,
+                }
+                continue
 
-        if current_q or current_a:
-            merged.append(f"Q: {current_q.strip()}\nA: {current_a.strip()}")
+            if current is None:
+                if not line.startswith("A:"):
+                    continue
+                current = {
+                    "q": "", "a": "",
+                    "page_start": page, "line_start": line_no,
+                    "page_end": page, "line_end": line_no,
+                }
+
+            if line.startswith("A:"):
+                current["a"] += line[2:].strip() + " "
+            elif current["a"]:
+                current["a"] += line + " "
+            elif current["q"]:
+                current["q"] += " " + line
+            else:
+                continue
+            current["page_end"], current["line_end"] = page, line_no
 
-        return "\n\n".join(merged)
+        flush()
+        return blocks
 
     except Exception as e:
         handle_error(
@@ -80,25 +138,75 @@ def merge_multiline_qas(lines: List[str]) -> str:
         )
 
 
+def merge_multiline_qas(lines: List[str]) -> str:
+    """
+    Merge multiline deposition Q&A blocks into a structured string.
+    """
+    return "\n\n".join(block["text"] for block in parse_qa_blocks(lines))
+
+
+def format_provenance(block: Dict) -> str:
+    """
+    Render a block's citation, e.g. "[12:4-13:2]" or "[p. 12]" without line numbers.
+    """
+    if block.get("line_start") is None or block.get("line_end") is None:
+        if block["page_start"] == block["page_end"]:
+            return f"[p. {block['page_start']}]"
+        return f"[pp. {block['page_start']}-{block['page_end']}]"
+    if block["page_start"] == block["page_end"]:
+        return f"[{block['page_start']}:{block['line_start']}-{block['line_end']}]"
+    return f"[{block['page_start']}:{block['line_start']}-{block['page_end']}:{block['line_end']}]"
+
+
+def chunk_qa_blocks(
+    blocks: List[Dict],
+    max_tokens: int = QA_CHUNK_TOKEN_BUDGET,
+    overlap_blocks: int = QA_CHUNK_OVERLAP_BLOCKS,
+) -> List[Dict]:
+    """
+    Pack whole Q&A blocks into chunks of at most max_tokens, never splitting a Q/A pair.
+    The last `overlap_blocks` blocks of each chunk are repeated at the start of the next.
+    A single block larger than the budget becomes its own chunk.
+
+    Returns a list of {"text", "blocks"} where each block line is prefixed with its citation.
+    """
+    rendered = [
+        (block, f"{format_provenance(block)}\n{block['text']}")
+        for block in blocks
+    ]
+    sized = [(block, text, count_tokens(text)) for block, text in rendered]
+
+    groups = []
+    current, current_tokens = [], 0
+    for item in sized:
+        if current and current_tokens + item[2] > max_tokens:
+            groups.append(current)
+            carry = current[-overlap_blocks:] if overlap_blocks and len(current) > overlap_blocks else []
+            carry_tokens = sum(c[2] for c in carry)
+            if carry_tokens + item[2] > max_tokens:
+                carry, carry_tokens = [], 0
+            current, current_tokens = list(carry), carry_tokens
+        current.append(item)
+        current_tokens += item[2]
+    if current:
+        groups.append(current)
+
+    return [
+        {"text": "\n\n".join(text for _, text, _ in group), "blocks": [block for block, _, _ in group]}
+        for group in groups
+    ]
+
+
 # -----------------------------
 # 3. GPT-Powered Quote Extraction
 # -----------------------------
-def generate_quotes_in_chunks(chunks: List[str], categories: List[str]) -> Dict[str, str]:
-    """
-    Extract categorized quotes from deposition chunks using GPT.
-    Each quote is tagged by category and returned in a structured dict.
-    """
-    try:
-        if not chunks or not categories:
-            raise ValueError("Chunks or categories are empty.")
+def _quote_key(category: str) -> str:
+    return category.lower().replace(" ", "_") + "_quotes"
 
-        # Initialize category keys
-        results = {cat.lower().replace(" ", "_") + "_quotes": [] for cat in categories}
 
-        for chunk in chunks:
-            try:
-                category_list = ", ".join(categories)
-                prompt = f"""
+def _build_quote_prompt(chunk: str, categories: List[str]) -> str:
+    category_list = ", ".join(categories)
+    return f"""
 You are reviewing a deposition transcript.
 
 The following text contains Q&A excerpts:
@@ -114,29 +222,120 @@ Category: [Category Name]
 
 Only include relevant quotes. Skip any category if no strong quote exists.
 """
-                response = openai.safe_generate(
-                    prompt=prompt,
-                    system_msg=QUOTE_PROMPT_SYSTEM_MSG,
-                )
 
-                for cat in categories:
-                    key = cat.lower().replace(" ", "_") + "_quotes"
-                    matches = re.findall(
-                        rf'Category: {re.escape(cat)}\s+"(.*?)"',
-                        response,
-                        re.DOTALL,
-                    )
-                    results[key].extend([m.strip() for m in matches])
 
+def _parse_quote_response(response: str, categories: List[str]) -> Dict[str, List[str]]:
+    parsed = {}
+    for cat in categories:
+        matches = re.findall(
+            rf'Category: {re.escape(cat)}\s+"(.*?)"',
+            response or "",
+            re.DOTALL,
+        )
+        parsed[_quote_key(cat)] = [m.strip() for m in matches]
+    return parsed
+
+
+async def _extract_chunk_quotes(
+    index: int,
+    chunk: str,
+    categories: List[str],
+    semaphore: asyncio.Semaphore,
+    timeout: float,
+    retries: int,
+) -> str:
+    """
+    Run one chunk through GPT with a per-attempt timeout and bounded retries.
+    Returns an empty response if every attempt fails so other chunks still merge.
+    """
+    prompt = _build_quote_prompt(chunk, categories)
+    async with semaphore:
+        for attempt in range(1, retries + 1):
+            try:
+                return await asyncio.wait_for(
+                    openai.safe_generate(prompt=prompt, system_msg=QUOTE_PROMPT_SYSTEM_MSG),
+                    timeout=timeout,
+                )
             except Exception as gpt_err:
-                handle_error(
-                    gpt_err,
-                    code="QUOTE_PARSER_003",
-                    user_message="Failed to extract deposition quotes from GPT.",
+                if attempt >= retries:
+                    handle_error(
+                        gpt_err,
+                        code="QUOTE_PARSER_003",
+                        user_message=f"Failed to extract deposition quotes from GPT (chunk {index + 1}).",
+                    )
+                    return ""
+                logger.warning(
+                    f"[QUOTE_PARSER] Chunk {index + 1} attempt {attempt}/{retries} failed: "
+                    f"{type(gpt_err).__name__}; retrying"
                 )
+                await asyncio.sleep(min(2 ** attempt, 10))
+    return ""
+
+
+async def _run_quote_jobs(
+    jobs: List[tuple],
+    categories: List[str],
+    max_concurrency: int,
+    timeout: float,
+    retries: int,
+    progress_callback: Callable[[int, int], None],
+) -> Dict[str, str]:
+    """
+    Fan out (chunk, job_categories) pairs under a bounded semaphore and merge
+    the parsed quotes back in job order.
+    """
+    total = len(jobs)
+    semaphore = asyncio.Semaphore(max(1, int(max_concurrency or 1)))
+    responses = [""] * total
+    completed = 0
+    start_time = time.perf_counter()
+
+    async def run_job(index: int, chunk: str, job_categories: List[str]):
+        nonlocal completed
+        responses[index] = await _extract_chunk_quotes(
+            index, chunk, job_categories, semaphore, timeout, retries
+        )
+        completed += 1
+        if progress_callback:
+            try:
+                progress_callback(completed, total)
+            except Exception as cb_err:
+                logger.warning(f"[QUOTE_PARSER] Progress callback failed: {cb_err}")
+
+    await asyncio.gather(*(run_job(i, chunk, cats) for i, (chunk, cats) in enumerate(jobs)))
 
-        # Deduplicate and clean results
-        return {k: "\n\n".join(sorted(set(v))) for k, v in results.items()}
+    # Merge in chunk order, dropping duplicates but keeping transcript order
+    results = {_quote_key(cat): [] for cat in categories}
+    for response, (_, job_categories) in zip(responses, jobs):
+        for key, quotes in _parse_quote_response(response, job_categories).items():
+            results[key].extend(quotes)
+
+    logger.info(
+        f"[METRIC] Quote extraction: {total} chunks in {time.perf_counter() - start_time:.2f}s "
+        f"(concurrency={max_concurrency})"
+    )
+    return {k: "\n\n".join(dict.fromkeys(v)) for k, v in results.items()}
+
+
+async def generate_quotes_in_chunks_async(
+    chunks: List[str],
+    categories: List[str],
+    max_concurrency: int = QUOTE_CHUNK_CONCURRENCY,
+    timeout: float = QUOTE_CHUNK_TIMEOUT,
+    retries: int = QUOTE_CHUNK_RETRIES,
+    progress_callback: Callable[[int, int], None] = None,
+) -> Dict[str, str]:
+    """
+    Extract categorized quotes from deposition chunks concurrently.
+    Chunks are fanned out under a bounded semaphore and merged back in chunk order.
+    progress_callback(completed, total) is invoked as each chunk finishes.
+    """
+    try:
+        if not chunks or not categories:
+            raise ValueError("Chunks or categories are empty.")
+
+        jobs = [(chunk, categories) for chunk in chunks]
+        return await _run_quote_jobs(jobs, categories, max_concurrency, timeout, retries, progress_callback)
 
     except Exception as e:
         handle_error(
@@ -145,3 +344,70 @@ Only include relevant quotes. Skip any category if no strong quote exists.
             user_message="Quote extraction failed.",
             raise_it=True,
         )
+
+
+async def generate_category_quotes_async(
+    category_chunks: Dict[str, List[str]],
+    max_concurrency: int = QUOTE_CHUNK_CONCURRENCY,
+    timeout: float = QUOTE_CHUNK_TIMEOUT,
+    retries: int = QUOTE_CHUNK_RETRIES,
+    progress_callback: Callable[[int, int], None] = None,
+) -> Dict[str, str]:
+    """
+    Extract quotes where each category has its own (pre-filtered) chunks.
+    Every chunk is only asked about the category it was selected for.
+    Categories with no chunks still get an empty result key.
+    """
+    try:
+        if not category_chunks:
+            raise ValueError("No categories provided for quote extraction.")
+
+        categories = list(category_chunks.keys())
+        jobs = [(chunk, [cat]) for cat, chunks in category_chunks.items() for chunk in chunks]
+        if not jobs:
+            return {_quote_key(cat): "" for cat in categories}
+        return await _run_quote_jobs(jobs, categories, max_concurrency, timeout, retries, progress_callback)
+
+    except Exception as e:
+        handle_error(
+            e,
+            code="QUOTE_PARSER_005",
+            user_message="Quote extraction failed.",
+            raise_it=True,
+        )
+
+
+def generate_quotes_in_chunks(
+    chunks: List[str],
+    categories: List[str],
+    max_concurrency: int = QUOTE_CHUNK_CONCURRENCY,
+    progress_callback: Callable[[int, int], None] = None,
+) -> Dict[str, str]:
+    """
+    Extract categorized quotes from deposition chunks using GPT.
+    Each quote is tagged by category and returned in a structured dict.
+    Sync entry point; pass max_concurrency=1 for strictly sequential extraction.
+    """
+    return run_async(
+        generate_quotes_in_chunks_async,
+        chunks,
+        categories,
+        max_concurrency=max_concurrency,
+        progress_callback=progress_callback,
+    )
+
+
+def generate_category_quotes(
+    category_chunks: Dict[str, List[str]],
+    max_concurrency: int = QUOTE_CHUNK_CONCURRENCY,
+    progress_callback: Callable[[int, int], None] = None,
+) -> Dict[str, str]:
+    """
+    Sync entry point for generate_category_quotes_async.
+    """
+    return run_async(
+        generate_category_quotes_async,
+        category_chunks,
+        max_concurrency=max_concurrency,
+        progress_callback=progress_callback,
+    )
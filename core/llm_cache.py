@@ -0,0 +1,176 @@
+# core/llm_cache.py
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from core.error_handling import handle_error
+from logger import logger
+
+LLM_CACHE_PATH = os.path.join("data", "llm_response_cache.db")
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+
+def make_cache_key(model: str, system_msg: str, prompt: str, temperature: float) -> str:
+    """
+    Stable content hash of everything that determines a completion.
+    """
+    payload = json.dumps(
+        [model or "", system_msg or "", prompt or "", round(float(temperature or 0), 4)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    On-disk (SQLite) completion cache namespaced per tenant.
+    Entries expire after ttl_seconds; once the cache exceeds max_bytes the
+    least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    tenant_id TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (tenant_id, key)
+                )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache (last_access)")
+        except Exception as e:
+            handle_error(e, code="LLM_CACHE_INIT_001", raise_it=True)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, tenant_id: str, key: str):
+        """
+        Return the cached completion or None on miss/expiry.
+        """
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE tenant_id = ? AND key = ?",
+                    (tenant_id, key),
+                ).fetchone()
+
+                if row and now - row[1] <= self.ttl_seconds:
+                    conn.execute(
+                        "UPDATE llm_cache SET last_access = ? WHERE tenant_id = ? AND key = ?",
+                        (now, tenant_id, key),
+                    )
+                    self.hits += 1
+                    return row[0]
+
+                if row:
+                    conn.execute("DELETE FROM llm_cache WHERE tenant_id = ? AND key = ?", (tenant_id, key))
+                self.misses += 1
+                return None
+        except Exception as e:
+            handle_error(e, code="LLM_CACHE_GET_001")
+            self.misses += 1
+            return None
+
+    def set(self, tenant_id: str, key: str, value: str):
+        """
+        Store a completion and evict expired / least recently used entries if needed.
+        """
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (tenant_id, key, value, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (tenant_id, key, value, size, now, now),
+                )
+                self._evict(conn, now)
+        except Exception as e:
+            handle_error(e, code="LLM_CACHE_SET_001")
+
+    def _evict(self, conn, now: float):
+        expired = conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        self.evictions += max(expired, 0)
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        stale = []
+        for tenant_id, key, size in conn.execute(
+            "SELECT tenant_id, key, size FROM llm_cache ORDER BY last_access ASC"
+        ):
+            if total <= self.max_bytes:
+                break
+            stale.append((tenant_id, key))
+            total -= size
+        conn.executemany("DELETE FROM llm_cache WHERE tenant_id = ? AND key = ?", stale)
+        self.evictions += len(stale)
+
+    def clear(self, tenant_id: str = None):
+        """
+        Drop all entries, or only those of one tenant.
+        """
+        try:
+            with self._lock, self._connect() as conn:
+                if tenant_id:
+                    conn.execute("DELETE FROM llm_cache WHERE tenant_id = ?", (tenant_id,))
+                else:
+                    conn.execute("DELETE FROM llm_cache")
+        except Exception as e:
+            handle_error(e, code="LLM_CACHE_CLEAR_001")
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters for this process plus current on-disk footprint.
+        """
+        entries, total_bytes = 0, 0
+        try:
+            with self._connect() as conn:
+                entries, total_bytes = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+                ).fetchone()
+        except Exception as e:
+            logger.warning(f"[LLM_CACHE] Unable to read cache size: {e}")
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total_bytes,
+        }
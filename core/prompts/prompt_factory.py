@@ -4,6 +4,7 @@ import os
 from datetime import datetime
 from core.auth import get_tenant_id
 from core.security import sanitize_filename
+from utils.token_utils import fit_prompt_parts, count_tokens, DEFAULT_PROMPT_TOKEN_LIMIT
 from core.audit import log_audit_event
 from logger import logger
 
@@ -96,6 +97,40 @@ def register_prompt(prompt_type: str, prompt: str):
     except Exception as e:
         logger.warning(f"Failed to audit prompt registration: {e}")
 
+def _render_base_prompt(
+    safety_notes: str, section: str, summary: str, client_name: str,
+    example: str, extra_instructions: str, max_prompt_tokens: int
+) -> str:
+    """
+    Render BASE_PROMPT_TEMPLATE within max_prompt_tokens. Safety notes and
+    instructions are kept whole; the remaining tokens go to the facts and the
+    example (facts get twice the example's share), each trimmed at
+    sentence/paragraph boundaries. The rendered prompt is re-measured (the
+    template and escaping add tokens) and refitted if it still overflows.
+    """
+    template = jinja_env.from_string(BASE_PROMPT_TEMPLATE)
+    parts = {
+        "safety_notes": safety_notes,
+        "summary": summary,
+        "example": example,
+        "extra_instructions": extra_instructions,
+    }
+    budget = max_prompt_tokens
+    for _ in range(3):
+        fitted = fit_prompt_parts(
+            parts,
+            budget,
+            fixed=("safety_notes", "extra_instructions"),
+            weights={"summary": 2, "example": 1},
+            overhead=count_tokens(BASE_PROMPT_TEMPLATE) + count_tokens(section) + count_tokens(client_name),
+        )
+        prompt = template.render(section=section, client_name=client_name, **fitted)
+        overflow = count_tokens(prompt) - max_prompt_tokens
+        if overflow <= 0:
+            break
+        budget -= overflow
+    return prompt
+
 # ==================== Build Prompt ==================== #
 def build_prompt(
     prompt_type: str,
@@ -103,7 +138,8 @@ def build_prompt(
     summary: str,
     client_name: str = "Jane Doe",
     extra_instructions: str = "",
-    example: str = ""
+    example: str = "",
+    max_prompt_tokens: int = DEFAULT_PROMPT_TOKEN_LIMIT
 ) -> str:
     if prompt_type == "demand":
         # === Section-specific constraints ===
@@ -128,27 +164,27 @@ def build_prompt(
             section_instructions
         ])
 
-        template = jinja_env.from_string(BASE_PROMPT_TEMPLATE)
-        prompt = template.render(
+        prompt = _render_base_prompt(
             safety_notes=safety_notes,
             section=section,
             summary=summary.strip(),
             client_name=client_name.strip(),
             example=example.strip() or EXAMPLE_DEMAND if "settlement" not in section_lower else SETTLEMENT_EXAMPLE,
             extra_instructions=extra_instructions.strip(),
+            max_prompt_tokens=max_prompt_tokens,
         )
         register_prompt(prompt_type, prompt)
         return prompt
 
     elif prompt_type == "memo":
-        template = jinja_env.from_string(BASE_PROMPT_TEMPLATE)
-        prompt = template.render(
+        prompt = _render_base_prompt(
             safety_notes=MEMO_SAFETY_PROMPT,
             section=section,
             summary=summary.strip(),
             client_name=client_name.strip(),
             example=example.strip(),
             extra_instructions=extra_instructions.strip(),
+            max_prompt_tokens=max_prompt_tokens,
         )
         register_prompt(prompt_type, prompt)
         return prompt
@@ -2,14 +2,24 @@ import re
 import html
 import functools
 import time
+import numpy as np
+import pandas as pd
 from core.error_handling import handle_error
 
 SAFE_FILENAME_CHARS = r"[^a-zA-Z0-9_\-\.]"
 SAFE_TEXT_CHARS = r"[^a-zA-Z0-9\s,\.\-_'\"\(\)\[\]@:]" 
 RATE_LIMIT_WINDOW = 60
 RATE_LIMIT_REQUESTS = 100
+SANITIZE_MEMO_MAX_ENTRIES = 100_000
+SANITIZE_MEMO_MAX_UNIQUE_RATIO = 0.5
+# Bulk sanitization joins distinct values with this separator and keeps it while filtering
+SANITIZE_BATCH_SEPARATOR = "\x00"
+SAFE_TEXT_CHARS_BATCH = SAFE_TEXT_CHARS[:-1] + r"\x00]"
+# Same substitutions as html.escape(quote=True), applied in a single pass
+HTML_ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"})
 
 _rate_limit_cache = {}
+_sanitize_memo = {}
 
 
 def sanitize_email(email: str) -> str:
@@ -36,6 +46,75 @@ def sanitize_text(text: str) -> str:
         return ""
 
 
+def _sanitize_unique(values: list, memoize: bool = True) -> list:
+    """
+    sanitize_text over distinct strings, memoized across calls when memoize is set.
+
+    The misses are escaped and filtered as one joined string, so the per-value
+    Python work is only the final split and strip.
+    """
+    missing = [value for value in values if value not in _sanitize_memo] if memoize else values
+    if missing:
+        joined = SANITIZE_BATCH_SEPARATOR.join(missing)
+        if joined.count(SANITIZE_BATCH_SEPARATOR) == len(missing) - 1:
+            joined = re.sub(SAFE_TEXT_CHARS_BATCH, "", joined.translate(HTML_ESCAPE_TABLE))
+            cleaned = [value.strip() for value in joined.split(SANITIZE_BATCH_SEPARATOR)]
+        else:
+            # A value contains the separator itself
+            cleaned = [sanitize_text(value) for value in missing]
+        if not memoize:
+            return cleaned
+        if len(_sanitize_memo) + len(missing) > SANITIZE_MEMO_MAX_ENTRIES:
+            _sanitize_memo.clear()
+        _sanitize_memo.update(zip(missing, cleaned))
+    return [_sanitize_memo[value] for value in values]
+
+
+def sanitize_series(series: pd.Series) -> pd.Series:
+    """
+    Bulk equivalent of sanitize_text(str(value)) for every value in series.
+
+    Each distinct value is sanitized once, so repetitive (e.g. categorical)
+    columns cost as much as their number of categories.
+    """
+    try:
+        if series.dtype == object or pd.api.types.is_float_dtype(series.dtype):
+            # Stringify before factorizing: 1, 1.0 and True (or 0.0 and -0.0) hash
+            # alike but print differently. For categoricals map() only touches the categories.
+            series_values = series.map(str)
+        else:
+            # Integers, booleans and datetimes: stringify only the distinct values
+            series_values = series
+        if series_values.dtype == object:
+            # pd.factorize hashes object strings as C strings, merging values that
+            # differ only after an embedded NUL; a dict compares them in full
+            positions = {}
+            codes = np.fromiter(
+                (positions.setdefault(value, len(positions)) for value in series_values),
+                dtype=np.intp, count=len(series_values),
+            )
+            uniques = list(positions)
+        else:
+            codes, uniques = pd.factorize(series_values, use_na_sentinel=False)
+        # Mostly-unique columns (IDs, names) would only churn the memo
+        memoize = len(uniques) <= len(series) * SANITIZE_MEMO_MAX_UNIQUE_RATIO
+        cleaned = _sanitize_unique([str(value) for value in uniques], memoize=memoize)
+        return pd.Series(pd.Index(cleaned, dtype=object).take(codes), index=series.index, name=series.name)
+    except Exception as e:
+        handle_error(e, code="SECURITY_SANITIZE_BULK_ERR")
+        return pd.Series([sanitize_text(str(x)) for x in series.tolist()], index=series.index, name=series.name)
+
+
+def sanitize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sanitize every cell of df as sanitize_text(str(cell)) would, column by column.
+    """
+    cleaned = df.copy(deep=False)
+    for position in range(df.shape[1]):
+        cleaned.isetitem(position, sanitize_series(df.iloc[:, position]))
+    return cleaned
+
+
 def redact_log(text: str) -> str:
     try:
         if not isinstance(text, str):
@@ -0,0 +1,213 @@
+import csv
+import io
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from core.error_handling import handle_error
+from logger import logger
+
+EMAIL_LOG_DIR = os.path.join("email_automation", "logs")
+EMAIL_LOG_DB_PATH = os.getenv("EMAIL_LOG_DB_PATH", os.path.join(EMAIL_LOG_DIR, "sent_email_log.db"))
+
+# Column order of the CSV/JSON exports (matches the legacy per-tenant files)
+EMAIL_LOG_FIELDS = [
+    "Timestamp",
+    "Client Name",
+    "Email",
+    "Subject",
+    "Body",
+    "Template Path",
+    "CC List",
+    "Case ID",
+    "Class Code Before",
+    "Class Code After",
+    "User ID",
+    "Tenant ID",
+    "OpenTrackingURL",
+]
+
+
+def legacy_log_paths(tenant_id: str) -> tuple:
+    """
+    (csv_path, json_path) of the per-tenant export files offered for download.
+    """
+    return (
+        os.path.join(EMAIL_LOG_DIR, f"{tenant_id}_sent_email_log.csv"),
+        os.path.join(EMAIL_LOG_DIR, f"{tenant_id}_sent_email_log.json"),
+    )
+
+
+class EmailLogStore:
+    """
+    Append-only sent-email log in an indexed SQLite table (WAL mode).
+
+    Each logged email is a single INSERT, so the cost per send stays constant
+    and concurrent sends don't race on rewriting shared files. CSV/JSON
+    downloads are produced on demand by export(); legacy per-tenant CSV logs
+    are imported once the first time a tenant's log is touched. Rows sent by a
+    bulk run carry its run_id, so that run can be resumed after an interruption.
+    """
+
+    def __init__(self, path: str = EMAIL_LOG_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._imported_tenants = set()
+
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                CREATE TABLE IF NOT EXISTS sent_emails (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    tenant_id TEXT NOT NULL,
+                    case_id TEXT,
+                    timestamp TEXT NOT NULL,
+                    entry TEXT NOT NULL,
+                    run_id TEXT
+                )
+                """)
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(sent_emails)")}
+                if "run_id" not in columns:
+                    conn.execute("ALTER TABLE sent_emails ADD COLUMN run_id TEXT")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_sent_emails_tenant ON sent_emails (tenant_id, id)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_sent_emails_case ON sent_emails (tenant_id, case_id)")
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_sent_emails_run ON sent_emails (tenant_id, run_id, case_id)"
+                )
+        except Exception as e:
+            handle_error(e, code="EMAIL_LOG_INIT_001", raise_it=True)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _import_legacy(self, conn, tenant_id: str):
+        """
+        Move rows from a pre-existing per-tenant CSV log into the table (once per tenant).
+        """
+        if tenant_id in self._imported_tenants:
+            return
+        self._imported_tenants.add(tenant_id)
+
+        csv_path, _ = legacy_log_paths(tenant_id)
+        if not os.path.exists(csv_path):
+            return
+        if conn.execute("SELECT 1 FROM sent_emails WHERE tenant_id = ? LIMIT 1", (tenant_id,)).fetchone():
+            return
+
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            rows = [
+                (tenant_id, row.get("Case ID", ""), row.get("Timestamp", ""), json.dumps(row, ensure_ascii=False))
+                for row in csv.DictReader(f)
+            ]
+        conn.executemany(
+            "INSERT INTO sent_emails (tenant_id, case_id, timestamp, entry) VALUES (?, ?, ?, ?)", rows
+        )
+        logger.info(f"[EMAIL_LOG] Imported {len(rows)} legacy log rows for tenant {tenant_id}")
+
+    def append(self, tenant_id: str, entry: dict, run_id: str = None):
+        """
+        Append one sent-email entry, tagged with the bulk run that sent it (if any).
+        """
+        with self._lock, self._connect() as conn:
+            self._import_legacy(conn, tenant_id)
+            conn.execute(
+                "INSERT INTO sent_emails (tenant_id, case_id, timestamp, entry, run_id) VALUES (?, ?, ?, ?, ?)",
+                (
+                    tenant_id,
+                    str(entry.get("Case ID", "")),
+                    entry.get("Timestamp", ""),
+                    json.dumps(entry, ensure_ascii=False),
+                    run_id,
+                ),
+            )
+
+    def iter_entries(self, tenant_id: str):
+        """
+        Yield a tenant's entries in the order they were logged.
+        """
+        with self._lock, self._connect() as conn:
+            self._import_legacy(conn, tenant_id)
+            rows = conn.execute(
+                "SELECT entry FROM sent_emails WHERE tenant_id = ? ORDER BY id", (tenant_id,)
+            ).fetchall()
+        for (entry,) in rows:
+            yield json.loads(entry)
+
+    def sent_case_ids(self, tenant_id: str, run_id: str) -> set:
+        """
+        CaseIDs already emailed by the given bulk run (used to resume it after an interruption).
+        """
+        with self._lock, self._connect() as conn:
+            self._import_legacy(conn, tenant_id)
+            rows = conn.execute(
+                "SELECT DISTINCT case_id FROM sent_emails WHERE tenant_id = ? AND run_id = ? AND case_id != ''",
+                (tenant_id, run_id),
+            ).fetchall()
+        return {case_id for (case_id,) in rows}
+
+    def count(self, tenant_id: str) -> int:
+        with self._lock, self._connect() as conn:
+            self._import_legacy(conn, tenant_id)
+            return conn.execute("SELECT COUNT(*) FROM sent_emails WHERE tenant_id = ?", (tenant_id,)).fetchone()[0]
+
+    def export(self, tenant_id: str, fmt: str = "csv") -> bytes:
+        """
+        Render a tenant's log as CSV or JSON bytes for download.
+        """
+        if fmt == "json":
+            return json.dumps(list(self.iter_entries(tenant_id)), indent=2, ensure_ascii=False).encode("utf-8")
+        if fmt != "csv":
+            raise ValueError(f"Unsupported email log export format: {fmt}")
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EMAIL_LOG_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for entry in self.iter_entries(tenant_id):
+            writer.writerow(entry)
+        return buffer.getvalue().encode("utf-8")
+
+    def compact(self, tenant_id: str) -> tuple:
+        """
+        Write the tenant's CSV and JSON export files atomically; returns their paths.
+        """
+        paths = legacy_log_paths(tenant_id)
+        for path, fmt in zip(paths, ("csv", "json")):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(self.export(tenant_id, fmt))
+            os.replace(tmp_path, path)
+        with self._lock, self._connect() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        logger.info(f"[EMAIL_LOG] Exported {self.count(tenant_id)} entries for tenant {tenant_id} to {paths}")
+        return paths
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_email_log_store() -> EmailLogStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EmailLogStore()
+        return _store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export a tenant's sent-email log to CSV/JSON.")
+    parser.add_argument("tenant_id")
+    args = parser.parse_args()
+    print("\n".join(get_email_log_store().compact(args.tenant_id)))
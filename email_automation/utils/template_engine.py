@@ -1,40 +1,110 @@
 import os
+import re
+import threading
+from collections import OrderedDict
 
-def merge_template(template_path: str, replacements: dict) -> tuple[str, str, list[str]]:
+TEMPLATE_CACHE_SIZE = int(os.getenv("EMAIL_TEMPLATE_CACHE_SIZE", "64"))
+PLACEHOLDER_PATTERN = re.compile(r"\{\{([^{}]*)\}\}")
+
+
+class CompiledSection:
+    """
+    One template section pre-split into literal text and placeholder names,
+    so a row renders by joining segments in a single pass.
     """
-    Loads a .txt or .html template using the full template_path and substitutes {{placeholders}} with values.
 
-    Template format:
-    Subject: Welcome {{ClientName}}
-    Body:
-    <html or text content with {{placeholders}}>
+    def __init__(self, text: str):
+        parts = PLACEHOLDER_PATTERN.split(text)
+        # Even indexes are literals, odd indexes are placeholder names
+        self.literals = parts[0::2]
+        self.placeholders = parts[1::2]
 
-    Returns: (subject, body, cc_list)
+    def render(self, replacements: dict) -> str:
+        out = [self.literals[0]]
+        for name, literal in zip(self.placeholders, self.literals[1:]):
+            out.append(str(replacements[name]) if name in replacements else f"{{{{{name}}}}}")
+            out.append(literal)
+        return "".join(out)
+
+
+class CompiledTemplate:
+    """
+    Parsed Subject:/Body: email template.
+    """
+
+    def __init__(self, content: str):
+        # Validate template sections
+        if "Subject:" not in content or "Body:" not in content:
+            raise ValueError("Template must contain both 'Subject:' and 'Body:' sections")
+
+        # Split into subject and body
+        self.subject = CompiledSection(content.split("Subject:")[1].split("Body:")[0].strip())
+        self.body = CompiledSection(content.split("Body:")[1].strip())
+
+    def render(self, replacements: dict) -> tuple[str, str, list[str]]:
+        # Build CC list if ReferringAttorneyEmail exists
+        cc_list = (
+            [replacements.get("ReferringAttorneyEmail", "")]
+            if "ReferringAttorneyEmail" in replacements else []
+        )
+        return self.subject.render(replacements), self.body.render(replacements), cc_list
+
+
+_template_cache = OrderedDict()
+_template_cache_lock = threading.Lock()
+_template_cache_stats = {"hits": 0, "misses": 0}
+
+
+def load_template(template_path: str) -> CompiledTemplate:
+    """
+    Return the compiled template for a path, re-parsing only when the file's
+    mtime or size changes.
     """
     # Accept the full path instead of rebuilding it
-    if not os.path.exists(template_path):
+    try:
+        stat = os.stat(template_path)
+    except OSError:
         raise FileNotFoundError(f"Template '{template_path}' not found")
 
+    key = os.path.abspath(template_path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    with _template_cache_lock:
+        cached = _template_cache.get(key)
+        if cached and cached[0] == stamp:
+            _template_cache.move_to_end(key)
+            _template_cache_stats["hits"] += 1
+            return cached[1]
+
     with open(template_path, "r", encoding="utf-8") as f:
-        content = f.read()
+        compiled = CompiledTemplate(f.read())
+
+    with _template_cache_lock:
+        _template_cache_stats["misses"] += 1
+        _template_cache[key] = (stamp, compiled)
+        _template_cache.move_to_end(key)
+        while len(_template_cache) > TEMPLATE_CACHE_SIZE:
+            _template_cache.popitem(last=False)
+    return compiled
+
+
+def get_template_cache_stats() -> dict:
+    with _template_cache_lock:
+        return {**_template_cache_stats, "entries": len(_template_cache)}
 
-    # Validate template sections
-    if "Subject:" not in content or "Body:" not in content:
-        raise ValueError("Template must contain both 'Subject:' and 'Body:' sections")
 
-    # Split into subject and body
-    subject_line = content.split("Subject:")[1].split("Body:")[0].strip()
-    body_content = content.split("Body:")[1].strip()
+def merge_template(template_path: str, replacements: dict) -> tuple[str, str, list[str]]:
+    """
+    Loads a .txt or .html template using the full template_path and substitutes {{placeholders}} with values.
 
-    # Replace {{placeholders}} in subject and body
-    for key, value in replacements.items():
-        subject_line = subject_line.replace(f"{{{{{key}}}}}", str(value))
-        body_content = body_content.replace(f"{{{{{key}}}}}", str(value))
+    Template format:
+    Subject: Welcome {{ClientName}}
+    Body:
+    <html or text content with {{placeholders}}>
 
-    # Build CC list if ReferringAttorneyEmail exists
-    cc_list = (
-        [replacements.get("ReferringAttorneyEmail", "")]
-        if "ReferringAttorneyEmail" in replacements else []
-    )
+    The parsed template is cached per path (invalidated when the file changes);
+    placeholders without a replacement are left as-is.
 
-    return subject_line, body_content, cc_list
+    Returns: (subject, body, cc_list)
+    """
+    return load_template(template_path).render(replacements)
@@ -0,0 +1,193 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from logger import logger
+
+DASHBOARD_QUERY_CACHE_SIZE = int(os.getenv("DASHBOARD_QUERY_CACHE_SIZE", "256"))
+# Engines kept for recent snapshots (normally just the current one)
+DASHBOARD_QUERY_MAX_ENGINES = 2
+
+
+class _ColumnIndex:
+    """
+    Category codes for one column plus lazily built packed bitmaps per value.
+    """
+
+    def __init__(self, series: pd.Series, as_text: bool):
+        values = series.astype(str) if as_text else series
+        codes, uniques = pd.factorize(values)
+        self.codes = codes
+        self.uniques = uniques
+        self.lookup = {value: code for code, value in enumerate(uniques)}
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        self._order = order
+        self._bounds = bounds
+        self._bitmaps = {}
+
+    def bitmap(self, code: int, rows: int) -> np.ndarray:
+        bits = self._bitmaps.get(code)
+        if bits is None:
+            mask = np.zeros(rows, dtype=bool)
+            mask[self._order[self._bounds[code]:self._bounds[code + 1]]] = True
+            bits = self._bitmaps[code] = np.packbits(mask)
+        return bits
+
+
+class DashboardQueryEngine:
+    """
+    Filter and aggregate one dashboard snapshot without rescanning it.
+
+    Each filtered column is factorized once into category codes; the rows of
+    a value are kept as a packed bitmap. A filter combination ORs the bitmaps
+    of the selected values per column and ANDs the columns together. Row
+    selections and value counts are cached per filter key, so reruns with
+    unchanged filters don't recompute them; filtered frames are taken from
+    the cached positions per call rather than kept as row copies.
+    """
+
+    def __init__(self, df: pd.DataFrame, cache_size: int = DASHBOARD_QUERY_CACHE_SIZE):
+        self.df = df
+        self.rows = len(df)
+        self.cache_size = cache_size
+        self._indexes = {}
+        self._results = OrderedDict()
+        self._lock = threading.RLock()
+        self.metrics = {"hits": 0, "misses": 0, "indexes_built": 0}
+
+    def _index(self, column: str, as_text: bool = False) -> _ColumnIndex:
+        key = (column, as_text)
+        index = self._indexes.get(key)
+        if index is None:
+            start = time.perf_counter()
+            index = self._indexes[key] = _ColumnIndex(self.df[column], as_text)
+            self.metrics["indexes_built"] += 1
+            logger.debug(
+                f"[DASHBOARD_QUERY] Indexed {column} ({len(index.uniques)} values) "
+                f"in {(time.perf_counter() - start) * 1000:.1f}ms"
+            )
+        return index
+
+    def _cached(self, key: tuple, compute):
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.metrics["hits"] += 1
+                return self._results[key]
+            self.metrics["misses"] += 1
+            value = self._results[key] = compute()
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+            return value
+
+    @staticmethod
+    def filter_key(filters: dict = None, text_filters: dict = None) -> tuple:
+        """
+        Canonical, hashable form of a filter combination; empty selections are ignored.
+        """
+        def freeze(spec, as_text):
+            return tuple(
+                (column, as_text, tuple(sorted(set(values), key=str)))
+                for column, values in sorted((spec or {}).items())
+                if values
+            )
+        return freeze(filters, False) + freeze(text_filters, True)
+
+    def _bits(self, key: tuple):
+        if not key:
+            return None
+        combined = None
+        for column, as_text, values in key:
+            index = self._index(column, as_text)
+            column_bits = np.zeros((self.rows + 7) // 8, dtype=np.uint8)
+            for value in values:
+                code = index.lookup.get(value)
+                if code is not None:
+                    np.bitwise_or(column_bits, index.bitmap(code, self.rows), out=column_bits)
+            combined = column_bits if combined is None else np.bitwise_and(combined, column_bits, out=combined)
+        return combined
+
+    def positions(self, filters: dict = None, text_filters: dict = None) -> np.ndarray:
+        """
+        Row positions matching every filter: a row matches a column's filter
+        when its value (or str(value) for text_filters) is one of the selected values.
+        """
+        key = self.filter_key(filters, text_filters)
+
+        def compute():
+            bits = self._bits(key)
+            if bits is None:
+                return np.arange(self.rows)
+            return np.flatnonzero(np.unpackbits(bits, count=self.rows))
+
+        return self._cached(("positions", key), compute)
+
+    def frame(self, filters: dict = None, text_filters: dict = None) -> pd.DataFrame:
+        """
+        The filtered rows of the snapshot (the unfiltered frame is shared; copy before mutating).
+        """
+        if not self.filter_key(filters, text_filters):
+            return self.df
+        return self.df.take(self.positions(filters, text_filters))
+
+    def value_counts(self, column: str, filters: dict = None, text_filters: dict = None) -> pd.Series:
+        """
+        Same as frame(...)[column].value_counts(), without categories that don't occur.
+        """
+        key = self.filter_key(filters, text_filters)
+
+        def compute():
+            index = self._index(column)
+            positions = self.positions(filters, text_filters)
+            codes = index.codes if len(positions) == self.rows else index.codes[positions]
+            counts = np.bincount(codes[codes >= 0], minlength=len(index.uniques))
+            present = np.flatnonzero(counts)
+            result = pd.Series(counts[present], index=pd.Index(np.asarray(index.uniques)[present], name=column),
+                               name="count")
+            return result.sort_values(ascending=False, kind="stable")
+
+        return self._cached(("value_counts", column, key), compute)
+
+    def options(self, column: str, as_text: bool = False) -> list:
+        """
+        Sorted distinct non-missing values of a column, for filter widgets.
+        """
+        def compute():
+            values = self.df[column].dropna()
+            return sorted((values.astype(str) if as_text else values).unique())
+
+        return self._cached(("options", column, as_text), compute)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.metrics)
+            stats["cached_results"] = len(self._results)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["hits"] / lookups) if lookups else 0.0
+        return stats
+
+
+_engines = OrderedDict()
+_engines_lock = threading.Lock()
+
+
+def get_query_engine(df: pd.DataFrame) -> DashboardQueryEngine:
+    """
+    Query engine for a dashboard frame, shared across reruns and sessions while
+    the snapshot it came from (df.attrs["snapshot_key"]) stays current.
+    """
+    snapshot_key = df.attrs.get("snapshot_key")
+    if snapshot_key is None:
+        return DashboardQueryEngine(df)
+    key = (snapshot_key, tuple(df.columns))
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = _engines[key] = DashboardQueryEngine(df)
+            while len(_engines) > DASHBOARD_QUERY_MAX_ENGINES:
+                _engines.popitem(last=False)
+        _engines.move_to_end(key)
+        return engine
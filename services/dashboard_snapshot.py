@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from io import BytesIO
+import pandas as pd
+import pyarrow.feather as feather
+from logger import logger
+
+DASHBOARD_SNAPSHOT_DIR = os.getenv("DASHBOARD_SNAPSHOT_DIR", os.path.join("data", "dashboard_snapshots"))
+# Within this window the snapshot is used without asking Dropbox for the rev
+DASHBOARD_REV_CHECK_SECONDS = float(os.getenv("DASHBOARD_REV_CHECK_SECONDS", "60"))
+# Text columns with at most this share of distinct values are stored as categoricals
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+def _atomic_write_bytes(path: str, data: bytes):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def to_columnar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Prepare an Excel-parsed frame for Arrow: mixed-type text columns become
+    strings (missing values stay missing) and repetitive ones become categoricals.
+    """
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+    for col in df.columns:
+        series = df[col]
+        if series.dtype != object:
+            continue
+        series = series.where(series.isna(), series.astype(str))
+        unique = series.nunique(dropna=True)
+        if len(series) and unique <= max(1, len(series) * CATEGORY_MAX_UNIQUE_RATIO):
+            series = series.astype("category")
+        df[col] = series
+    return df
+
+
+class DashboardSnapshotStore:
+    """
+    Columnar snapshots of the Master Dashboard workbook, keyed by Dropbox path and sheet.
+
+    The workbook is downloaded and parsed with openpyxl only when its Dropbox
+    rev changes; the result is written once as an uncompressed Feather file
+    that later loads memory-map. Snapshots live on disk, so every session and
+    process shares them, and the current one is also kept in memory.
+    """
+
+    def __init__(self, root: str = DASHBOARD_SNAPSHOT_DIR, rev_check_seconds: float = DASHBOARD_REV_CHECK_SECONDS):
+        self.root = root
+        self.rev_check_seconds = rev_check_seconds
+        self._lock = threading.Lock()
+        self._frames = {}
+        self.metrics = {"memory_hits": 0, "disk_loads": 0, "rev_checks": 0, "rebuilds": 0}
+        os.makedirs(root, exist_ok=True)
+
+    def _paths(self, dropbox_path: str, sheet_name: str) -> tuple:
+        key = hashlib.sha1(f"{dropbox_path.lower()}|{sheet_name}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.root, f"{key}.feather"), os.path.join(self.root, f"{key}.json")
+
+    def _read_meta(self, meta_path: str) -> dict:
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, meta_path: str, meta: dict):
+        _atomic_write_bytes(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def _load_frame(self, data_path: str, rev: str) -> pd.DataFrame:
+        cached = self._frames.get(data_path)
+        if cached and cached[0] == rev:
+            self.metrics["memory_hits"] += 1
+            return cached[1]
+        df = feather.read_table(data_path, memory_map=True).to_pandas()
+        # Lets per-snapshot structures (e.g. dashboard query indexes) be shared across sessions
+        df.attrs["snapshot_key"] = f"{data_path}@{rev}"
+        self._frames[data_path] = (rev, df)
+        self.metrics["disk_loads"] += 1
+        return df
+
+    def _rebuild(self, dbx, dropbox_path: str, sheet_name: str, data_path: str) -> tuple:
+        start = time.perf_counter()
+        metadata, res = dbx.files_download(dropbox_path)
+        if not res or not res.content:
+            raise ValueError(f"No content returned from Dropbox for path: {dropbox_path}")
+
+        df = to_columnar(pd.read_excel(BytesIO(res.content), sheet_name=sheet_name))
+        tmp_path = f"{data_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        # Uncompressed so later reads can memory-map the columns
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, data_path)
+
+        self.metrics["rebuilds"] += 1
+        logger.info(
+            f"[DASHBOARD_SNAPSHOT] Rebuilt snapshot for {dropbox_path} rev {metadata.rev} "
+            f"({len(df)} rows) in {time.perf_counter() - start:.2f}s"
+        )
+        return metadata.rev, len(df)
+
+    def load(self, dbx, dropbox_path: str, sheet_name: str = "Master Dashboard") -> pd.DataFrame:
+        """
+        Return the dashboard frame, rebuilding the snapshot only when the Dropbox rev changed.
+        Callers get a shallow copy, so adding or renaming columns doesn't affect other sessions.
+        """
+        data_path, meta_path = self._paths(dropbox_path, sheet_name)
+        with self._lock:
+            meta = self._read_meta(meta_path)
+            now = time.time()
+            have_snapshot = meta.get("rev") and os.path.exists(data_path)
+
+            if not have_snapshot or now - meta.get("checked_at", 0) >= self.rev_check_seconds:
+                current_rev = None
+                if have_snapshot:
+                    self.metrics["rev_checks"] += 1
+                    current_rev = dbx.files_get_metadata(dropbox_path).rev
+                if current_rev != meta.get("rev") or not have_snapshot:
+                    rev, rows = self._rebuild(dbx, dropbox_path, sheet_name, data_path)
+                    meta = {"path": dropbox_path, "sheet": sheet_name, "rev": rev, "rows": rows}
+                meta["checked_at"] = now
+                self._write_meta(meta_path, meta)
+
+            return self._load_frame(data_path, meta["rev"]).copy(deep=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.metrics)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> DashboardSnapshotStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DashboardSnapshotStore()
+        return _store
@@ -11,15 +11,18 @@ from logger import logger
 
 from prompts.prompt_factory import build_prompt
 from core.prompts.demand_example import EXAMPLE_DEMAND, SETTLEMENT_EXAMPLE
-from services.openai_client import safe_generate
+from services.openai_client import safe_generate, stream_generate
+from utils.stream_utils import collect_stream
 from core.usage_tracker import check_quota_and_decrement
 from services.dropbox_client import download_template_file
 
 # === Polishing function ===
-async def polish_demand_text(text: str) -> str:
+async def polish_demand_text(text: str, on_update=None) -> str:
     """
     Polishes the final demand letter: removes repetition, strengthens transitions, 
     and cuts unnecessary boilerplate.
+    If on_update is given the completion is streamed and on_update(text_so_far)
+    is called as it arrives.
     """
     try:
         if not text:
@@ -65,7 +68,10 @@ Here is the draft demand letter to polish:
 {text}
 """
 
-        polished = await safe_generate(prompt)
+        if on_update:
+            polished = await collect_stream(stream_generate(prompt), on_update)
+        else:
+            polished = await safe_generate(prompt)
         return polished.strip() if polished else text
 
     except Exception as e:
@@ -181,9 +187,10 @@ def replace_placeholders(doc: Document, replacements: dict):
                         paragraph.add_run(text)
 
 
-async def fill_template(data: dict, template_path: str, output_dir: str) -> dict:
+async def fill_template(data: dict, template_path: str, output_dir: str, on_polish_update=None) -> dict:
     """
     Fill the demand template and return dict with paths for both unpolished and polished versions.
+    on_polish_update(text_so_far) receives the polished letter as it streams in.
     """
     try:
         if not data or not isinstance(data, dict):
@@ -229,7 +236,7 @@ async def fill_template(data: dict, template_path: str, output_dir: str) -> dict
 
         # Polish entire text and overwrite to new polished document
         full_text = "\n\n".join([p.text for p in doc.paragraphs if p.text.strip()])
-        polished_text = await polish_demand_text(full_text)
+        polished_text = await polish_demand_text(full_text, on_update=on_polish_update)
 
         polished_doc = Document()
         for paragraph in polished_text.split("\n"):
@@ -281,6 +288,7 @@ async def generate_demand_letter(
     template_path: str,
     output_path: str,
     example_text: str = None,
+    on_polish_update=None,
 ):
     try:
         data = {
@@ -293,7 +301,7 @@ async def generate_demand_letter(
             "RecipientName": defendant,
             "Example Text": example_text or "",
         }
-        return await fill_template(data, template_path, os.path.dirname(output_path))
+        return await fill_template(data, template_path, os.path.dirname(output_path), on_polish_update)
 
     except Exception as e:
         handle_error(e, code="DEMAND_GEN_001",
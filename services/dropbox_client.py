@@ -1,10 +1,13 @@
 import os
+import threading
 import dropbox
 import pandas as pd
-from io import BytesIO
 from config import AppConfig, get_config
 from core.error_handling import handle_error
 from logger import logger
+from services.dropbox_mirror import get_dropbox_mirror
+from services.dropbox_index import get_folder_index
+from services.dashboard_snapshot import get_snapshot_store
 from core.constants import (
     DROPBOX_TEMPLATES_ROOT,
     DROPBOX_EXAMPLES_ROOT,
@@ -40,16 +43,21 @@ def normalize_path(path: str) -> str:
     return normalized_path
 
 
+DROPBOX_MAX_CONNECTIONS = int(os.getenv("DROPBOX_MAX_CONNECTIONS", "8"))
+
+
 class DropboxClient:
     def __init__(self, config: AppConfig = None):
         self.config = config or get_config()
 
         try:
             # Create Dropbox client using refresh token (auto-refresh access token)
+            # over a keep-alive HTTP session
             self.dbx = dropbox.Dropbox(
                 app_key=self.config.DROPBOX_APP_KEY,
                 app_secret=self.config.DROPBOX_APP_SECRET,
                 oauth2_refresh_token=self.config.DROPBOX_REFRESH_TOKEN,
+                session=dropbox.create_session(max_connections=DROPBOX_MAX_CONNECTIONS),
             )
             logger.info("[DROPBOX_INIT] ✅ Dropbox client initialized with refresh token")
         except Exception as e:
@@ -62,16 +70,13 @@ class DropboxClient:
         path = normalize_path(file_path or self.config.DROPBOX_MASTER_DASHBOARD_PATH)
 
         try:
-            metadata, res = self.dbx.files_download(path)
-            if not res or not res.content:
-                raise ValueError(f"No content returned from Dropbox for path: {path}")
-
-            df = pd.read_excel(BytesIO(res.content), sheet_name=sheet_name)
+            # Columnar snapshot, re-downloaded and re-parsed only when the workbook's rev changes
+            df = get_snapshot_store().load(self.dbx, path, sheet_name)
             if df.empty:
                 raise ValueError(f"Downloaded Excel is empty for path: {path}")
 
             logger.info(
-                f"[DROPBOX_DOWNLOAD] 📥 Downloaded dashboard from {path} ({len(df)} rows)"
+                f"[DROPBOX_DOWNLOAD] 📥 Loaded dashboard snapshot for {path} ({len(df)} rows)"
             )
             return df
 
@@ -81,28 +86,25 @@ class DropboxClient:
     def list_files(self, folder_path: str):
         """
         List all files in a Dropbox folder. Auto-create folder if it doesn't exist.
+        Answered from the cursor-synced folder index (see services/dropbox_index).
         """
         folder_path = normalize_path(folder_path)
         try:
-            # Ensure the folder exists (create if missing)
             try:
-                self.dbx.files_get_metadata(folder_path)
+                files = [normalize_path(name) for name in get_folder_index().list(self.dbx, folder_path)]
             except dropbox.exceptions.ApiError as e:
                 if (
                     hasattr(e.error, "is_path")
                     and e.error.is_path()
                     and e.error.get_path().is_not_found()
                 ):
-                    # Folder missing: create it
+                    # Folder missing: create it (it is empty)
                     logger.info(f"[DROPBOX] Creating missing folder: {folder_path}")
                     self.dbx.files_create_folder_v2(folder_path)
-                else:
-                    raise
+                    return []
+                raise
 
-            result = self.dbx.files_list_folder(folder_path)
-            files = [normalize_path(entry.name) for entry in result.entries if hasattr(entry, "name")]
-
-            logger.info(
+            logger.debug(
                 f"[DROPBOX_LIST] 📂 Listed {len(files)} files in folder: {folder_path}"
             )
             return files
@@ -113,7 +115,8 @@ class DropboxClient:
     def download_file(self, dropbox_path: str, local_dir: str = "downloads") -> str:
         """
         Download a file from Dropbox to a local directory and return the local path.
-        Ensures that duplicate paths and extensions are cleaned.
+        Ensures that duplicate paths and extensions are cleaned. Unchanged files
+        are copied from the local mirror instead of being downloaded again.
         """
         dropbox_path = normalize_path(dropbox_path)
         try:
@@ -126,17 +129,22 @@ class DropboxClient:
 
             local_path = os.path.join(local_dir, filename)
 
-            metadata, res = self.dbx.files_download(dropbox_path)
-            with open(local_path, "wb") as f:
-                f.write(res.content)
+            # Served from the local mirror; only re-downloaded when the file changed
+            get_dropbox_mirror().export(self.dbx, dropbox_path, local_path)
 
             logger.info(
-                f"[DROPBOX_DOWNLOAD] 📄 Downloaded {dropbox_path} → {local_path}"
+                f"[DROPBOX_DOWNLOAD] 📄 Synced {dropbox_path} → {local_path}"
             )
             return local_path
         except Exception as e:
             handle_error(e, code="DROPBOX_DOWNLOAD_FILE_001", raise_it=True)
 
+    def invalidate_listing(self, path: str):
+        """
+        Call after changing files in Dropbox so the folder's next listing picks it up.
+        """
+        get_folder_index().invalidate(normalize_path(os.path.dirname(path)))
+
     def ensure_base_folders(self):
         """
         Ensure the full folder tree for templates/examples exists in Dropbox.
@@ -161,12 +169,39 @@ class DropboxClient:
                 self.dbx.files_create_folder_v2(folder)
 
 
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_dropbox_client() -> DropboxClient:
+    """
+    Process-wide DropboxClient, created on first use.
+    Sharing it means config is loaded once and the HTTP session and refreshed
+    access token are reused by every caller (thread-safe).
+    """
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = DropboxClient()
+    return _shared_client
+
+
+def reset_dropbox_client():
+    """
+    Drop the shared client (e.g. after credentials change); the next call rebuilds it.
+    """
+    global _shared_client
+    with _shared_client_lock:
+        _shared_client = None
+
+
 # === Global helper functions (used by modules) ===
 
 def download_dashboard_df(
     file_path: str = None, sheet_name: str = "Master Dashboard"
 ) -> pd.DataFrame:
-    client = DropboxClient()
+    client = get_dropbox_client()
     return client.download_dashboard_df(file_path=file_path, sheet_name=sheet_name)
 
 
@@ -188,7 +223,7 @@ def list_templates(category: str):
         "foia": DROPBOX_FOIA_TEMPLATE_DIR,
         "batch_docs": f"{DROPBOX_TEMPLATES_ROOT}/Batch_Docs"
     }
-    client = DropboxClient()
+    client = get_dropbox_client()
     return client.list_files(folder_map[category])
 
 
@@ -204,7 +239,7 @@ def download_template_file(category: str, filename: str, local_dir="templates"):
         "foia": DROPBOX_FOIA_TEMPLATE_DIR,
         "batch_docs": f"{DROPBOX_TEMPLATES_ROOT}/Batch_Docs"
     }
-    client = DropboxClient()
+    client = get_dropbox_client()
     filename = normalize_path(os.path.basename(filename))
 
     # Enforce supported extensions (.txt or .html for emails)
@@ -225,7 +260,7 @@ def list_examples(module: str):
         "mediation": DROPBOX_MEDIATION_EXAMPLES_DIR,
         "style_transfer": DROPBOX_STYLE_EXAMPLES_DIR
     }
-    client = DropboxClient()
+    client = get_dropbox_client()
     return client.list_files(folder_map[module])
 
 
@@ -239,7 +274,7 @@ def download_example_file(module: str, filename: str, local_dir="examples"):
         "mediation": DROPBOX_MEDIATION_EXAMPLES_DIR,
         "style_transfer": DROPBOX_STYLE_EXAMPLES_DIR 
     }
-    client = DropboxClient()
+    client = get_dropbox_client()
     filename = normalize_path(os.path.basename(filename))
     path = normalize_path(f"{folder_map[module]}/{filename}")
     return client.download_file(path, local_dir)
@@ -249,7 +284,7 @@ def upload_file_to_dropbox(path: str, file_bytes: bytes):
     """
     Upload a file to Dropbox, creating folders if needed.
     """
-    client = DropboxClient()
+    client = get_dropbox_client()
     try:
         path = normalize_path(path)
 
@@ -260,6 +295,7 @@ def upload_file_to_dropbox(path: str, file_bytes: bytes):
         folder = os.path.dirname(path)
         client.list_files(folder)  # ensure folder exists
         client.dbx.files_upload(file_bytes, path, mode=dropbox.files.WriteMode.overwrite)
+        client.invalidate_listing(path)
         logger.info(f"[DROPBOX_UPLOAD] 📤 Uploaded file to {path}")
     except Exception as e:
         handle_error(e, code="DROPBOX_UPLOAD_001", raise_it=True)
@@ -269,10 +305,11 @@ def delete_file_from_dropbox(path: str):
     """
     Delete a file from Dropbox.
     """
-    client = DropboxClient()
+    client = get_dropbox_client()
     try:
         path = normalize_path(path)
         client.dbx.files_delete_v2(path)
+        client.invalidate_listing(path)
         logger.info(f"[DROPBOX_DELETE] 🗑️ Deleted {path}")
     except Exception as e:
         handle_error(e, code="DROPBOX_DELETE_001", raise_it=True)
@@ -282,11 +319,13 @@ def move_file_in_dropbox(old_path: str, new_path: str):
     """
     Move or rename a file in Dropbox.
     """
-    client = DropboxClient()
+    client = get_dropbox_client()
     try:
         old_path = normalize_path(old_path)
         new_path = normalize_path(new_path)
         client.dbx.files_move_v2(old_path, new_path, autorename=False)
+        client.invalidate_listing(old_path)
+        client.invalidate_listing(new_path)
         logger.info(f"[DROPBOX_MOVE] 🔄 Renamed/relocated {old_path} → {new_path}")
     except Exception as e:
         handle_error(e, code="DROPBOX_MOVE_001", raise_it=True)
@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+import dropbox
+from logger import logger
+
+DROPBOX_LISTING_TTL_SECONDS = float(os.getenv("DROPBOX_LISTING_TTL_SECONDS", "30"))
+DROPBOX_LISTING_LONGPOLL = os.getenv("DROPBOX_LISTING_LONGPOLL", "false").lower() == "true"
+DROPBOX_LONGPOLL_TIMEOUT_SECONDS = 120
+
+
+class DropboxFolderIndex:
+    """
+    In-memory listing of Dropbox folders kept current with list_folder cursors.
+
+    The first listing of a folder pages through files_list_folder /
+    files_list_folder_continue until has_more is false and stores the cursor.
+    Afterwards listings are answered from memory; once the TTL has passed (or
+    the folder was invalidated) only the deltas since the cursor are fetched.
+    With longpoll enabled a daemon thread per folder waits on
+    files_list_folder_longpoll and applies changes as they happen, so
+    listings never wait on Dropbox.
+    """
+
+    def __init__(self, ttl_seconds: float = DROPBOX_LISTING_TTL_SECONDS, longpoll: bool = DROPBOX_LISTING_LONGPOLL):
+        self.ttl_seconds = ttl_seconds
+        self.longpoll = longpoll
+        self._folders = {}
+        self._lock = threading.Lock()
+        self.metrics = {"memory_hits": 0, "full_syncs": 0, "delta_syncs": 0, "pages": 0, "longpoll_changes": 0}
+
+    def _folder(self, folder_path: str) -> dict:
+        key = folder_path.lower()
+        with self._lock:
+            if key not in self._folders:
+                self._folders[key] = {
+                    "path": folder_path,
+                    "cursor": None,
+                    "entries": {},
+                    "synced_at": 0.0,
+                    "watching": False,
+                    "watcher": None,
+                    "lock": threading.RLock(),
+                }
+            return self._folders[key]
+
+    def _apply(self, state: dict, entries: list):
+        for entry in entries:
+            key = getattr(entry, "path_lower", None) or entry.name.lower()
+            if isinstance(entry, dropbox.files.DeletedMetadata):
+                state["entries"].pop(key, None)
+            else:
+                state["entries"][key] = entry.name
+
+    def _full_sync(self, dbx, state: dict):
+        result = dbx.files_list_folder(state["path"])
+        entries = {}
+        state["entries"] = entries
+        self._apply(state, result.entries)
+        pages = 1
+        while result.has_more:
+            result = dbx.files_list_folder_continue(result.cursor)
+            self._apply(state, result.entries)
+            pages += 1
+        state["cursor"] = result.cursor
+        self.metrics["full_syncs"] += 1
+        self.metrics["pages"] += pages
+        logger.info(f"[DROPBOX_INDEX] Indexed {len(entries)} entries in {state['path']} ({pages} pages)")
+
+    def _delta_sync(self, dbx, state: dict):
+        try:
+            result = dbx.files_list_folder_continue(state["cursor"])
+        except dropbox.exceptions.ApiError as e:
+            if getattr(e.error, "is_reset", lambda: False)():
+                # Cursor expired: Dropbox requires a fresh listing
+                self._full_sync(dbx, state)
+                return
+            raise
+        self._apply(state, result.entries)
+        while result.has_more:
+            result = dbx.files_list_folder_continue(result.cursor)
+            self._apply(state, result.entries)
+        state["cursor"] = result.cursor
+        self.metrics["delta_syncs"] += 1
+
+    def list(self, dbx, folder_path: str) -> list:
+        """
+        Names of all entries in folder_path (complete, however many pages).
+        """
+        state = self._folder(folder_path)
+        with state["lock"]:
+            fresh = state["watching"] or time.time() - state["synced_at"] < self.ttl_seconds
+            if state["cursor"] and fresh:
+                self.metrics["memory_hits"] += 1
+            else:
+                if state["cursor"]:
+                    self._delta_sync(dbx, state)
+                else:
+                    self._full_sync(dbx, state)
+                state["synced_at"] = time.time()
+                if self.longpoll and not state["watching"]:
+                    self._start_watching(dbx, state)
+            return list(state["entries"].values())
+
+    def invalidate(self, folder_path: str):
+        """
+        Make the next listing fetch deltas (after this process changed the folder).
+        """
+        state = self._folders.get(folder_path.lower())
+        if state:
+            with state["lock"]:
+                state["synced_at"] = 0.0
+                if state["watching"]:
+                    # The watcher would see the change soon; catch up now
+                    state["watching"] = False
+
+    def _start_watching(self, dbx, state: dict):
+        state["watching"] = True
+        if state["watcher"] and state["watcher"].is_alive():
+            return
+        state["watcher"] = thread = threading.Thread(
+            target=self._watch, args=(dbx, state), name=f"dropbox-longpoll:{state['path']}", daemon=True
+        )
+        thread.start()
+
+    def _watch(self, dbx, state: dict):
+        while True:
+            try:
+                with state["lock"]:
+                    # Back in sync after an invalidate or a failed poll
+                    state["watching"] = True
+                    cursor = state["cursor"]
+                result = dbx.files_list_folder_longpoll(cursor, timeout=DROPBOX_LONGPOLL_TIMEOUT_SECONDS)
+                if result.changes:
+                    with state["lock"]:
+                        self._delta_sync(dbx, state)
+                        state["synced_at"] = time.time()
+                        self.metrics["longpoll_changes"] += 1
+                if result.backoff:
+                    time.sleep(result.backoff)
+            except Exception as e:
+                logger.warning(f"[DROPBOX_INDEX] Longpoll for {state['path']} failed, retrying: {e}")
+                with state["lock"]:
+                    state["watching"] = False
+                time.sleep(30)
+
+    def stats(self) -> dict:
+        with self._lock:
+            folders = len(self._folders)
+            watched = sum(1 for state in self._folders.values() if state["watching"])
+        return {**self.metrics, "folders": folders, "watched": watched}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_folder_index() -> DropboxFolderIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DropboxFolderIndex()
+        return _index
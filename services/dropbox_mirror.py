@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from logger import logger
+
+DROPBOX_MIRROR_DIR = os.getenv("DROPBOX_MIRROR_DIR", os.path.join("data", "dropbox_mirror"))
+DROPBOX_MIRROR_TTL_SECONDS = float(os.getenv("DROPBOX_MIRROR_TTL_SECONDS", "60"))
+DROPBOX_MIRROR_MAX_MB = int(os.getenv("DROPBOX_MIRROR_MAX_MB", "200"))
+DROPBOX_HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+def dropbox_content_hash(data: bytes) -> str:
+    """
+    Dropbox content_hash: SHA-256 over the concatenated SHA-256 digests of 4 MB blocks.
+    """
+    block_digests = b"".join(
+        hashlib.sha256(data[i:i + DROPBOX_HASH_BLOCK_SIZE]).digest()
+        for i in range(0, len(data), DROPBOX_HASH_BLOCK_SIZE)
+    )
+    return hashlib.sha256(block_digests).hexdigest()
+
+
+def _atomic_write(path: str, data: bytes):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class DropboxMirror:
+    """
+    Local mirror of Dropbox templates/examples keyed by Dropbox path.
+
+    Each entry records the file's rev and content_hash. Within ttl_seconds of
+    the last check a mirrored file is used as-is; after that one cheap
+    files_get_metadata call revalidates it, and the file is only downloaded
+    again when its content_hash changed. Files are replaced atomically and the
+    least recently used ones are evicted once the mirror exceeds max_bytes.
+    """
+
+    def __init__(self, root: str = DROPBOX_MIRROR_DIR, ttl_seconds: float = DROPBOX_MIRROR_TTL_SECONDS,
+                 max_bytes: int = DROPBOX_MIRROR_MAX_MB * 1024 * 1024):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        self.metrics = {
+            "ttl_hits": 0,
+            "revalidated": 0,
+            "downloads": 0,
+            "bytes_downloaded": 0,
+            "evictions": 0,
+        }
+        os.makedirs(root, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Forget entries whose file was removed behind our back
+        return {key: entry for key, entry in index.items() if os.path.exists(entry["local_file"])}
+
+    def _save_index(self):
+        _atomic_write(self.index_path, json.dumps(self._index, indent=2).encode("utf-8"))
+
+    def _local_file(self, dropbox_path: str) -> str:
+        digest = hashlib.sha1(dropbox_path.lower().encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.root, f"{digest}_{os.path.basename(dropbox_path)}")
+
+    def _evict(self, keep: str):
+        total = sum(entry["size"] for entry in self._index.values())
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            try:
+                os.remove(entry["local_file"])
+            except OSError:
+                pass
+            total -= entry["size"]
+            del self._index[key]
+            self.metrics["evictions"] += 1
+
+    def fetch(self, dbx, dropbox_path: str) -> str:
+        """
+        Return the path of an up-to-date local copy of dropbox_path.
+        """
+        key = dropbox_path.lower()
+        now = time.time()
+
+        with self._lock:
+            entry = self._index.get(key)
+            if entry and not os.path.exists(entry["local_file"]):
+                entry = None
+            if entry and now - entry["validated_at"] < self.ttl_seconds:
+                entry["last_access"] = now
+                self.metrics["ttl_hits"] += 1
+                return entry["local_file"]
+
+        if entry:
+            metadata = dbx.files_get_metadata(dropbox_path)
+            if getattr(metadata, "content_hash", None) == entry["content_hash"]:
+                with self._lock:
+                    entry.update(validated_at=now, last_access=now, rev=getattr(metadata, "rev", entry["rev"]))
+                    self.metrics["revalidated"] += 1
+                    self._save_index()
+                return entry["local_file"]
+
+        metadata, res = dbx.files_download(dropbox_path)
+        content = res.content
+        content_hash = getattr(metadata, "content_hash", None)
+        if content_hash and dropbox_content_hash(content) != content_hash:
+            raise ValueError(f"Content hash mismatch for Dropbox file: {dropbox_path}")
+
+        local_file = self._local_file(dropbox_path)
+        _atomic_write(local_file, content)
+
+        with self._lock:
+            self._index[key] = {
+                "dropbox_path": dropbox_path,
+                "local_file": local_file,
+                "rev": getattr(metadata, "rev", None),
+                "content_hash": content_hash,
+                "size": len(content),
+                "validated_at": now,
+                "last_access": now,
+            }
+            self.metrics["downloads"] += 1
+            self.metrics["bytes_downloaded"] += len(content)
+            self._evict(keep=key)
+            self._save_index()
+
+        logger.info(f"[DROPBOX_MIRROR] Downloaded {dropbox_path} ({len(content)} bytes, rev {getattr(metadata, 'rev', '?')})")
+        return local_file
+
+    def export(self, dbx, dropbox_path: str, local_path: str) -> str:
+        """
+        Make local_path an up-to-date copy of dropbox_path, copying from the
+        mirror only when local_path is missing or differs.
+        """
+        source = self.fetch(dbx, dropbox_path)
+        source_stat = os.stat(source)
+        try:
+            target_stat = os.stat(local_path)
+            if (target_stat.st_size, target_stat.st_mtime_ns) == (source_stat.st_size, source_stat.st_mtime_ns):
+                return local_path
+        except OSError:
+            pass
+
+        tmp_path = f"{local_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copy2(source, tmp_path)
+        os.replace(tmp_path, local_path)
+        return local_path
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.metrics)
+            stats["entries"] = len(self._index)
+            stats["bytes"] = sum(entry["size"] for entry in self._index.values())
+        lookups = stats["ttl_hits"] + stats["revalidated"] + stats["downloads"]
+        stats["hit_ratio"] = ((stats["ttl_hits"] + stats["revalidated"]) / lookups) if lookups else 0.0
+        return stats
+
+
+_mirror = None
+_mirror_lock = threading.Lock()
+
+
+def get_dropbox_mirror() -> DropboxMirror:
+    global _mirror
+    with _mirror_lock:
+        if _mirror is None:
+            _mirror = DropboxMirror()
+        return _mirror
+
+
+def get_mirror_stats() -> dict:
+    return get_dropbox_mirror().stats()
@@ -1,6 +1,7 @@
 import os
-import pandas as pd
-import base64
+import asyncio
+import time
+import uuid
 from datetime import datetime
 from core.security import sanitize_text, sanitize_email, redact_log, mask_phi
 from core.constants import STATUS_INTAKE_COMPLETED, STATUS_QUESTIONNAIRE_SENT
@@ -9,15 +10,37 @@ from core.usage_tracker import log_usage, check_quota
 from core.error_handling import handle_error, AppError
 from core.audit import log_audit_event
 from email_automation.utils.template_engine import merge_template
-from services.graph_client import GraphClient
+from email_automation.utils.email_log import get_email_log_store
+from utils.attachment_cache import prepare_attachments
+from services.graph_client import GraphClient, GRAPH_BATCH_SIZE
 from services.neos_client import NeosClient
 from services.dropbox_client import download_template_file  # centralizes Dropbox path logic
 from logger import logger
-import json
 
 graph = GraphClient()
 neos = NeosClient()
 
+# Bulk pipeline workers per stage and queue depth between stages
+EMAIL_PIPELINE_BUILD_CONCURRENCY = int(os.getenv("EMAIL_PIPELINE_BUILD_CONCURRENCY", "8"))
+EMAIL_PIPELINE_SEND_CONCURRENCY = int(os.getenv("EMAIL_PIPELINE_SEND_CONCURRENCY", "2"))
+EMAIL_PIPELINE_NEOS_CONCURRENCY = int(os.getenv("EMAIL_PIPELINE_NEOS_CONCURRENCY", "4"))
+EMAIL_PIPELINE_NEOS_BATCH_SIZE = int(os.getenv("EMAIL_PIPELINE_NEOS_BATCH_SIZE", "50"))
+EMAIL_PIPELINE_LOG_CONCURRENCY = int(os.getenv("EMAIL_PIPELINE_LOG_CONCURRENCY", "1"))
+EMAIL_PIPELINE_QUEUE_SIZE = int(os.getenv("EMAIL_PIPELINE_QUEUE_SIZE", "100"))
+PIPELINE_STAGES = ("build", "send", "neos", "log")
+
+def _resolve_template_path(template_name: str) -> str:
+    """
+    Local path of the template, downloading it from Dropbox if missing.
+    Repeat calls are cheap: the Dropbox mirror serves the file within its TTL
+    and revalidates it by content_hash afterwards, so template edits are picked up.
+    """
+    template_path = os.path.normpath(template_name)
+    if os.path.exists(template_path):
+        return template_path
+
+    return download_template_file("email", template_name, "email_templates_cache")
+
 
 async def build_email(client_data: dict, template_name: str, attachments: list = None) -> tuple:
     """
@@ -45,9 +68,7 @@ async def build_email(client_data: dict, template_name: str, attachments: list =
             )
 
         # If the template doesn't exist locally, download from Dropbox (email category)
-        template_path = os.path.normpath(template_name)
-        if not os.path.exists(template_path):
-            template_path = download_template_file("email", template_name, "email_templates_cache")
+        template_path = _resolve_template_path(template_name)
 
         # Merge template with sanitized placeholders
         subject, body, cc = merge_template(template_path, sanitized)
@@ -81,6 +102,44 @@ async def build_email(client_data: dict, template_name: str, attachments: list =
         )
 
 
+
+
+async def _update_neos_status(client: dict):
+    """
+    Update NEOS case status (best-effort).
+    """
+    try:
+        await neos.update_case_status(client.get("CaseID", ""), STATUS_QUESTIONNAIRE_SENT)
+    except Exception as e:
+        logger.warning(f"⚠️ NEOS update failed for CaseID {client.get('CaseID', '')}: {e}")
+
+
+async def _record_sent_email(client: dict, subject: str, body: str, cc: list, template_path: str,
+                             run_id: str = None):
+    """
+    Email log, usage and audit for one sent email.
+    """
+    await log_email(client, subject, body, template_path, cc, run_id=run_id)
+    log_usage("emails_sent", 1, {"tenant_id": get_tenant_id(), "user_id": get_user_id(),
+                                 "template_path": template_path})
+
+    log_audit_event("Email Sent", {
+        "tenant_id": get_tenant_id(),
+        "user_id": get_user_id(),
+        "client_name": client.get("name", client.get("ClientName")),
+        "template_path": template_path,
+        "case_id": client.get("CaseID", ""),
+    })
+
+
+async def _finalize_sent_email(client: dict, subject: str, body: str, cc: list, template_name: str):
+    """
+    Post-send bookkeeping: NEOS status update (best-effort), email log, usage and audit.
+    """
+    await _update_neos_status(client)
+    await _record_sent_email(client, subject, body, cc, _resolve_template_path(template_name))
+
+
 async def send_email_and_update(client: dict, subject: str, body: str, cc: list,
                                 template_name: str, attachments: list = None) -> str:
     """
@@ -101,24 +160,7 @@ async def send_email_and_update(client: dict, subject: str, body: str, cc: list,
         await check_quota("emails_sent", get_tenant_id(), get_user_id(), 1)
 
         # Prepare attachments for Graph
-        formatted_attachments = []
-        if attachments:
-            for a in attachments:
-                if hasattr(a, "read"):
-                    file_bytes = a.read()
-                    file_name = a.name
-                else:
-                    # If path is passed
-                    file_name = os.path.basename(a)
-                    with open(a, "rb") as f:
-                        file_bytes = f.read()
-
-                formatted_attachments.append({
-                    "@odata.type": "#microsoft.graph.fileAttachment",
-                    "name": file_name,
-                    "contentType": "application/octet-stream",
-                    "contentBytes": base64.b64encode(file_bytes).decode("utf-8")
-                })
+        formatted_attachments = prepare_attachments(attachments)
 
         # Detect body type for Graph API
         body_type = "HTML" if body.strip().startswith("<") else "Text"
@@ -135,29 +177,7 @@ async def send_email_and_update(client: dict, subject: str, body: str, cc: list,
                 body_type=body_type
             )
 
-        # Update NEOS case status (best-effort)
-        try:
-            await neos.update_case_status(client.get("CaseID", ""), STATUS_QUESTIONNAIRE_SENT)
-        except Exception as e:
-            logger.warning(f"⚠️ NEOS update failed for CaseID {client.get('CaseID', '')}: {e}")
-
-        # Ensure template is available for logging
-        template_path = os.path.normpath(template_name)
-        if not os.path.exists(template_path):
-            template_path = download_template_file("email", template_name, "email_templates_cache")
-
-        # Log email
-        await log_email(client, subject, body, template_path, cc)
-        log_usage("emails_sent", get_tenant_id(), get_user_id(), 1, {"template_path": template_path})
-
-        # Audit
-        log_audit_event("Email Sent", {
-            "tenant_id": get_tenant_id(),
-            "user_id": get_user_id(),
-            "client_name": client.get("name", client.get("ClientName")),
-            "template_path": template_path,
-            "case_id": client.get("CaseID", ""),
-        })
+        await _finalize_sent_email(client, subject, body, cc, template_name)
 
         return "✅ Sent"
 
@@ -174,9 +194,231 @@ async def send_email_and_update(client: dict, subject: str, body: str, cc: list,
         return f"❌ Failed: {type(e).__name__}"
 
 
-async def log_email(client: dict, subject: str, body: str, template_path: str, cc: list):
+class BulkEmailPipeline:
+    """
+    Staged bulk sender: build → send → NEOS update → log.
+
+    Each stage has its own worker pool and bounded queue, so a slow stage
+    applies backpressure upstream instead of piling up coroutines. The send
+    stage drains up to GRAPH_BATCH_SIZE queued emails into one Graph $batch
+    request and the NEOS stage updates queued cases with one bulk call.
+    Sent rows are logged with the run's run_id; starting the pipeline again
+    with the same run_id and resume=True skips the rows that run already sent.
+    """
+
+    def __init__(self, template_name: str, attachments: list = None, concurrency: dict = None,
+                 queue_size: int = EMAIL_PIPELINE_QUEUE_SIZE, resume: bool = False, run_id: str = None):
+        if resume and not run_id:
+            raise ValueError("Resuming a bulk email run requires the run_id of the interrupted run")
+        self.template_name = template_name
+        self.attachments = attachments
+        self.queue_size = queue_size
+        self.resume = resume
+        self.run_id = run_id or uuid.uuid4().hex
+        self.concurrency = {
+            "build": EMAIL_PIPELINE_BUILD_CONCURRENCY,
+            "send": EMAIL_PIPELINE_SEND_CONCURRENCY,
+            "neos": EMAIL_PIPELINE_NEOS_CONCURRENCY,
+            "log": EMAIL_PIPELINE_LOG_CONCURRENCY,
+            **(concurrency or {}),
+        }
+        self.batch_sizes = {"send": GRAPH_BATCH_SIZE, "neos": EMAIL_PIPELINE_NEOS_BATCH_SIZE}
+        self.handlers = {"build": self._build, "send": self._send, "neos": self._update_neos, "log": self._log}
+        self.metrics = {
+            stage: {"processed": 0, "failed": 0, "busy_seconds": 0.0, "max_latency": 0.0, "queue_peak": 0}
+            for stage in PIPELINE_STAGES
+        }
+        self.elapsed = 0.0
+        self.skipped = 0
+        self._queues = {}
+        self._results = []
+        self._formatted_attachments = []
+        self._template_path = None
+
+    def _finish(self, item: dict, stage: str, status: str, error: str = None):
+        if error:
+            self.metrics[stage]["failed"] += 1
+        self._results[item["index"]] = {
+            "case_id": item["client"].get("CaseID", ""),
+            "status": status,
+            "stage": stage,
+            "error": error,
+        }
+
+    def _fail(self, item: dict, stage: str, e: Exception):
+        code = getattr(e, "code", None) or type(e).__name__
+        logger.error(redact_log(mask_phi(
+            f"[EMAIL_PIPELINE] {stage} failed for CaseID {item['client'].get('CaseID', '')}: {e}"
+        )))
+        self._finish(item, stage, f"❌ Failed: {code}", str(e))
+
+    async def _enqueue(self, stage: str, item: dict):
+        queue = self._queues[stage]
+        await queue.put(item)
+        self.metrics[stage]["queue_peak"] = max(self.metrics[stage]["queue_peak"], queue.qsize())
+
+    async def _worker(self, stage: str, batch_size: int = 1):
+        queue = self._queues[stage]
+        while True:
+            items = [await queue.get()]
+            while len(items) < batch_size and not queue.empty():
+                items.append(queue.get_nowait())
+
+            start = time.perf_counter()
+            try:
+                await self.handlers[stage](items)
+            except Exception as e:
+                for item in items:
+                    self._fail(item, stage, e)
+            finally:
+                latency = time.perf_counter() - start
+                metrics = self.metrics[stage]
+                metrics["processed"] += len(items)
+                metrics["busy_seconds"] += latency
+                metrics["max_latency"] = max(metrics["max_latency"], latency)
+                for _ in items:
+                    queue.task_done()
+
+    async def _build(self, items: list):
+        item = items[0]
+        client = item["client"]
+        if item.get("subject") is None or item.get("body") is None:
+            subject, body, cc, _, _, _ = await build_email(client, self.template_name)
+            item.update(subject=subject, body=body, cc=cc)
+
+        item["recipient"] = sanitize_email(
+            client.get("Case Details First Party Details Default Email Account Address", "")
+        )
+        if not item["recipient"] or item["recipient"] == "invalid@example.com":
+            raise AppError(
+                code="EMAIL_SEND_001",
+                message=f"Cannot send email: invalid email address for client {client.get('name', '[Unknown]')}",
+            )
+        await self._enqueue("send", item)
+
+    async def _send(self, items: list):
+        messages = [
+            {
+                "sender_address": None,
+                "to": item["recipient"],
+                "subject": item["subject"],
+                "body": item["body"],
+                "cc": item.get("cc") or [],
+                "attachments": self._formatted_attachments,
+                "body_type": "HTML" if item["body"].strip().startswith("<") else "Text",
+            }
+            for item in items
+        ]
+        results = await graph.send_emails_batch(messages)
+
+        for item, result in zip(items, results):
+            if result["ok"]:
+                await self._enqueue("neos", item)
+            else:
+                self._finish(item, "send", f"❌ Failed: HTTP {result['status']}", result["error"])
+
+    async def _update_neos(self, items: list):
+        # Best-effort, as for single sends: failures are logged and the email still counts as sent
+        case_ids = [str(item["client"].get("CaseID", "")) for item in items]
+        try:
+            results = await neos.bulk_update_case_status(case_ids, STATUS_QUESTIONNAIRE_SENT)
+            for case_id, result in results.items():
+                if not result["ok"]:
+                    logger.warning(f"⚠️ NEOS update failed for CaseID {case_id}: {result['error']}")
+        except Exception as e:
+            logger.warning(f"⚠️ NEOS bulk update failed for {len(case_ids)} cases: {e}")
+        for item in items:
+            await self._enqueue("log", item)
+
+    async def _log(self, items: list):
+        item = items[0]
+        if self._template_path is None:
+            self._template_path = _resolve_template_path(self.template_name)
+        try:
+            await _record_sent_email(item["client"], item["subject"], item["body"], item.get("cc"),
+                                     self._template_path, run_id=self.run_id)
+        except Exception as e:
+            # The email went out; a logging failure must not report it as unsent
+            handle_error(e, code="EMAIL_SEND_004", user_message="Email sent but post-send logging failed.")
+        self._finish(item, "log", "✅ Sent")
+
+    async def run(self, rows: list) -> list:
+        """
+        rows: dicts with "client" and optionally prebuilt "subject", "body" and "cc"
+        (rows without them are built from the template).
+        Returns one {"case_id", "status", "stage", "error"} dict per row, in order.
+        """
+        started = time.perf_counter()
+        self._results = [None] * len(rows)
+        self._formatted_attachments = prepare_attachments(self.attachments)
+        already_sent = get_email_log_store().sent_case_ids(get_tenant_id(), self.run_id) if self.resume else set()
+
+        self._queues = {stage: asyncio.Queue(maxsize=self.queue_size) for stage in PIPELINE_STAGES}
+        workers = [
+            asyncio.create_task(self._worker(stage, self.batch_sizes.get(stage, 1)))
+            for stage in PIPELINE_STAGES
+            for _ in range(max(1, self.concurrency[stage]))
+        ]
+        try:
+            for index, row in enumerate(rows):
+                item = {"index": index, **row}
+                case_id = str(row["client"].get("CaseID", "") or "")
+                if case_id and case_id in already_sent:
+                    self.skipped += 1
+                    self._finish(item, "resume", "✅ Already sent")
+                    continue
+                await self._enqueue("build", item)
+
+            # Each stage only finishes an item after handing it downstream
+            for stage in PIPELINE_STAGES:
+                await self._queues[stage].join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.elapsed = time.perf_counter() - started
+
+        logger.info(f"[EMAIL_PIPELINE] {self.stats()}")
+        return self._results
+
+    def stats(self) -> dict:
+        """
+        Per-stage throughput/latency plus overall counts for the last run.
+        """
+        stages = {}
+        for stage, m in self.metrics.items():
+            stages[stage] = {
+                **m,
+                "avg_latency": (m["busy_seconds"] / m["processed"]) if m["processed"] else 0.0,
+                "throughput_per_sec": (m["processed"] / self.elapsed) if self.elapsed else 0.0,
+            }
+        sent = sum(1 for r in self._results if r and r["status"] == "✅ Sent")
+        return {"elapsed": self.elapsed, "sent": sent, "skipped": self.skipped, "stages": stages}
+
+
+async def send_bulk_emails(items: list, template_name: str, attachments: list = None,
+                           resume: bool = False, run_id: str = None) -> list:
+    """
+    Sends many emails through the staged bulk pipeline (Graph $batch sends).
+    items: list of (client, subject, body, cc) tuples.
+    Pass resume=True with the run_id of an interrupted run to skip what it already sent.
+    Returns one result string per item, in order, like send_email_and_update.
+    """
+    pipeline = BulkEmailPipeline(template_name, attachments, resume=resume, run_id=run_id)
+    try:
+        results = await pipeline.run([
+            {"client": client, "subject": subject, "body": body, "cc": cc}
+            for client, subject, body, cc in items
+        ])
+    except Exception as e:
+        handle_error(e, code="EMAIL_SEND_003", user_message="Bulk email send failed.")
+        return [f"❌ Failed: {type(e).__name__}"] * len(items)
+    return [r["status"] for r in results]
+
+
+async def log_email(client: dict, subject: str, body: str, template_path: str, cc: list, run_id: str = None):
     """
-    Logs email activity into CSV and JSON files using normalized template_path.
+    Appends email activity to the sent-email log store using normalized template_path.
     """
     try:
         subject_clean = sanitize_text(str(subject))
@@ -187,11 +429,6 @@ async def log_email(client: dict, subject: str, body: str, template_path: str, c
         name_clean = sanitize_text(str(client.get("name", client.get("ClientName", "Unknown"))))
 
         tenant_id = get_tenant_id()
-        log_dir = os.path.join("email_automation", "logs")
-        os.makedirs(log_dir, exist_ok=True)
-
-        csv_path = os.path.join(log_dir, f"{tenant_id}_sent_email_log.csv")
-        json_path = os.path.join(log_dir, f"{tenant_id}_sent_email_log.json")
 
         entry = {
             "Timestamp": datetime.now().isoformat(),
@@ -209,24 +446,8 @@ async def log_email(client: dict, subject: str, body: str, template_path: str, c
             "OpenTrackingURL": f"https://tracking.legalhub.app/open/{tenant_id}/{get_user_id()}/{client.get('CaseID', '')}"
         }
 
-        # Append to CSV
-        if os.path.exists(csv_path):
-            existing = pd.read_csv(csv_path)
-            pd.concat([existing, pd.DataFrame([entry])], ignore_index=True).to_csv(csv_path, index=False)
-        else:
-            pd.DataFrame([entry]).to_csv(csv_path, index=False)
-
-        # Append to JSON
-        existing_json = []
-        if os.path.exists(json_path):
-            with open(json_path, "r") as jf:
-                try:
-                    existing_json = json.load(jf)
-                except json.JSONDecodeError:
-                    existing_json = []
-        existing_json.append(entry)
-        with open(json_path, "w") as jf:
-            json.dump(existing_json, jf, indent=2)
+        # Append-only store: one INSERT per email, exports are rendered on demand
+        get_email_log_store().append(tenant_id, entry, run_id=run_id)
 
         # Audit event
         log_audit_event("Email Logged", {
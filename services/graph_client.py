@@ -1,27 +1,100 @@
 import aiohttp
 import asyncio
+import json
+import os
+import threading
 import time
 from config import AppConfig, get_config
 from utils.retry_utils import http_retry
+from utils.http_pool import get_session
+from utils.single_flight import SingleFlight
 from core.security import redact_log, mask_phi
-from core.error_handling import handle_error
-from core.usage_tracker import log_usage, check_quota
+from core.error_handling import handle_error, AppError
+from core.usage_tracker import log_usage, check_quota, enforce_quota, record_latency_metric
 from core.auth import get_tenant_id, get_user_id
 from core.audit import log_audit_event
 from logger import logger
 
 GRAPH_TOKEN_ENDPOINT = "https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
 GRAPH_API_BASE = "https://graph.microsoft.com/v1.0"
+GRAPH_BATCH_URL = f"{GRAPH_API_BASE}/$batch"
+GRAPH_BATCH_SIZE = 20  # Graph's per-request limit for JSON batching
+GRAPH_BATCH_MAX_RETRIES = int(os.getenv("GRAPH_BATCH_MAX_RETRIES", "3"))
+# Graph rejects request bodies over 4 MB; $batch requests are packed below this
+GRAPH_BATCH_MAX_BYTES = int(os.getenv("GRAPH_BATCH_MAX_BYTES", str(3 * 1024 * 1024)))
+# Messages with attachments are sent one sendMail call each, this many at a time
+GRAPH_SINGLE_SEND_CONCURRENCY = int(os.getenv("GRAPH_SINGLE_SEND_CONCURRENCY", "4"))
+# Recorded for an item whose request failed in transport (connection error, timeout)
+GRAPH_TRANSPORT_ERROR_STATUS = 599
+GRAPH_RETRYABLE_STATUSES = {401, 429, 500, 502, 503, 504, GRAPH_TRANSPORT_ERROR_STATUS}
+
+
+# Tokens are treated as expired this many seconds before Microsoft's expiry,
+# and refreshed in the background once they are within the refresh-ahead window.
+GRAPH_TOKEN_EXPIRY_MARGIN_SECONDS = int(os.getenv("GRAPH_TOKEN_EXPIRY_MARGIN_SECONDS", "120"))
+GRAPH_TOKEN_REFRESH_AHEAD_SECONDS = int(os.getenv("GRAPH_TOKEN_REFRESH_AHEAD_SECONDS", "300"))
+# Streamlit runs each send in its own short-lived asyncio.run() loop, which would cancel a
+# background refresh on exit; there the refresh-ahead happens inline. Enable only for
+# clients that live on a long-running loop.
+GRAPH_TOKEN_BACKGROUND_REFRESH = os.getenv("GRAPH_TOKEN_BACKGROUND_REFRESH", "false").lower() == "true"
+
+# Shared across GraphClient instances (and Streamlit reruns) within the process
+_token_cache = {}
+_token_lock = threading.Lock()
+_token_refresh = SingleFlight(name="graph_token_refresh")
+# Strong references so pending background refreshes aren't garbage collected mid-flight
+_background_token_refreshes = set()
+_token_metrics = {
+    "cache_hits": 0,
+    "refreshes": 0,
+    "background_refreshes": 0,
+    "refresh_failures": 0,
+    "last_refresh_latency": 0.0,
+    "total_refresh_latency": 0.0,
+}
+
+
+def _parse_retry_after(value) -> float:
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _on_background_refresh_done(task: asyncio.Task):
+    _background_token_refreshes.discard(task)
+    if task.cancelled():
+        logger.info("[GRAPH_TOKEN] Background refresh cancelled before completing")
+    elif task.exception() is not None:
+        logger.warning(f"[GRAPH_TOKEN] Background refresh task failed: {task.exception()}")
+
+
+def get_token_metrics() -> dict:
+    """
+    Token cache counters, refresh latency and how many callers shared a refresh.
+    """
+    with _token_lock:
+        metrics = dict(_token_metrics)
+    refreshes = metrics["refreshes"]
+    metrics["avg_refresh_latency"] = (metrics["total_refresh_latency"] / refreshes) if refreshes else 0.0
+    metrics["coalesced_refreshes"] = _token_refresh.stats()["coalesced"]
+    return metrics
 
 
 class GraphClient:
-    def __init__(self, config: AppConfig = None):
+    def __init__(self, config: AppConfig = None, background_refresh: bool = None):
         self.config = config or get_config()
         self.token = None
+        self.background_refresh = GRAPH_TOKEN_BACKGROUND_REFRESH if background_refresh is None else background_refresh
+        self._background_refresh = None
 
-    async def _get_token(self) -> str:
+    def _token_key(self) -> tuple:
+        return (self.config.GRAPH_TENANT_ID, self.config.GRAPH_CLIENT_ID)
+
+    async def _request_token(self) -> tuple:
         """
-        Retrieve Microsoft Graph API access token with retry and error handling.
+        Request a new Microsoft Graph access token.
+        Returns (token, expires_in_seconds).
         """
         start_time = time.time()
         try:
@@ -34,30 +107,29 @@ class GraphClient:
             }
             headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, data=data, headers=headers, timeout=10) as response:
-                    if response.status != 200:
-                        handle_error(
-                            ValueError(f"Graph token request failed: {response.status}"),
-                            code="GRAPH_AUTH_002",
-                            user_message="Unable to authenticate with Microsoft Graph. Please contact support.",
-                            raise_it=True
-                        )
-
-                    json_resp = await response.json()
-                    token = json_resp.get("access_token")
-                    if not token:
-                        handle_error(
-                            ValueError("No access token returned from Microsoft."),
-                            code="GRAPH_AUTH_003",
-                            user_message="Unable to authenticate with Microsoft Graph. Please contact support.",
-                            raise_it=True
-                        )
-
-                    self.token = token
-                    duration = time.time() - start_time
-                    logger.info(redact_log(mask_phi(f"⏱️ Graph token retrieval took {duration:.2f}s")))
-                    return token
+            session = get_session()
+            async with session.post(url, data=data, headers=headers, timeout=10) as response:
+                if response.status != 200:
+                    handle_error(
+                        ValueError(f"Graph token request failed: {response.status}"),
+                        code="GRAPH_AUTH_002",
+                        user_message="Unable to authenticate with Microsoft Graph. Please contact support.",
+                        raise_it=True
+                    )
+
+                json_resp = await response.json()
+                token = json_resp.get("access_token")
+                if not token:
+                    handle_error(
+                        ValueError("No access token returned from Microsoft."),
+                        code="GRAPH_AUTH_003",
+                        user_message="Unable to authenticate with Microsoft Graph. Please contact support.",
+                        raise_it=True
+                    )
+
+                duration = time.time() - start_time
+                logger.info(redact_log(mask_phi(f"⏱️ Graph token retrieval took {duration:.2f}s")))
+                return token, int(json_resp.get("expires_in", 3600))
 
         except Exception as e:
             handle_error(
@@ -67,6 +139,127 @@ class GraphClient:
                 raise_it=True
             )
 
+    async def _refresh_token(self) -> str:
+        """
+        Fetch a token and store it in the shared cache, recording refresh latency.
+        """
+        start_time = time.perf_counter()
+        try:
+            token, expires_in = await self._request_token()
+        except Exception:
+            with _token_lock:
+                _token_metrics["refresh_failures"] += 1
+            raise
+
+        latency = time.perf_counter() - start_time
+        with _token_lock:
+            _token_cache[self._token_key()] = {"token": token, "expires_at": time.time() + expires_in}
+            _token_metrics["refreshes"] += 1
+            _token_metrics["last_refresh_latency"] = latency
+            _token_metrics["total_refresh_latency"] += latency
+        record_latency_metric("graph_token_refresh_latency", latency)
+        return token
+
+    async def _refresh_in_background(self):
+        try:
+            await _token_refresh.do(self._token_key(), self._refresh_token)
+            with _token_lock:
+                _token_metrics["background_refreshes"] += 1
+        except Exception as e:
+            logger.warning(f"[GRAPH_TOKEN] Background refresh failed; cached token still valid: {e}")
+
+    async def _get_token(self, force_refresh: bool = False, rejected_token: str = None) -> str:
+        """
+        Return a valid Graph access token from the shared cache.
+
+        Tokens are considered expired GRAPH_TOKEN_EXPIRY_MARGIN_SECONDS before
+        their real expiry. Within GRAPH_TOKEN_REFRESH_AHEAD_SECONDS of that, the
+        cached token is still returned while a background refresh runs (or, on
+        short-lived loops, the token is refreshed inline).
+        Concurrent callers share a single refresh request. rejected_token forces
+        a refresh only if that token is still the cached one, so many senders
+        hitting the same 401 trigger one refresh.
+        """
+        key = self._token_key()
+        now = time.time()
+        with _token_lock:
+            entry = None if force_refresh else _token_cache.get(key)
+            if entry and rejected_token and entry["token"] == rejected_token:
+                entry = None
+            if entry and now < entry["expires_at"] - GRAPH_TOKEN_EXPIRY_MARGIN_SECONDS:
+                _token_metrics["cache_hits"] += 1
+            else:
+                entry = None
+
+        if entry is None:
+            self.token = await _token_refresh.do(key, self._refresh_token)
+            return self.token
+
+        refresh_at = entry["expires_at"] - GRAPH_TOKEN_EXPIRY_MARGIN_SECONDS - GRAPH_TOKEN_REFRESH_AHEAD_SECONDS
+        if now >= refresh_at:
+            if not self.background_refresh:
+                try:
+                    self.token = await _token_refresh.do(key, self._refresh_token)
+                    return self.token
+                except Exception as e:
+                    logger.warning(f"[GRAPH_TOKEN] Refresh-ahead failed; cached token still valid: {e}")
+            elif self._background_refresh is None or self._background_refresh.done():
+                task = asyncio.get_running_loop().create_task(self._refresh_in_background())
+                _background_token_refreshes.add(task)
+                task.add_done_callback(_on_background_refresh_done)
+                self._background_refresh = task
+
+        self.token = entry["token"]
+        return self.token
+
+    def invalidate_token(self):
+        """
+        Drop the cached token (e.g. after a 401) so the next call re-authenticates.
+        """
+        with _token_lock:
+            _token_cache.pop(self._token_key(), None)
+        self.token = None
+
+    def _build_send_request(self, sender_address: str = None, to: str = None, subject: str = None,
+                            body: str = None, cc: list = None, attachments: list = None,
+                            body_type: str = "HTML") -> tuple:
+        """
+        Validate one message and build its sendMail payload.
+        Returns (sender, payload); attachments must already be Graph fileAttachment dicts.
+        """
+        # Allow fallback to default sender address from config if not provided
+        sender = (
+            sender_address
+            or getattr(self.config, "GRAPH_SENDER_ADDRESS", None)
+            or getattr(self.config, "GRAPH_SENDER_EMAIL", None)
+        )
+
+        if not sender or not to or not subject or not body:
+            handle_error(
+                ValueError("One or more required email fields are empty."),
+                code="GRAPH_SEND_003",
+                user_message="Cannot send email because required fields are missing.",
+                raise_it=True
+            )
+
+        payload = {
+            "message": {
+                "subject": subject,
+                "body": {
+                    "contentType": body_type,
+                    "content": body
+                },
+                "toRecipients": [{"emailAddress": {"address": to}}],
+                "ccRecipients": [{"emailAddress": {"address": addr}} for addr in (cc or [])],
+            },
+            "saveToSentItems": "true"
+        }
+
+        if attachments:
+            payload["message"]["attachments"] = attachments
+
+        return sender, payload
+
     async def send_email(
         self,
         sender_address: str = None,
@@ -83,16 +276,7 @@ class GraphClient:
         """
         start_time = time.time()
         try:
-            # Allow fallback to default sender address from config if not provided
-            sender = sender_address or self.config.GRAPH_SENDER_ADDRESS
-
-            if not sender or not to or not subject or not body:
-                handle_error(
-                    ValueError("One or more required email fields are empty."),
-                    code="GRAPH_SEND_003",
-                    user_message="Cannot send email because required fields are missing.",
-                    raise_it=True
-                )
+            sender, payload = self._build_send_request(sender_address, to, subject, body, cc, attachments, body_type)
 
             tenant_id = get_tenant_id()
             user_id = get_user_id()
@@ -100,47 +284,33 @@ class GraphClient:
             # Quota enforcement
             check_quota(tenant_id, "emails_sent", 1)
 
-            if not self.token:
-                await self._get_token()
+            token = await self._get_token()
 
             url = f"{GRAPH_API_BASE}/users/{sender}/sendMail"
             headers = {
-                "Authorization": f"Bearer {self.token}",
+                "Authorization": f"Bearer {token}",
                 "Content-Type": "application/json"
             }
 
-            # Format recipients
-            to_recipients = [{"emailAddress": {"address": to}}]
-            cc_recipients = [{"emailAddress": {"address": addr}} for addr in (cc or [])]
-
-            # Build attachments if provided (already base64 encoded)
-            formatted_attachments = attachments or []
-
-            payload = {
-                "message": {
-                    "subject": subject,
-                    "body": {
-                        "contentType": body_type,
-                        "content": body
-                    },
-                    "toRecipients": to_recipients,
-                    "ccRecipients": cc_recipients,
-                },
-                "saveToSentItems": "true"
-            }
-
-            if formatted_attachments:
-                payload["message"]["attachments"] = formatted_attachments
-
-            async with aiohttp.ClientSession() as session:
+            session = get_session()
+            for attempt in range(2):
                 async with session.post(url, headers=headers, json=payload, timeout=10) as response:
-                    if response.status != 202:
-                        handle_error(
-                            ValueError(f"Graph email send failed with status {response.status}"),
-                            code="GRAPH_SEND_001",
-                            user_message=f"Failed to send email to {to}.",
-                            raise_it=True
-                        )
+                    status = response.status
+                if status == 401 and attempt == 0:
+                    # Token revoked or expired early: refresh once (shared with concurrent senders)
+                    logger.warning("[GRAPH_TOKEN] 401 from Graph; refreshing token and retrying")
+                    token = await self._get_token(rejected_token=token)
+                    headers["Authorization"] = f"Bearer {token}"
+                    continue
+                break
+
+            if status != 202:
+                handle_error(
+                    ValueError(f"Graph email send failed with status {status}"),
+                    code="GRAPH_SEND_001",
+                    user_message=f"Failed to send email to {to}.",
+                    raise_it=True
+                )
 
             duration = time.time() - start_time
             log_usage("emails_sent", tenant_id, user_id, 1, {"recipient": to, "duration": duration})
@@ -158,3 +328,219 @@ class GraphClient:
                 user_message=f"Graph email send failed for {to}.",
                 raise_it=True
             )
+
+    async def _post_batch(self, indices: list, requests_by_index: dict, token: str) -> dict:
+        """
+        POST one $batch of up to GRAPH_BATCH_SIZE sendMail sub-requests.
+        Returns {index: (status, retry_after_seconds, error_text)}.
+        """
+        batch = {
+            "requests": [
+                {
+                    "id": str(i),
+                    "method": "POST",
+                    "url": f"/users/{requests_by_index[i][0]}/sendMail",
+                    "headers": {"Content-Type": "application/json"},
+                    "body": requests_by_index[i][1],
+                }
+                for i in indices
+            ]
+        }
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+        session = get_session()
+        async with session.post(GRAPH_BATCH_URL, headers=headers, json=batch, timeout=60) as response:
+            if response.status != 200:
+                # Whole batch rejected (throttled, auth, outage): every item shares the status
+                retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                text = await response.text()
+                return {i: (response.status, retry_after, text[:300]) for i in indices}
+            data = await response.json()
+
+        results = {}
+        for item in data.get("responses", []):
+            try:
+                index = int(item.get("id"))
+            except (TypeError, ValueError):
+                continue
+            status = int(item.get("status", 0))
+            retry_after = _parse_retry_after((item.get("headers") or {}).get("Retry-After"))
+            error = None
+            if status != 202:
+                error = ((item.get("body") or {}).get("error") or {}).get("message") or f"HTTP {status}"
+            results[index] = (status, retry_after, error)
+
+        for i in indices:
+            results.setdefault(i, (0, 0.0, "Missing from $batch response"))
+        return results
+
+    async def _post_single(self, index: int, requests_by_index: dict, token: str) -> tuple:
+        """
+        POST one sendMail request outside $batch (messages carrying attachments).
+        Returns (status, retry_after_seconds, error_text) like a $batch sub-response.
+        """
+        sender, payload = requests_by_index[index]
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        session = get_session()
+        async with session.post(f"{GRAPH_API_BASE}/users/{sender}/sendMail", headers=headers,
+                                json=payload, timeout=60) as response:
+            if response.status == 202:
+                return 202, 0.0, None
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            text = await response.text()
+            return response.status, retry_after, text[:300]
+
+    @staticmethod
+    def _failed_outcome(indices: list, error: Exception) -> dict:
+        """
+        Outcome for items whose request raised: transport errors are retried,
+        anything else is reported as a permanent failure for those items only.
+        """
+        transport = isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+        status = GRAPH_TRANSPORT_ERROR_STATUS if transport else 0
+        logger.warning(redact_log(mask_phi(
+            f"[GRAPH_BATCH] Request for {len(indices)} message(s) failed: {type(error).__name__}: {error}"
+        )))
+        return {i: (status, 0.0, f"{type(error).__name__}: {error}"[:300]) for i in indices}
+
+    @staticmethod
+    def _pack_batches(indices: list, sizes: dict) -> list:
+        """
+        Group indices into $batch requests of at most GRAPH_BATCH_SIZE items and
+        GRAPH_BATCH_MAX_BYTES of serialized sub-request bodies.
+        """
+        chunks, chunk, chunk_bytes = [], [], 0
+        for i in indices:
+            if chunk and (len(chunk) == GRAPH_BATCH_SIZE or chunk_bytes + sizes[i] > GRAPH_BATCH_MAX_BYTES):
+                chunks.append(chunk)
+                chunk, chunk_bytes = [], 0
+            chunk.append(i)
+            chunk_bytes += sizes[i]
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    async def send_emails_batch(self, messages: list) -> list:
+        """
+        Send many emails with Graph JSON batching (GRAPH_BATCH_SIZE sendMail calls per request).
+
+        Args:
+            messages (list): dicts with send_email keyword arguments
+                (to, subject, body, cc, attachments, body_type, sender_address).
+
+        Returns:
+            list: one dict per message, in order:
+                {"to", "ok", "status", "error", "attempts"}.
+
+        Messages with attachments skip $batch and are sent with individual sendMail
+        calls, since every sub-request would carry its own copy of the base64 files;
+        the rest are packed by count and by serialized size (GRAPH_BATCH_MAX_BYTES).
+
+        Only failed sub-requests with a retryable status (401/429/5xx, or a transport
+        error on their request) are re-batched, up to GRAPH_BATCH_MAX_RETRIES times,
+        after the longest Retry-After reported (exponential backoff when none is
+        given). A 401 refreshes the token first. A request that raises fails only
+        its own items; results already returned for other items are kept.
+        """
+        start_time = time.time()
+        tenant_id = get_tenant_id()
+        user_id = get_user_id()
+
+        results = [
+            {"to": m.get("to"), "ok": False, "status": None, "error": None, "attempts": 0}
+            for m in messages
+        ]
+        requests_by_index = {}
+        for i, message in enumerate(messages):
+            try:
+                requests_by_index[i] = self._build_send_request(**message)
+            except Exception as e:
+                results[i]["error"] = str(e)
+
+        pending = list(requests_by_index)
+        if pending and not enforce_quota("emails_sent", len(pending)):
+            logger.warning(f"[QUOTA] Tenant {tenant_id} exceeded email quota")
+            raise AppError(code="QUOTA_EXCEEDED", message="Email quota exceeded.")
+
+        sizes = {i: len(json.dumps(payload)) for i, (_, payload) in requests_by_index.items()}
+        single = {i for i, (_, payload) in requests_by_index.items() if payload["message"].get("attachments")}
+        semaphore = asyncio.Semaphore(GRAPH_SINGLE_SEND_CONCURRENCY)
+
+        # A failed request only fails its own items; results Graph already accepted are kept
+        async def post_batch(chunk, token):
+            try:
+                return await self._post_batch(chunk, requests_by_index, token)
+            except Exception as e:
+                return self._failed_outcome(chunk, e)
+
+        async def post_single(i, token):
+            async with semaphore:
+                try:
+                    return {i: await self._post_single(i, requests_by_index, token)}
+                except Exception as e:
+                    return self._failed_outcome([i], e)
+
+        try:
+            token = await self._get_token()
+        except Exception as e:
+            handle_error(
+                e,
+                code="GRAPH_BATCH_001",
+                user_message="Graph batch email send failed.",
+                raise_it=True
+            )
+
+        round_trips = 0
+        for attempt in range(GRAPH_BATCH_MAX_RETRIES + 1):
+            retry, delay, saw_401 = [], 0.0, False
+            outcomes = [
+                await post_batch(chunk, token)
+                for chunk in self._pack_batches([i for i in pending if i not in single], sizes)
+            ]
+            outcomes += await asyncio.gather(*(post_single(i, token) for i in pending if i in single))
+            round_trips += len(outcomes)
+            for outcome in outcomes:
+                for i, (status, retry_after, error) in outcome.items():
+                    results[i].update(status=status, error=error, attempts=attempt + 1, ok=status == 202)
+                    if status in GRAPH_RETRYABLE_STATUSES:
+                        retry.append(i)
+                        delay = max(delay, retry_after)
+                        saw_401 = saw_401 or status == 401
+
+            if not retry or attempt == GRAPH_BATCH_MAX_RETRIES:
+                break
+
+            logger.warning(
+                f"[GRAPH_BATCH] Retrying {len(retry)}/{len(pending)} failed sends "
+                f"(attempt {attempt + 2}, wait {delay or 2 ** attempt:.1f}s)"
+            )
+            if saw_401:
+                try:
+                    token = await self._get_token(rejected_token=token)
+                except Exception as e:
+                    # Keep what was sent; the remaining items stay failed with their last status
+                    handle_error(e, code="GRAPH_BATCH_002",
+                                 user_message="Graph token refresh failed during batch send.")
+                    break
+            await asyncio.sleep(delay or min(2 ** attempt, 30))
+            pending = sorted(retry)
+
+        sent = [r for r in results if r["ok"]]
+        duration = time.time() - start_time
+        if sent:
+            log_usage("emails_sent", len(sent), {"tenant_id": tenant_id, "user_id": user_id, "batched": True})
+        log_audit_event(
+            "Graph Batch Email Sent",
+            {
+                "sent": len(sent),
+                "failed": len(results) - len(sent),
+                "round_trips": round_trips,
+                "duration": f"{duration:.2f}s",
+            }
+        )
+        logger.info(
+            f"[GRAPH_BATCH] Sent {len(sent)}/{len(results)} emails in {round_trips} "
+            f"requests ({duration:.2f}s)"
+        )
+        return results
+
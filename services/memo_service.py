@@ -1,13 +1,17 @@
 import os
 import html
+import time
 import asyncio
 from core.security import sanitize_text, redact_log, mask_phi
 from core.error_handling import handle_error
 from utils.docx_utils import replace_text_in_docx_all
-from services.openai_client import safe_generate
+from services.openai_client import safe_generate, safe_generate_async, stream_generate
+from utils.stream_utils import collect_stream
 from utils.token_utils import trim_to_token_limit
+from utils.section_scheduler import run_section_graph
+from utils.thread_utils import run_async
 from logger import logger
-from core.usage_tracker import check_quota_and_decrement
+from core.usage_tracker import check_quota_and_decrement, record_latency_metric
 from core.auth import get_tenant_id
 from services.dropbox_client import download_template_file  # NEW: centralized Dropbox template fetching
 from io import BytesIO
@@ -25,9 +29,12 @@ from core.prompts.memo_examples import (
 )
 from core.generators.quote_parser import (
     normalize_deposition_lines,
-    merge_multiline_qas,
-    generate_quotes_in_chunks
+    parse_qa_blocks,
+    chunk_qa_blocks,
+    generate_quotes_in_chunks,
+    generate_category_quotes
 )
+from core.generators.qa_index import select_candidate_blocks
 
 INTRO_MSG = "Draft a concise, persuasive Introduction."
 PARTIES_MSG = "Summarize parties' roles without redundancy."
@@ -39,8 +46,30 @@ HARMS_MSG = "Draft a persuasive Harms & Losses section showing impact."
 FUTURE_MSG = "Draft the Future Medical Expenses section."
 CONCLUSION_MSG = "Draft a strong Conclusion with litigation readiness."
 
+# Maximum number of memo sections drafted concurrently
+MEMO_SECTION_CONCURRENCY = int(os.getenv("MEMO_SECTION_CONCURRENCY", "4"))
+
+# Deposition quote pre-filter: top BM25 blocks per category, or full transcript scan
+QUOTE_PREFILTER_TOP_N = int(os.getenv("QUOTE_PREFILTER_TOP_N", "40"))
+QUOTE_FULL_SCAN = os.getenv("QUOTE_FULL_SCAN", "false").lower() == "true"
+
+# Order of drafted sections in memo_data (final polish and templates rely on it)
+MEMO_SECTION_ORDER = (
+    ["Introduction"]
+    + [f"Plaintiff_{i}" for i in range(1, 4)]
+    + [f"Defendant_{i}" for i in range(1, 8)]
+    + [
+        "Parties", "Facts_Liability", "Causation_Injuries_Treatment",
+        "Additional_Harms_Losses", "Future_Medical_Bills", "Conclusion"
+    ]
+)
+
 
-def polish_mediation_memo_text(text: str) -> str:
+def polish_mediation_memo_text(text: str, on_update=None) -> str:
+    """
+    Polish the full memo text. If on_update is given the completion is streamed
+    and on_update(text_so_far) is called as it arrives.
+    """
     try:
         if not text:
             return text
@@ -84,7 +113,10 @@ It should be persuasive, evidentiary-based, and leave the defense under pressure
 Here is the draft mediation memorandum to polish: 
 {text}
 """
-        polished = safe_generate(prompt)
+        if on_update:
+            polished = run_async(collect_stream, stream_generate(prompt), on_update)
+        else:
+            polished = safe_generate(prompt)
         return polished.strip() if polished else text
 
     except Exception as e:
@@ -92,13 +124,8 @@ Here is the draft mediation memorandum to polish:
         return text
 
 
-def polish_section(text: str, context: str = "", test_mode: bool = False) -> str:
-    if not text.strip():
-        return ""
-    try:
-        if test_mode:
-            return text.strip()
-        prompt = f"""
+def _polish_section_prompt(text: str, context: str = "") -> str:
+    return f"""
 {FULL_SAFETY_PROMPT}
 
 Polish this section of the mediation memo:
@@ -113,19 +140,42 @@ Context: {context}
 Section:
 {text}
 """
-        return safe_generate(prompt=prompt, model="gpt-4")
+
+
+def polish_section(text: str, context: str = "", test_mode: bool = False) -> str:
+    if not text.strip():
+        return ""
+    try:
+        if test_mode:
+            return text.strip()
+        return safe_generate(prompt=_polish_section_prompt(text, context), model="gpt-4")
     except Exception as e:
         handle_error(e, code="MEMO_POLISH_001", user_message="Failed to polish memo section.")
         return text
 
 
-def final_polish_memo(memo_data: dict, test_mode: bool = False) -> dict:
+async def polish_section_async(text: str, context: str = "", test_mode: bool = False) -> str:
+    """
+    Async variant of polish_section for the parallel section scheduler.
+    """
+    if not text.strip():
+        return ""
+    try:
+        if test_mode:
+            return text.strip()
+        return await safe_generate_async(prompt=_polish_section_prompt(text, context), model="gpt-4")
+    except Exception as e:
+        handle_error(e, code="MEMO_POLISH_001", user_message="Failed to polish memo section.")
+        return text
+
+
+def final_polish_memo(memo_data: dict, test_mode: bool = False, on_update=None) -> dict:
     try:
         if test_mode:
             return memo_data
 
         joined_text = "\n\n".join([f"## {k}\n{v}" for k, v in memo_data.items()])
-        polished = polish_mediation_memo_text(joined_text)
+        polished = polish_mediation_memo_text(joined_text, on_update=on_update)
 
         new_data = {}
         for section in memo_data.keys():
@@ -141,30 +191,43 @@ def final_polish_memo(memo_data: dict, test_mode: bool = False) -> dict:
         return memo_data
 
 
-def generate_quotes_from_raw_depo(raw_text: str, categories: list, test_mode: bool = False) -> dict:
+def generate_quotes_from_raw_depo(raw_text: str, categories: list, test_mode: bool = False,
+                                  progress_callback=None, full_scan: bool = QUOTE_FULL_SCAN,
+                                  top_n: int = QUOTE_PREFILTER_TOP_N) -> dict:
+    """
+    Extract categorized quotes from a raw deposition transcript.
+
+    By default a local BM25 index pre-filters the Q&A blocks and only the top_n
+    candidates per category are sent to GPT. full_scan=True sends every block
+    for every category (the original behavior).
+    progress_callback(completed, total) is forwarded to the chunk extractor.
+    """
     try:
         if test_mode:
             return {cat.lower().replace(" ", "_") + "_quotes": "Test Quote" for cat in categories}
         lines = normalize_deposition_lines(raw_text)
-        qa_text = merge_multiline_qas(lines)
-        chunks = [qa_text[i:i + 9000] for i in range(0, len(qa_text), 9000)]
-        if not chunks or not categories:
+        blocks = parse_qa_blocks(lines)
+        if not blocks or not categories:
             logger.warning("[MEMO_QUOTES_001] Skipping quote extraction: chunks or categories empty")
             return {}
-        return generate_quotes_in_chunks(chunks, categories=categories)
+
+        if full_scan or len(blocks) <= top_n:
+            chunks = [chunk["text"] for chunk in chunk_qa_blocks(blocks)]
+            return generate_quotes_in_chunks(chunks, categories=categories, progress_callback=progress_callback)
+
+        candidates = select_candidate_blocks(blocks, categories, top_n)
+        category_chunks = {
+            cat: [chunk["text"] for chunk in chunk_qa_blocks(selected, overlap_blocks=0)]
+            for cat, selected in candidates.items()
+        }
+        return generate_category_quotes(category_chunks, progress_callback=progress_callback)
     except Exception as e:
         handle_error(e, code="MEMO_QUOTES_001", user_message="Failed to extract quotes from deposition.")
         return {}
 
 
-
-def curate_quotes_for_section(section_name: str, quotes: str, context: str, test_mode: bool = False) -> str:
-    if not quotes.strip():
-        return ""
-    try:
-        if test_mode:
-            return quotes.strip()
-        prompt = f"""{FULL_SAFETY_PROMPT}
+def _curate_quotes_prompt(section_name: str, quotes: str, context: str) -> str:
+    return f"""{FULL_SAFETY_PROMPT}
 
 From these quotes:
 
@@ -177,50 +240,44 @@ Make sure each selected quote directly supports the section's legal or factual a
 Context:
 {context}
 """
-        curated = safe_generate(prompt=prompt, model="gpt-4")
+
+
+def curate_quotes_for_section(section_name: str, quotes: str, context: str, test_mode: bool = False) -> str:
+    if not quotes.strip():
+        return ""
+    try:
+        if test_mode:
+            return quotes.strip()
+        curated = safe_generate(prompt=_curate_quotes_prompt(section_name, quotes, context), model="gpt-4")
         return curated.strip()
     except Exception as e:
         handle_error(e, code="MEMO_QUOTES_002", user_message=f"Failed to curate quotes for {section_name}.")
         return ""
 
 
-def generate_memo_from_fields(data: dict, template_name: str, test_mode: bool = False) -> tuple:
+async def curate_quotes_for_section_async(section_name: str, quotes: str, context: str, test_mode: bool = False) -> str:
+    """
+    Async variant of curate_quotes_for_section for the parallel section scheduler.
+    """
+    if not quotes.strip():
+        return ""
     try:
-        template_path = os.path.normpath(template_name)
-        if not os.path.exists(template_path):
-            template_path = download_template_file("mediation_memo", template_name, "memo_templates_cache")
-
-        if not template_path or not os.path.exists(template_path):
-            handle_error(
-                FileNotFoundError(f"Template not found at {template_path}"),
-                code="MEMO_TEMPLATE_001",
-                user_message="Memo template is missing or inaccessible.",
-                raise_it=True
-            )
-
-        tenant_id = get_tenant_id()
-        check_quota_and_decrement(tenant_id, "memo_generation")
-
-        memo_data = {}
-        plaintiffs = data.get("plaintiffs", "")
-        defendants = data.get("defendants", "")
-
-        liability_quotes = curate_quotes_for_section(
-            "Facts & Liability",
-            data.get("liability_quotes", ""),
-            data.get('complaint_narrative', ''),
-            test_mode=test_mode
-        )
-
-        damages_quotes = curate_quotes_for_section(
-            "Harms & Losses",
-            data.get("damages_quotes", ""),
-            data.get('medical_summary', ''),
-            test_mode=test_mode
+        if test_mode:
+            return quotes.strip()
+        curated = await safe_generate_async(
+            prompt=_curate_quotes_prompt(section_name, quotes, context), model="gpt-4"
         )
+        return curated.strip()
+    except Exception as e:
+        handle_error(e, code="MEMO_QUOTES_002", user_message=f"Failed to curate quotes for {section_name}.")
+        return ""
 
 
-        intro_prompt = f"""
+# -----------------------------
+# Section prompts
+# -----------------------------
+def _intro_prompt(data: dict) -> str:
+    return f"""
 {FULL_SAFETY_PROMPT}
 
 Draft the Introduction:
@@ -234,18 +291,10 @@ Complaint Narrative:
 Example:
 {INTRO_EXAMPLE}
 """
-        intro_text = safe_generate(
-            prompt=trim_to_token_limit(intro_prompt, 3000),
-            model="gpt-4",
-            system_msg=INTRO_MSG
-        )
-        memo_data["Introduction"] = polish_section(intro_text, test_mode=test_mode)
 
-        parties_block = []
-        for i in range(1, 4):
-            name = data.get(f"plaintiff{i}", "").strip()
-            if name:
-                plaintiff_prompt = f"""
+
+def _plaintiff_prompt(data: dict, name: str) -> str:
+    return f"""
 {FULL_SAFETY_PROMPT}
 
 Write a short, 1–2 sentence role-based paragraph for Plaintiff {name}:
@@ -258,18 +307,10 @@ Party Info:
 Example:
 {PLAINTIFF_STATEMENT_EXAMPLE}
 """
-                text = safe_generate(prompt=trim_to_token_limit(plaintiff_prompt, 2500),
-                                                 model="gpt-4",
-                                                 system_msg=PLAINTIFF_MSG)
-                memo_data[f"Plaintiff_{i}"] = polish_section(text, test_mode=test_mode)
-                parties_block.append(memo_data[f"Plaintiff_{i}"])
-            else:
-                memo_data[f"Plaintiff_{i}"] = ""
 
-        for i in range(1, 8):
-            name = data.get(f"defendant{i}", "").strip()
-            if name:
-                defendant_prompt = f"""
+
+def _defendant_prompt(data: dict, name: str) -> str:
+    return f"""
 {FULL_SAFETY_PROMPT}
 
 Write a short, 1–2 sentence role-based paragraph for Defendant {name}:
@@ -282,15 +323,10 @@ Defendant Info:
 Example:
 {DEFENDANT_STATEMENT_EXAMPLE}
 """
-                text = safe_generate(prompt=trim_to_token_limit(defendant_prompt, 2500),
-                                                 model="gpt-4",
-                                                 system_msg=DEFENDANT_MSG)
-                memo_data[f"Defendant_{i}"] = polish_section(text, test_mode=test_mode)
-                parties_block.append(memo_data[f"Defendant_{i}"])
-            else:
-                memo_data[f"Defendant_{i}"] = ""
 
-        parties_prompt = f"""
+
+def _parties_prompt(parties_block: list) -> str:
+    return f"""
 {FULL_SAFETY_PROMPT}
 
 Combine the following party paragraphs into a cohesive "Parties" section:
@@ -300,12 +336,10 @@ Ensure:
 - Logical flow and smooth transitions
 - No redundancy or repetition of accident details
 """
-        parties_text = safe_generate(prompt=trim_to_token_limit(parties_prompt, 3000),
-                                                 model="gpt-4",
-                                                 system_msg=PARTIES_MSG)
-        memo_data["Parties"] = polish_section(parties_text, test_mode=test_mode)
 
-        facts_prompt = f"""
+
+def _facts_prompt(data: dict, liability_quotes: str) -> str:
+    return f"""
 {FULL_SAFETY_PROMPT}
 
 Write the Facts & Liability section:
@@ -321,12 +355,10 @@ Liability Quotes:
 Example:
 {FACTS_LIABILITY_EXAMPLE}
 """
-        facts_text = safe_generate(prompt=trim_to_token_limit(facts_prompt, 3500),
-                                               model="gpt-4",
-                                               system_msg=FACTS_MSG)
-        memo_data["Facts_Liability"] = polish_section(facts_text, test_mode=test_mode)
 
-        causation_prompt = f"""
+
+def _causation_prompt(data: dict) -> str:
+    return f"""
 {FULL_SAFETY_PROMPT}
 
 Draft the Causation/Injuries section:
@@ -340,12 +372,10 @@ Medical Summary:
 Example:
 {CAUSATION_EXAMPLE}
 """
-        causation_text = safe_generate(prompt=trim_to_token_limit(causation_prompt, 3000),
-                                                   model="gpt-4",
-                                                   system_msg=CAUSATION_MSG)
-        memo_data["Causation_Injuries_Treatment"] = polish_section(causation_text, test_mode=test_mode)
 
-        harms_prompt = f"""
+
+def _harms_prompt(data: dict, damages_quotes: str) -> str:
+    return f"""
 {FULL_SAFETY_PROMPT}
 
 Draft the Harms & Losses section:
@@ -361,12 +391,10 @@ Damages Quotes:
 Example:
 {HARMS_EXAMPLE}
 """
-        harms_text = safe_generate(prompt=trim_to_token_limit(harms_prompt, 3000),
-                                               model="gpt-4",
-                                               system_msg=HARMS_MSG)
-        memo_data["Additional_Harms_Losses"] = polish_section(harms_text, test_mode=test_mode)
 
-        future_prompt = f"""
+
+def _future_prompt(data: dict) -> str:
+    return f"""
 {FULL_SAFETY_PROMPT}
 
 Draft the Future Medical Bills section:
@@ -380,12 +408,10 @@ Future Care Summary:
 Example:
 {FUTURE_BILLS_EXAMPLE}
 """
-        future_text = safe_generate(prompt=trim_to_token_limit(future_prompt, 2500),
-                                                model="gpt-4",
-                                                system_msg=FUTURE_MSG)
-        memo_data["Future_Medical_Bills"] = polish_section(future_text, test_mode=test_mode)
 
-        conclusion_prompt = f"""
+
+def _conclusion_prompt(data: dict) -> str:
+    return f"""
 {FULL_SAFETY_PROMPT}
 
 Draft the Conclusion:
@@ -399,14 +425,136 @@ Settlement Summary:
 Example:
 {CONCLUSION_EXAMPLE}
 """
-        conclusion_text = safe_generate(
-            prompt=trim_to_token_limit(conclusion_prompt, 2500),
+
+
+# -----------------------------
+# Parallel section drafting
+# -----------------------------
+def _drafted_section(prompt: str, token_limit: int, system_msg: str, test_mode: bool):
+    """
+    Build a scheduler node that drafts a section and then polishes it.
+    """
+    async def builder(_results: dict) -> str:
+        text = await safe_generate_async(
+            prompt=trim_to_token_limit(prompt, token_limit),
             model="gpt-4",
-            system_msg=CONCLUSION_MSG
+            system_msg=system_msg,
+            test_mode=test_mode
+        )
+        return await polish_section_async(text, test_mode=test_mode)
+    return builder
+
+
+async def draft_memo_sections(data: dict, test_mode: bool = False,
+                              max_concurrency: int = MEMO_SECTION_CONCURRENCY) -> tuple:
+    """
+    Draft every memo section through a dependency-aware scheduler.
+    Independent sections run concurrently; Facts and Harms wait on their curated quotes
+    and Parties waits on the individual party paragraphs.
+
+    Returns (memo_data, timings) where memo_data keeps the original section order.
+    """
+    plaintiff_keys = [f"Plaintiff_{i}" for i in range(1, 4)]
+    defendant_keys = [f"Defendant_{i}" for i in range(1, 8)]
+
+    async def curate_liability(_results: dict) -> str:
+        return await curate_quotes_for_section_async(
+            "Facts & Liability",
+            data.get("liability_quotes", ""),
+            data.get('complaint_narrative', ''),
+            test_mode=test_mode
         )
-        memo_data["Conclusion"] = polish_section(conclusion_text, test_mode=test_mode)
 
+    async def curate_damages(_results: dict) -> str:
+        return await curate_quotes_for_section_async(
+            "Harms & Losses",
+            data.get("damages_quotes", ""),
+            data.get('medical_summary', ''),
+            test_mode=test_mode
+        )
+
+    async def facts(results: dict) -> str:
+        return await _drafted_section(
+            _facts_prompt(data, results["liability_quotes"]), 3500, FACTS_MSG, test_mode
+        )(results)
+
+    async def harms(results: dict) -> str:
+        return await _drafted_section(
+            _harms_prompt(data, results["damages_quotes"]), 3000, HARMS_MSG, test_mode
+        )(results)
 
+    async def parties(results: dict) -> str:
+        parties_block = [results[k] for k in plaintiff_keys + defendant_keys if results[k]]
+        return await _drafted_section(
+            _parties_prompt(parties_block), 3000, PARTIES_MSG, test_mode
+        )(results)
+
+    async def empty(_results: dict) -> str:
+        return ""
+
+    sections = {
+        "liability_quotes": ([], curate_liability),
+        "damages_quotes": ([], curate_damages),
+        "Introduction": ([], _drafted_section(_intro_prompt(data), 3000, INTRO_MSG, test_mode)),
+    }
+    for i, key in enumerate(plaintiff_keys, 1):
+        name = data.get(f"plaintiff{i}", "").strip()
+        sections[key] = ([], _drafted_section(
+            _plaintiff_prompt(data, name), 2500, PLAINTIFF_MSG, test_mode
+        ) if name else empty)
+    for i, key in enumerate(defendant_keys, 1):
+        name = data.get(f"defendant{i}", "").strip()
+        sections[key] = ([], _drafted_section(
+            _defendant_prompt(data, name), 2500, DEFENDANT_MSG, test_mode
+        ) if name else empty)
+    sections.update({
+        "Parties": (plaintiff_keys + defendant_keys, parties),
+        "Facts_Liability": (["liability_quotes"], facts),
+        "Causation_Injuries_Treatment": ([], _drafted_section(
+            _causation_prompt(data), 3000, CAUSATION_MSG, test_mode)),
+        "Additional_Harms_Losses": (["damages_quotes"], harms),
+        "Future_Medical_Bills": ([], _drafted_section(
+            _future_prompt(data), 2500, FUTURE_MSG, test_mode)),
+        "Conclusion": ([], _drafted_section(
+            _conclusion_prompt(data), 2500, CONCLUSION_MSG, test_mode)),
+    })
+
+    results, timings = await run_section_graph(sections, max_concurrency=max_concurrency)
+    memo_data = {key: results[key] for key in MEMO_SECTION_ORDER}
+    return memo_data, timings
+
+
+def generate_memo_from_fields(data: dict, template_name: str, test_mode: bool = False,
+                              max_concurrency: int = MEMO_SECTION_CONCURRENCY) -> tuple:
+    try:
+        template_path = os.path.normpath(template_name)
+        if not os.path.exists(template_path):
+            template_path = download_template_file("mediation_memo", template_name, "memo_templates_cache")
+
+        if not template_path or not os.path.exists(template_path):
+            handle_error(
+                FileNotFoundError(f"Template not found at {template_path}"),
+                code="MEMO_TEMPLATE_001",
+                user_message="Memo template is missing or inaccessible.",
+                raise_it=True
+            )
+
+        tenant_id = get_tenant_id()
+        check_quota_and_decrement(tenant_id, "memo_generation")
+
+        plaintiffs = data.get("plaintiffs", "")
+        defendants = data.get("defendants", "")
+
+        start_time = time.perf_counter()
+        memo_data, timings = run_async(
+            draft_memo_sections, data, test_mode=test_mode, max_concurrency=max_concurrency
+        )
+        for section, seconds in timings.items():
+            record_latency_metric(f"memo_section_{section}", seconds)
+        logger.info(
+            f"[METRIC] Memo sections drafted in {time.perf_counter() - start_time:.2f}s "
+            f"(sequential equivalent {sum(timings.values()):.2f}s)"
+        )
 
         # APPLY FINAL POLISH (Full memo)
         memo_data = {k: html.unescape(v) for k, v in memo_data.items()}
@@ -1,14 +1,43 @@
 import aiohttp
 import asyncio
+import copy
+import os
 import time
 from config import AppConfig, get_config
 from utils.retry_utils import http_retry
+from utils.http_pool import get_session
+from utils.single_flight import SingleFlight
+from utils.ttl_cache import TTLCache, STALE
 from core.security import redact_log, mask_phi
 from core.error_handling import handle_error, AppError
 from core.usage_tracker import enforce_quota, record_latency_metric
 from core.auth import get_tenant_id
 from logger import logger
 
+NEOS_BULK_RETRIES = 2
+NEOS_BULK_RETRY_BACKOFF_SECONDS = 0.5
+NEOS_RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+NEOS_CASE_CACHE_TTL_SECONDS = float(os.getenv("NEOS_CASE_CACHE_TTL_SECONDS", "300"))
+NEOS_CASE_CACHE_STALE_SECONDS = float(os.getenv("NEOS_CASE_CACHE_STALE_SECONDS", "900"))
+NEOS_CASE_CACHE_MAX_ENTRIES = int(os.getenv("NEOS_CASE_CACHE_MAX_ENTRIES", "2000"))
+
+# base_url -> whether its bulk class-code endpoint exists (learned on first use)
+_bulk_endpoint_support = {}
+
+# Shared by every NeosClient; keyed by (tenant_id, base_url, case_id)
+_case_cache = TTLCache(
+    max_entries=NEOS_CASE_CACHE_MAX_ENTRIES,
+    ttl_seconds=NEOS_CASE_CACHE_TTL_SECONDS,
+    stale_seconds=NEOS_CASE_CACHE_STALE_SECONDS,
+)
+_case_fetches = SingleFlight(name="neos_get_case")
+_background_refreshes = set()
+
+
+def get_case_cache_stats() -> dict:
+    return {**_case_cache.stats(), "background_refreshes": len(_background_refreshes)}
+
 
 class NeosClient:
     def __init__(self, config: AppConfig = None):
@@ -19,16 +48,67 @@ class NeosClient:
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json"
         }
+        self.bulk_concurrency = max(1, getattr(self.config, "NEOS_BULK_CONCURRENCY", 8))
+        self.bulk_chunk_size = max(1, getattr(self.config, "NEOS_BULK_CHUNK_SIZE", 100))
+        self.bulk_update_path = getattr(self.config, "NEOS_BULK_UPDATE_PATH", "")
+        self.last_bulk_stats = {}
+
+    def _case_key(self, case_id: str) -> tuple:
+        return get_tenant_id(), self.base_url, case_id
+
+    def invalidate_case(self, case_id: str):
+        """
+        Drop a case from the read-through cache after a write.
+        """
+        _case_cache.invalidate(self._case_key(case_id))
+
+    async def get_case(self, case_id: str, use_cache: bool = True) -> dict:
+        """
+        Read-through cached case lookup. Fresh entries are returned directly;
+        stale ones are returned while a background refresh fetches the case.
+        Concurrent misses for the same case share one request; a lookup after
+        invalidate_case() never joins, or caches the result of, a request
+        started before the invalidation.
+        """
+        if not case_id or not isinstance(case_id, str):
+            handle_error(
+                AppError(code="NEOS_GET_000", message=f"Invalid case_id provided: {case_id}"),
+                code="NEOS_GET_001",
+                user_message=f"Unable to retrieve NEOS case {case_id}.",
+                raise_it=True
+            )
+
+        key = self._case_key(case_id)
+        if use_cache:
+            cached, state = _case_cache.get(key)
+            if cached is not None:
+                if state == STALE:
+                    self._refresh_in_background(key, case_id)
+                return copy.deepcopy(cached)
+
+        generation = _case_cache.generation(key)
+        data = await _case_fetches.do((key, generation), self._fetch_case, case_id, generation)
+        return copy.deepcopy(data)
+
+    def _refresh_in_background(self, key: tuple, case_id: str):
+        if any(getattr(task, "case_key", None) == key for task in _background_refreshes):
+            return
+
+        async def refresh():
+            try:
+                generation = _case_cache.generation(key)
+                await _case_fetches.do((key, generation), self._fetch_case, case_id, generation)
+            except Exception as e:
+                logger.warning(redact_log(mask_phi(f"[NEOS_CACHE] Background refresh of case {case_id} failed: {e}")))
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        task.case_key = key
+        _background_refreshes.add(task)
+        task.add_done_callback(_background_refreshes.discard)
 
     @http_retry
-    async def get_case(self, case_id: str) -> dict:
+    async def _fetch_case(self, case_id: str, generation: int = None) -> dict:
         try:
-            if not case_id or not isinstance(case_id, str):
-                raise AppError(
-                    code="NEOS_GET_000",
-                    message=f"Invalid case_id provided: {case_id}"
-                )
-
             tenant_id = get_tenant_id()
             if not enforce_quota("neos_requests"):
                 logger.warning(f"[QUOTA] Tenant {tenant_id} exceeded NEOS request quota")
@@ -40,22 +120,24 @@ class NeosClient:
             url = f"{self.base_url}/cases/{case_id}"
             start_time = time.perf_counter()
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers, timeout=10) as response:
-                    latency = time.perf_counter() - start_time
-                    record_latency_metric("neos_get_case_latency", latency)
+            session = get_session()
+            async with session.get(url, headers=self.headers, timeout=10) as response:
+                latency = time.perf_counter() - start_time
+                record_latency_metric("neos_get_case_latency", latency)
 
-                    if response.status != 200:
-                        raise AppError(
-                            code="NEOS_GET_001",
-                            message=f"NEOS GET failed: {response.status}"
-                        )
+                if response.status != 200:
+                    raise AppError(
+                        code="NEOS_GET_001",
+                        message=f"NEOS GET failed: {response.status}"
+                    )
 
-                    data = await response.json()
-                    if not data or "caseId" not in data:
-                        raise ValueError(f"Invalid NEOS response: {data}")
+                data = await response.json()
+                if not data or "caseId" not in data:
+                    raise ValueError(f"Invalid NEOS response: {data}")
 
-                    return data
+                # Dropped if the case was invalidated (e.g. updated) while this request was in flight
+                _case_cache.set((tenant_id, self.base_url, case_id), data, generation=generation)
+                return data
 
         except Exception as e:
             handle_error(
@@ -89,24 +171,25 @@ class NeosClient:
             payload = {"classCodeTitle": class_code_title}
             start_time = time.perf_counter()
 
-            async with aiohttp.ClientSession() as session:
-                async with session.put(url, headers=self.headers, json=payload, timeout=10) as response:
-                    latency = time.perf_counter() - start_time
-                    record_latency_metric("neos_update_case_latency", latency)
+            session = get_session()
+            async with session.put(url, headers=self.headers, json=payload, timeout=10) as response:
+                latency = time.perf_counter() - start_time
+                record_latency_metric("neos_update_case_latency", latency)
 
-                    if response.status != 200:
-                        raise AppError(
-                            code="NEOS_UPDATE_002",
-                            message=f"NEOS UPDATE failed: {response.status}"
-                        )
+                if response.status != 200:
+                    raise AppError(
+                        code="NEOS_UPDATE_002",
+                        message=f"NEOS UPDATE failed: {response.status}"
+                    )
 
-                    logger.info(
-                        redact_log(
-                            mask_phi(
-                                f"✅ NEOS case {case_id} updated to {class_code_title}"
-                            )
+                logger.info(
+                    redact_log(
+                        mask_phi(
+                            f"✅ NEOS case {case_id} updated to {class_code_title}"
                         )
                     )
+                )
+                self.invalidate_case(case_id)
 
         except Exception as e:
             handle_error(
@@ -144,24 +227,25 @@ class NeosClient:
             data.add_field("file", file_bytes, filename=filename)
             start_time = time.perf_counter()
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, data=data, timeout=20) as response:
-                    latency = time.perf_counter() - start_time
-                    record_latency_metric("neos_upload_document_latency", latency)
+            session = get_session()
+            async with session.post(url, headers=headers, data=data, timeout=20) as response:
+                latency = time.perf_counter() - start_time
+                record_latency_metric("neos_upload_document_latency", latency)
 
-                    if response.status != 200:
-                        raise AppError(
-                            code="NEOS_UPLOAD_003",
-                            message=f"NEOS UPLOAD failed: {response.status}"
-                        )
+                if response.status != 200:
+                    raise AppError(
+                        code="NEOS_UPLOAD_003",
+                        message=f"NEOS UPLOAD failed: {response.status}"
+                    )
 
-                    logger.info(
-                        redact_log(
-                            mask_phi(
-                                f"✅ Document '{filename}' uploaded to NEOS case {case_id}"
-                            )
+                logger.info(
+                    redact_log(
+                        mask_phi(
+                            f"✅ Document '{filename}' uploaded to NEOS case {case_id}"
                         )
                     )
+                )
+                self.invalidate_case(case_id)
 
         except Exception as e:
             handle_error(
@@ -170,3 +254,140 @@ class NeosClient:
                 user_message=f"Failed to upload document '{filename}' to NEOS case {case_id}.",
                 raise_it=True
             )
+
+    async def _put_class_code(self, case_id: str, class_code_title: str, semaphore: asyncio.Semaphore) -> dict:
+        """
+        One per-case class-code update for bulk_update_case_status; never raises.
+        """
+        url = f"{self.base_url}/cases/{case_id}/class-code"
+        payload = {"classCodeTitle": class_code_title}
+        result = {"ok": False, "status": None, "error": None, "latency": 0.0, "via": "single"}
+
+        async with semaphore:
+            start_time = time.perf_counter()
+            for attempt in range(NEOS_BULK_RETRIES + 1):
+                try:
+                    session = get_session()
+                    async with session.put(url, headers=self.headers, json=payload, timeout=10) as response:
+                        result["status"] = response.status
+                        if response.status == 200:
+                            result.update(ok=True, error=None)
+                            break
+                        result["error"] = f"NEOS UPDATE failed: {response.status}"
+                        if response.status not in NEOS_RETRYABLE_STATUSES:
+                            break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+                if attempt < NEOS_BULK_RETRIES:
+                    await asyncio.sleep(NEOS_BULK_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+            result["latency"] = time.perf_counter() - start_time
+
+        record_latency_metric("neos_update_case_latency", result["latency"])
+        return result
+
+    async def _post_bulk_class_codes(self, case_ids: list, class_code_title: str) -> dict:
+        """
+        Try the bulk class-code endpoint for one chunk.
+        Returns {case_id: result} for the cases it confirmed, or None when unsupported.
+        """
+        url = f"{self.base_url}/{self.bulk_update_path.lstrip('/')}"
+        payload = {"updates": [{"caseId": case_id, "classCodeTitle": class_code_title} for case_id in case_ids]}
+        start_time = time.perf_counter()
+
+        session = get_session()
+        async with session.post(url, headers=self.headers, json=payload, timeout=30) as response:
+            latency = time.perf_counter() - start_time
+            if response.status not in (200, 207):
+                # Any other answer (missing route, rejected payload, no permission) would repeat for
+                # every chunk and batch, so stop using the endpoint for this base URL
+                logger.warning(f"[NEOS_BULK] Bulk endpoint unavailable ({response.status}); using per-case updates")
+                _bulk_endpoint_support[self.base_url] = False
+                return None
+            data = await response.json()
+
+        _bulk_endpoint_support[self.base_url] = True
+        record_latency_metric("neos_bulk_update_latency", latency)
+        results = {}
+        for item in data.get("results", []):
+            case_id = str(item.get("caseId", ""))
+            status = int(item.get("status", 200))
+            if case_id in case_ids:
+                results[case_id] = {
+                    "ok": status == 200,
+                    "status": status,
+                    "error": item.get("error") if status != 200 else None,
+                    "latency": latency,
+                    "via": "bulk",
+                }
+        return results
+
+    async def bulk_update_case_status(self, case_ids: list, class_code_title: str) -> dict:
+        """
+        Update many cases to the same class code.
+
+        Uses the bulk endpoint (NEOS_BULK_UPDATE_PATH) when one is configured and
+        hasn't answered with an error for this base URL, otherwise per-case PUTs over the pooled session with at most
+        NEOS_BULK_CONCURRENCY in flight. One quota check covers the whole call.
+
+        Returns {case_id: {"ok", "status", "error", "latency", "via"}};
+        aggregate timings are kept in self.last_bulk_stats.
+        """
+        case_ids = list(dict.fromkeys(str(c) for c in case_ids if c))
+        if not case_ids:
+            return {}
+        if not class_code_title:
+            raise AppError(
+                code="NEOS_UPDATE_000",
+                message=f"Invalid input for bulk_update_case_status: class_code_title={class_code_title}"
+            )
+
+        tenant_id = get_tenant_id()
+        if not enforce_quota("neos_requests", len(case_ids)):
+            logger.warning(f"[QUOTA] Tenant {tenant_id} exceeded NEOS request quota")
+            raise AppError(
+                code="QUOTA_EXCEEDED",
+                message="NEOS request quota exceeded."
+            )
+
+        start_time = time.perf_counter()
+        results = {}
+        try:
+            if self.bulk_update_path and _bulk_endpoint_support.get(self.base_url) is not False:
+                for i in range(0, len(case_ids), self.bulk_chunk_size):
+                    chunk = case_ids[i:i + self.bulk_chunk_size]
+                    confirmed = await self._post_bulk_class_codes(chunk, class_code_title)
+                    if confirmed is None:
+                        break
+                    results.update(confirmed)
+        except Exception as e:
+            logger.warning(f"[NEOS_BULK] Bulk endpoint error, using per-case updates: {e}")
+
+        remaining = [case_id for case_id in case_ids if case_id not in results]
+        semaphore = asyncio.Semaphore(self.bulk_concurrency)
+        singles = await asyncio.gather(
+            *(self._put_class_code(case_id, class_code_title, semaphore) for case_id in remaining)
+        )
+        results.update(zip(remaining, singles))
+        for case_id, result in results.items():
+            if result["ok"]:
+                self.invalidate_case(case_id)
+
+        wall = time.perf_counter() - start_time
+        latencies = [r["latency"] for r in results.values()]
+        succeeded = sum(1 for r in results.values() if r["ok"])
+        self.last_bulk_stats = {
+            "cases": len(case_ids),
+            "succeeded": succeeded,
+            "failed": len(case_ids) - succeeded,
+            "bulk_endpoint": _bulk_endpoint_support.get(self.base_url, False),
+            "wall_seconds": wall,
+            "avg_latency": sum(latencies) / len(latencies),
+            "max_latency": max(latencies),
+        }
+        record_latency_metric("neos_bulk_update_wall", wall)
+        logger.info(
+            redact_log(mask_phi(f"[NEOS_BULK] {succeeded}/{len(case_ids)} cases set to {class_code_title} "
+                                f"in {wall:.2f}s"))
+        )
+        return results
+
@@ -1,40 +1,100 @@
 import asyncio
+import threading
 import time
-from openai import AsyncOpenAI, OpenAIError
+from openai import AsyncOpenAI, OpenAIError, RateLimitError
 from config_loader import AppConfig, get_config
 from utils.retry_utils import openai_retry
-from utils.token_utils import trim_to_token_limit
+from utils.token_utils import trim_to_token_limit, count_tokens
+from utils.rate_limiter import ModelRateLimiter, parse_reset_duration
 from core.security import redact_log, mask_phi
 from core.usage_tracker import log_usage, check_quota
 from core.auth import get_user_id, get_tenant_id, get_user_role
 from core.error_handling import handle_error, AppError
+from core.llm_cache import LLMResponseCache, make_cache_key
+from utils.single_flight import SingleFlight
 from logger import logger
 
 DEFAULT_MODEL = "gpt-4"
 DEFAULT_SYSTEM_MSG = "You are a professional legal writer. Stay concise and legally fluent."
+STREAM_CONNECT_ATTEMPTS = 3
+
+# Shared by every OpenAIClient instance so identical prompts issued concurrently
+# (other sessions, batch rows, per-call clients) share one API request.
+_inflight_requests = SingleFlight(name="openai_coalesce")
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def _shared_rate_limiter(config: AppConfig) -> ModelRateLimiter:
+    """
+    Process-wide RPM/TPM limiter so every client instance draws from the same budget.
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = ModelRateLimiter(
+                rpm=getattr(config, "OPENAI_RPM_LIMIT", None),
+                tpm=getattr(config, "OPENAI_TPM_LIMIT", None),
+            )
+        return _rate_limiter
+
+
+def _retry_after_seconds(error: RateLimitError) -> float:
+    """
+    Seconds to pause after a 429, from Retry-After / reset headers (default 1s).
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    if headers.get("retry-after-ms"):
+        return parse_reset_duration(headers["retry-after-ms"]) / 1000
+    for name in ("retry-after", "x-ratelimit-reset-tokens", "x-ratelimit-reset-requests"):
+        seconds = parse_reset_duration(headers.get(name))
+        if seconds > 0:
+            return seconds
+    return 1.0
 
 
 class OpenAIClient:
     def __init__(self, config: AppConfig = None):
         self.config = config or get_config()
-        self.client = AsyncOpenAI(api_key=self.config.OPENAI_API_KEY)
+        # 429s are handled by the shared rate limiter; transient errors by openai_retry
+        self.client = AsyncOpenAI(api_key=self.config.OPENAI_API_KEY, max_retries=0)
         self.model = getattr(self.config, "OPENAI_MODEL", DEFAULT_MODEL)
+        self.rate_limiter = _shared_rate_limiter(self.config)
+        self.completion_token_reserve = getattr(self.config, "OPENAI_COMPLETION_TOKEN_RESERVE", 500)
+        self.rate_limit_retries = getattr(self.config, "OPENAI_RATE_LIMIT_RETRIES", 5)
 
-    async def _generate(
-        self,
-        prompt: str,
-        model: str,
-        system_msg: str,
-        temperature: float,
-        test_mode: bool
-    ) -> str:
+        # Opt-in persistent response cache (OPENAI_CACHE_ENABLED=true)
+        self.response_cache = None
+        if getattr(self.config, "OPENAI_CACHE_ENABLED", False):
+            self.response_cache = LLMResponseCache(
+                ttl_seconds=getattr(self.config, "OPENAI_CACHE_TTL_SECONDS", 86400),
+                max_bytes=getattr(self.config, "OPENAI_CACHE_MAX_MB", 100) * 1024 * 1024,
+            )
+
+    def get_cache_stats(self) -> dict:
         """
-        Internal non-decorated async generator method.
+        Response cache hit/miss counters, or an empty dict when caching is disabled.
         """
-        tenant_id = get_tenant_id()
-        user_id = get_user_id()
-        user_role = get_user_role()
+        return self.response_cache.stats() if self.response_cache else {}
 
+    def get_coalescing_stats(self) -> dict:
+        """
+        Counters for API calls executed vs. coalesced onto an identical in-flight request.
+        """
+        return _inflight_requests.stats()
+
+    def get_rate_limit_stats(self) -> dict:
+        """
+        Queueing and 429 counters plus the current per-model RPM/TPM limits.
+        """
+        return self.rate_limiter.stats()
+
+    def _prepare_request(self, prompt: str, model: str, tenant_id: str) -> tuple:
+        """
+        Validate the prompt, trim it to the token limit and resolve the model.
+        Returns (trimmed_prompt, model).
+        """
         # 🚨 Defensive check for None or empty prompt
         if not prompt or not isinstance(prompt, str):
             logger.error(f"[OPENAI_GEN] Received invalid prompt: {prompt}")
@@ -44,7 +104,6 @@ class OpenAIClient:
                 details=f"Tenant={tenant_id}"
             )
 
-        trimmed = trim_to_token_limit(prompt)
         used_model = model or self.model or DEFAULT_MODEL
 
         if used_model not in ["gpt-3.5-turbo", "gpt-4", "gpt-4o", "gpt-4-turbo"]:
@@ -55,10 +114,101 @@ class OpenAIClient:
             )
             used_model = DEFAULT_MODEL
 
+        trimmed = trim_to_token_limit(prompt, model=used_model)
+        return trimmed, used_model
+
+    async def _generate(
+        self,
+        prompt: str,
+        model: str,
+        system_msg: str,
+        temperature: float,
+        test_mode: bool,
+        bypass_cache: bool = False
+    ) -> str:
+        """
+        Internal non-decorated async generator method.
+        Cache hits return before quota checks and usage logging; concurrent
+        identical requests (same tenant, model, prompt, system message and
+        temperature) are coalesced into a single API call.
+        """
+        tenant_id = get_tenant_id()
+        user_id = get_user_id()
+        user_role = get_user_role()
+
+        trimmed, used_model = self._prepare_request(prompt, model, tenant_id)
+
         if test_mode:
             logger.info("[OPENAI_GEN_TEST] Returning deterministic test output.")
             return f"[TEST MODE] Prompt length={len(trimmed)} Model={used_model}"
 
+        cache_key = make_cache_key(used_model, system_msg, trimmed, temperature)
+        if self.response_cache and not bypass_cache:
+            cached = self.response_cache.get(tenant_id, cache_key)
+            if cached is not None:
+                logger.info(f"[OPENAI_CACHE_HIT] model={used_model} tenant={tenant_id}")
+                return cached
+
+        return await _inflight_requests.do(
+            (tenant_id, cache_key),
+            self._request_completion,
+            trimmed, used_model, system_msg, temperature, tenant_id, user_role, cache_key,
+        )
+
+    async def _create_with_rate_limit(self, used_model: str, reserved_tokens: int, **request) -> tuple:
+        """
+        Issue a chat completion request once RPM/TPM budget is available.
+        On a 429 every caller for the model pauses for Retry-After and the
+        request is re-queued. Returns (raw_response, start_time).
+        """
+        for attempt in range(self.rate_limit_retries + 1):
+            await self.rate_limiter.acquire(used_model, reserved_tokens)
+            start_time = time.time()
+            try:
+                raw_response = await self.client.chat.completions.with_raw_response.create(
+                    model=used_model, **request
+                )
+                break
+            except RateLimitError as e:
+                # A rejected request consumed no tokens
+                self.rate_limiter.settle(used_model, reserved_tokens, 0)
+                if getattr(e, "code", None) == "insufficient_quota" or attempt >= self.rate_limit_retries:
+                    raise
+                self.rate_limiter.penalize(used_model, _retry_after_seconds(e))
+
+        self.rate_limiter.update_from_headers(used_model, getattr(raw_response, "headers", None))
+        return raw_response, start_time
+
+    def _record_usage(self, used_model: str, usage, user_role: str, latency: float, reserved_tokens: int):
+        """
+        Settle the rate limiter reservation and log token usage.
+        """
+        self.rate_limiter.settle(used_model, reserved_tokens, usage.total_tokens)
+        log_usage(
+            event_type="openai_tokens",
+            amount=usage.total_tokens,
+            metadata={
+                "model": used_model,
+                "prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens,
+                "role": user_role,
+                "latency": latency,
+            },
+        )
+
+    async def _request_completion(
+        self,
+        trimmed: str,
+        used_model: str,
+        system_msg: str,
+        temperature: float,
+        tenant_id: str,
+        user_role: str,
+        cache_key: str
+    ) -> str:
+        """
+        Quota check, API call, usage logging and cache write for one completion.
+        """
         if not check_quota("openai_tokens"):
             raise AppError(
                 code="OPENAI_GEN_000",
@@ -66,15 +216,19 @@ class OpenAIClient:
                 details=f"Tenant={tenant_id}"
             )
 
-        start_time = time.time()
-        response = await self.client.chat.completions.create(
-            model=used_model,
+        reserved_tokens = (
+            count_tokens(system_msg, used_model) + count_tokens(trimmed, used_model) + self.completion_token_reserve
+        )
+        raw_response, start_time = await self._create_with_rate_limit(
+            used_model,
+            reserved_tokens,
             messages=[
                 {"role": "system", "content": system_msg},
                 {"role": "user", "content": trimmed},
             ],
             temperature=temperature,
         )
+        response = raw_response.parse()
         latency = time.time() - start_time
         logger.info(redact_log(mask_phi(f"[METRIC] OpenAI latency: {latency:.2f}s for tenant={tenant_id}")))
 
@@ -90,17 +244,10 @@ class OpenAIClient:
         usage = getattr(response, "usage", None)
 
         if usage:
-            log_usage(
-                event_type="openai_tokens",
-                amount=usage.total_tokens,
-                metadata={
-                    "model": used_model,
-                    "prompt_tokens": usage.prompt_tokens,
-                    "completion_tokens": usage.completion_tokens,
-                    "role": user_role,
-                    "latency": latency,
-                },
-            )
+            self._record_usage(used_model, usage, user_role, latency, reserved_tokens)
+
+        if self.response_cache and content:
+            self.response_cache.set(tenant_id, cache_key, content)
 
         return content
 
@@ -113,12 +260,14 @@ class OpenAIClient:
         system_msg: str = DEFAULT_SYSTEM_MSG,
         temperature: float = 0.4,
         test_mode: bool = False,
+        bypass_cache: bool = False,
     ) -> str:
         """
         Wrapper for _generate with retry decorator applied safely.
+        bypass_cache=True always calls the API (the fresh result is still cached).
         """
         try:
-            return await self._generate(prompt, model, system_msg, temperature, test_mode)
+            return await self._generate(prompt, model, system_msg, temperature, test_mode, bypass_cache)
         except OpenAIError as e:
             handle_error(
                 e,
@@ -137,6 +286,119 @@ class OpenAIClient:
             )
 
 
+    async def stream_generate(
+        self,
+        prompt: str,
+        model: str = None,
+        system_msg: str = DEFAULT_SYSTEM_MSG,
+        temperature: float = 0.4,
+        test_mode: bool = False,
+    ):
+        """
+        Async iterator yielding completion text deltas as they arrive.
+        Same validation, quota, rate limiting, usage logging and response cache
+        as safe_generate. Failures opening the stream are retried like
+        openai_retry; a failure after the first delta is raised to the caller.
+        """
+        tenant_id = get_tenant_id()
+        user_role = get_user_role()
+        try:
+            trimmed, used_model = self._prepare_request(prompt, model, tenant_id)
+
+            if test_mode:
+                logger.info("[OPENAI_GEN_TEST] Returning deterministic test output.")
+                yield f"[TEST MODE] Prompt length={len(trimmed)} Model={used_model}"
+                return
+
+            cache_key = make_cache_key(used_model, system_msg, trimmed, temperature)
+            cached = self.response_cache.get(tenant_id, cache_key) if self.response_cache else None
+            if cached is not None:
+                logger.info(f"[OPENAI_CACHE_HIT] model={used_model} tenant={tenant_id}")
+                yield cached
+                return
+
+            if not check_quota("openai_tokens"):
+                raise AppError(
+                    code="OPENAI_GEN_000",
+                    message="Quota exceeded for tenant.",
+                    details=f"Tenant={tenant_id}"
+                )
+
+            reserved_tokens = (
+                count_tokens(system_msg, used_model) + count_tokens(trimmed, used_model) + self.completion_token_reserve
+            )
+            for attempt in range(STREAM_CONNECT_ATTEMPTS):
+                try:
+                    raw_response, start_time = await self._create_with_rate_limit(
+                        used_model,
+                        reserved_tokens,
+                        messages=[
+                            {"role": "system", "content": system_msg},
+                            {"role": "user", "content": trimmed},
+                        ],
+                        temperature=temperature,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                    )
+                    break
+                except OpenAIError as e:
+                    if isinstance(e, RateLimitError) or attempt + 1 >= STREAM_CONNECT_ATTEMPTS:
+                        raise
+                    logger.warning(f"[OPENAI_STREAM] Retrying stream open after error: {e}")
+                    await asyncio.sleep(min(10, 2 ** (attempt + 1)))
+
+            parts, usage, first_token_at = [], None, None
+            async for chunk in raw_response.parse():
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                choices = getattr(chunk, "choices", None)
+                delta = choices[0].delta.content if choices else None
+                if not delta:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.time()
+                    logger.info(
+                        f"[METRIC] OpenAI time-to-first-token: {first_token_at - start_time:.2f}s "
+                        f"for tenant={tenant_id}"
+                    )
+                parts.append(delta)
+                yield delta
+
+            latency = time.time() - start_time
+            logger.info(redact_log(mask_phi(f"[METRIC] OpenAI stream latency: {latency:.2f}s for tenant={tenant_id}")))
+
+            content = "".join(parts).strip()
+            if not content:
+                raise AppError(
+                    code="OPENAI_GEN_001",
+                    message="OpenAI returned no completions.",
+                    details=f"Model={used_model}, Prompt length={len(trimmed)}",
+                )
+
+            if usage:
+                self._record_usage(used_model, usage, user_role, latency, reserved_tokens)
+
+            if self.response_cache:
+                self.response_cache.set(tenant_id, cache_key, content)
+
+        except OpenAIError as e:
+            handle_error(
+                e,
+                code="OPENAI_STREAM_001",
+                user_message="OpenAI API error occurred while streaming. Please try again later.",
+                raise_it=True,
+            )
+        except AppError:
+            raise
+        except Exception as e:
+            handle_error(
+                e,
+                code="OPENAI_STREAM_002",
+                user_message="Unexpected error during streamed text generation.",
+                raise_it=True,
+            )
+
+
 # Singleton instance
 openai_client_instance = OpenAIClient()
 
@@ -147,6 +409,7 @@ async def safe_generate_async(
     system_msg: str = DEFAULT_SYSTEM_MSG,
     temperature: float = 0.4,
     test_mode: bool = False,
+    bypass_cache: bool = False,
 ) -> str:
     """
     Async wrapper for external calls (preferred for all internal code).
@@ -157,6 +420,7 @@ async def safe_generate_async(
         system_msg=system_msg,
         temperature=temperature,
         test_mode=test_mode,
+        bypass_cache=bypass_cache,
     )
 
 
@@ -166,6 +430,7 @@ def safe_generate(
     system_msg: str = DEFAULT_SYSTEM_MSG,
     temperature: float = 0.4,
     test_mode: bool = False,
+    bypass_cache: bool = False,
 ) -> str:
     """
     Legacy sync wrapper for backward compatibility.
@@ -180,9 +445,28 @@ def safe_generate(
     if loop.is_running():
         # If already inside an event loop, schedule the async call
         return asyncio.ensure_future(
-            safe_generate_async(prompt, model, system_msg, temperature, test_mode)
+            safe_generate_async(prompt, model, system_msg, temperature, test_mode, bypass_cache)
         )
     else:
         return loop.run_until_complete(
-            safe_generate_async(prompt, model, system_msg, temperature, test_mode)
+            safe_generate_async(prompt, model, system_msg, temperature, test_mode, bypass_cache)
         )
+
+
+def stream_generate(
+    prompt: str,
+    model: str = None,
+    system_msg: str = DEFAULT_SYSTEM_MSG,
+    temperature: float = 0.4,
+    test_mode: bool = False,
+):
+    """
+    Module-level access to the singleton's streaming API; returns an async iterator of text deltas.
+    """
+    return openai_client_instance.stream_generate(
+        prompt=prompt,
+        model=model,
+        system_msg=system_msg,
+        temperature=temperature,
+        test_mode=test_mode,
+    )
@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from aiohttp import web
+
+
+async def _start_neos_stub(bulk_supported: bool = True, bulk_error_status: int = 404):
+    """
+    Local NEOS API: case lookups (versioned by request count), per-case class-code
+    updates ("BAD" is rejected, "FLAKY" fails once with 503) and the bulk endpoint
+    (answering bulk_error_status when not bulk_supported).
+    """
+    state = {"gets": 0, "active": 0, "peak": 0, "puts": [], "bulk_calls": 0}
+
+    async def get_case(request):
+        state["gets"] += 1
+        version = state["gets"]
+        await asyncio.sleep(0.01)
+        return web.json_response({"caseId": request.match_info["case_id"], "version": version})
+
+    async def put_class_code(request):
+        case_id = request.match_info["case_id"]
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        state["puts"].append(case_id)
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        if case_id == "BAD":
+            return web.json_response({"error": "Unknown case"}, status=400)
+        if case_id == "FLAKY" and state["puts"].count("FLAKY") == 1:
+            return web.json_response({"error": "Busy"}, status=503)
+        return web.json_response({"ok": True})
+
+    async def bulk(request):
+        state["bulk_calls"] += 1
+        if not bulk_supported:
+            return web.json_response({"error": "Unavailable"}, status=bulk_error_status)
+        payload = await request.json()
+        return web.json_response({"results": [
+            {"caseId": u["caseId"], "status": 400 if u["caseId"] == "BAD" else 200}
+            for u in payload["updates"]
+        ]}, status=207)
+
+    app = web.Application()
+    app.router.add_get("/cases/{case_id}", get_case)
+    app.router.add_put("/cases/{case_id}/class-code", put_class_code)
+    app.router.add_post("/cases/class-code/bulk", bulk)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", state
+
+
+@pytest.fixture
+def neos_stub():
+    """
+    Async factory for a local NEOS stub: await neos_stub(bulk_supported=..., bulk_error_status=...)
+    inside the test's event loop; returns (runner, base_url, state). Call runner.cleanup() when done.
+    """
+    return _start_neos_stub
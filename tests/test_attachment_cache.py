@@ -0,0 +1,49 @@
+import base64
+import io
+import os
+from utils.attachment_cache import AttachmentCache
+
+
+class FakeUpload(io.BytesIO):
+    name = "brochure.pdf"
+
+
+def test_uploaded_file_is_encoded_once_and_reusable():
+    cache = AttachmentCache()
+    upload = FakeUpload(b"%PDF brochure" * 100)
+
+    batches = [cache.prepare([upload]) for _ in range(50)]
+
+    expected = base64.b64encode(b"%PDF brochure" * 100).decode("utf-8")
+    assert all(b[0]["contentBytes"] == expected and b[0]["name"] == "brochure.pdf" for b in batches)
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 49
+    assert stats["bytes_encoded"] == len(b"%PDF brochure" * 100)
+
+
+def test_unchanged_path_is_not_reread(tmp_path):
+    cache = AttachmentCache()
+    path = tmp_path / "guide.txt"
+    path.write_bytes(b"guide v1")
+
+    cache.prepare([str(path)])
+    cache.prepare([str(path)])
+    assert cache.stats()["bytes_read"] == len(b"guide v1")
+
+    path.write_bytes(b"guide v2!")
+    os.utime(path, ns=(1, 1))
+    assert cache.prepare([str(path)])[0]["contentBytes"] == base64.b64encode(b"guide v2!").decode("utf-8")
+    assert cache.stats()["misses"] == 2
+
+
+def test_cache_is_bounded_by_encoded_size():
+    cache = AttachmentCache(max_bytes=300)
+    for i in range(5):
+        upload = FakeUpload(bytes([i]) * 150)
+        cache.prepare([upload])
+
+    stats = cache.stats()
+    assert stats["cached_bytes"] <= 300
+    assert stats["evictions"] == 4
+    assert stats["entries"] == 1
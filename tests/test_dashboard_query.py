@@ -0,0 +1,60 @@
+import pandas as pd
+import pandas.testing as pdt
+from services.dashboard_query import DashboardQueryEngine, get_query_engine
+
+
+def _dashboard(rows: int = 200) -> pd.DataFrame:
+    return pd.DataFrame({
+        "Case Type": pd.Categorical([["Auto", "Slip", "Dog Bite"][i % 3] for i in range(rows)]),
+        "Class Code Title": [["Open", "Closed", "Pending", None][i % 4] for i in range(rows)],
+        "Referred By Name (Full - Last, First)": [f"Attorney {i % 7}" for i in range(rows)],
+        "Priority": [i % 5 for i in range(rows)],
+    }, index=range(1000, 1000 + rows))
+
+
+def test_filters_match_isin_masks():
+    df = _dashboard()
+    engine = DashboardQueryEngine(df)
+    filters = {"Case Type": ["Auto", "Dog Bite"], "Class Code Title": ["Open", "Pending"], "Referred By Name (Full - Last, First)": []}
+    text_filters = {"Priority": ["1", "3"]}
+
+    expected = df[
+        df["Case Type"].isin(["Auto", "Dog Bite"])
+        & df["Class Code Title"].isin(["Open", "Pending"])
+        & df["Priority"].astype(str).isin(["1", "3"])
+    ]
+    pdt.assert_frame_equal(engine.frame(filters, text_filters), expected)
+    # Only the row positions are cached, not a copy of the filtered rows
+    assert [key[0] for key in engine._results] == ["positions"]
+    assert engine.frame(filters, text_filters) is not engine.frame(filters, text_filters)
+    assert engine.frame({}) is df
+    assert len(engine.frame({"Case Type": ["Unknown"]})) == 0
+
+
+def test_value_counts_are_cached_per_filter_key():
+    df = _dashboard()
+    engine = DashboardQueryEngine(df)
+    filters = {"Case Type": ["Slip"]}
+
+    counts = engine.value_counts("Class Code Title", filters)
+    expected = df[df["Case Type"] == "Slip"]["Class Code Title"].value_counts()
+    assert counts.to_dict() == expected.to_dict()
+    assert list(counts.values) == sorted(counts.values, reverse=True)
+
+    misses = engine.stats()["misses"]
+    # Same combination in a different order and with empty selections is the same key
+    again = engine.value_counts("Class Code Title", {"Class Code Title": [], "Case Type": ["Slip"]})
+    assert again is counts
+    assert engine.stats()["misses"] == misses
+    assert engine.options("Case Type") == ["Auto", "Dog Bite", "Slip"]
+    assert engine.options("Class Code Title") == ["Closed", "Open", "Pending"]
+
+
+def test_engine_is_shared_per_snapshot():
+    df = _dashboard()
+    df.attrs["snapshot_key"] = "dashboard@r1"
+    assert get_query_engine(df.copy(deep=False)) is get_query_engine(df.copy(deep=False))
+
+    changed = df.copy(deep=False)
+    changed.attrs["snapshot_key"] = "dashboard@r2"
+    assert get_query_engine(changed) is not get_query_engine(df)
@@ -0,0 +1,70 @@
+from io import BytesIO
+import pandas as pd
+import pandas.testing as pdt
+from services.dashboard_snapshot import DashboardSnapshotStore
+
+DASHBOARD_PATH = "/dashboard/master.xlsx"
+
+
+def _workbook(rows: int, status: str = "Open") -> bytes:
+    df = pd.DataFrame({
+        "CaseID": list(range(rows)),
+        "Case Status": [status if i % 2 else "Closed" for i in range(rows)],
+        "Notes": [f"note {i}" if i % 3 else None for i in range(rows)],
+    })
+    buf = BytesIO()
+    df.to_excel(buf, sheet_name="Master Dashboard", index=False)
+    return buf.getvalue()
+
+
+class Meta:
+    def __init__(self, rev):
+        self.rev = rev
+
+
+class FakeDbx:
+    def __init__(self, content, rev):
+        self.content = content
+        self.rev = rev
+        self.calls = []
+
+    def files_get_metadata(self, path):
+        self.calls.append("metadata")
+        return Meta(self.rev)
+
+    def files_download(self, path):
+        self.calls.append("download")
+        return Meta(self.rev), type("Response", (), {"content": self.content})()
+
+
+def test_snapshot_is_rebuilt_only_when_rev_changes(tmp_path):
+    dbx = FakeDbx(_workbook(30), "r1")
+    store = DashboardSnapshotStore(root=str(tmp_path), rev_check_seconds=0)
+
+    first = store.load(dbx, DASHBOARD_PATH)
+    second = store.load(dbx, DASHBOARD_PATH)
+    assert dbx.calls == ["download", "metadata"]
+    pdt.assert_frame_equal(first, second)
+    assert isinstance(first["Case Status"].dtype, pd.CategoricalDtype)
+    assert first["Notes"].isna().sum() == 10
+
+    dbx.content, dbx.rev = _workbook(30, status="Pending"), "r2"
+    third = store.load(dbx, DASHBOARD_PATH)
+    assert dbx.calls[-2:] == ["metadata", "download"]
+    assert "Pending" in set(third["Case Status"])
+    assert store.stats()["rebuilds"] == 2
+
+
+def test_snapshot_is_shared_across_stores_and_copies_are_isolated(tmp_path):
+    dbx = FakeDbx(_workbook(10), "r1")
+    DashboardSnapshotStore(root=str(tmp_path), rev_check_seconds=3600).load(dbx, DASHBOARD_PATH)
+
+    other = DashboardSnapshotStore(root=str(tmp_path), rev_check_seconds=3600)
+    df = other.load(dbx, DASHBOARD_PATH)
+    assert dbx.calls == ["download"]
+    assert other.stats()["disk_loads"] == 1
+
+    df["Extra"] = ""
+    df.columns = [col.upper() for col in df.columns]
+    assert list(other.load(dbx, DASHBOARD_PATH).columns) == ["CaseID", "Case Status", "Notes"]
+    assert other.stats()["memory_hits"] == 1
@@ -20,3 +20,41 @@ def test_docx_placeholder_replacement(tmp_path):
 
     assert "Jane Roe" in text
     assert "12345" in text
+
+
+def test_compiled_template_renders_split_placeholders_and_copies_untouched_entries(tmp_path, monkeypatch):
+    import hashlib
+    import zipfile
+    from io import BytesIO
+    from utils import docx_utils
+    from utils.docx_utils import load_docx_template, get_docx_template_cache_stats
+
+    events = []
+    monkeypatch.setattr(docx_utils, "log_audit_event", lambda name, data: events.append((name, data)))
+
+    template = tmp_path / "compiled.docx"
+    doc = Document()
+    para = doc.add_paragraph("Dear ")
+    para.add_run("{{Client").bold = True
+    para.add_run("Name}}, case {{CaseID}} & {{Unknown}}")
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "Case {{CaseID}}"
+    doc.save(template)
+
+    compiled = load_docx_template(str(template))
+    assert load_docx_template(str(template)) is compiled
+    assert get_docx_template_cache_stats()["hits"] >= 1
+    assert compiled.placeholders == {"ClientName", "CaseID", "Unknown"}
+
+    rendered = compiled.render({"ClientName": "Jane &amp; <Roe>", "CaseID": "12345"}, audit_name="Roe/letter.docx")
+    assert [name for name, _ in events] == ["DOCX Replace Completed"]
+    assert events[0][1]["file"] == "Roe/letter.docx"
+    assert events[0][1]["version_hash"] == hashlib.sha256(rendered).hexdigest()
+    with zipfile.ZipFile(BytesIO(rendered)) as zout, zipfile.ZipFile(template) as zin:
+        assert zout.testzip() is None
+        assert zout.namelist() == zin.namelist()
+        assert zout.read("word/styles.xml") == zin.read("word/styles.xml")
+
+    result = Document(BytesIO(rendered))
+    assert result.paragraphs[-1].text == "Dear Jane & <Roe>, case 12345 & {{Unknown}}"
+    assert result.paragraphs[-1].runs[1].bold
+    assert result.tables[0].cell(0, 0).text == "Case 12345"
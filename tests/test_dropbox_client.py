@@ -0,0 +1,56 @@
+import threading
+import time
+import pytest
+from services import dropbox_client, dropbox_index
+
+
+class FakeEntry:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeDbx:
+    def __init__(self):
+        self.calls = []
+
+    def files_list_folder(self, path):
+        self.calls.append(("list", path))
+        entries = [FakeEntry("welcome.txt"), FakeEntry("intro.html")]
+        return type("Result", (), {"entries": entries, "has_more": False, "cursor": "c1"})()
+
+
+@pytest.fixture
+def shared_client(monkeypatch):
+    built = []
+
+    class FakeClient(dropbox_client.DropboxClient):
+        def __init__(self):
+            time.sleep(0.01)  # widen the race window for concurrent first use
+            built.append(self)
+            self.dbx = FakeDbx()
+
+    monkeypatch.setattr(dropbox_client, "DropboxClient", FakeClient)
+    monkeypatch.setattr(dropbox_index, "_index", None)
+    dropbox_client.reset_dropbox_client()
+    yield built
+    dropbox_client.reset_dropbox_client()
+
+
+def test_client_is_built_once_across_threads(shared_client):
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(dropbox_client.get_dropbox_client())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(shared_client) == 1
+    assert all(client is shared_client[0] for client in seen)
+
+
+def test_template_listing_is_one_api_call(shared_client):
+    assert dropbox_client.list_templates("email") == ["welcome.txt", "intro.html"]
+    assert dropbox_client.list_templates("demand") == ["welcome.txt", "intro.html"]
+
+    assert len(shared_client) == 1
+    assert [call[0] for call in shared_client[0].dbx.calls] == ["list", "list"]
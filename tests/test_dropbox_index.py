@@ -0,0 +1,92 @@
+import threading
+import time
+import dropbox
+from dropbox.files import FileMetadata, DeletedMetadata
+from services.dropbox_index import DropboxFolderIndex
+
+
+def _file(name):
+    return FileMetadata(name=name, path_lower=f"/templates/{name.lower()}")
+
+
+class Page:
+    def __init__(self, entries, cursor, has_more=False):
+        self.entries, self.cursor, self.has_more = entries, cursor, has_more
+
+
+class FakeDbx:
+    """
+    Serves a 2,500-file folder in pages of 1,000, then deltas queued in `changes`.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.changes = []
+        self.names = [f"t{i:04d}.docx" for i in range(2500)]
+
+    def files_list_folder(self, path):
+        self.calls.append("list")
+        return Page([_file(n) for n in self.names[:1000]], "page-1", has_more=True)
+
+    def files_list_folder_continue(self, cursor):
+        self.calls.append("continue")
+        if cursor == "page-1":
+            return Page([_file(n) for n in self.names[1000:2000]], "page-2", has_more=True)
+        if cursor == "page-2":
+            return Page([_file(n) for n in self.names[2000:]], "delta-0")
+        changes, self.changes = self.changes, []
+        return Page(changes, f"delta-{len(self.calls)}")
+
+
+def test_large_folder_is_listed_completely_then_from_memory():
+    dbx = FakeDbx()
+    index = DropboxFolderIndex(ttl_seconds=3600)
+
+    first = index.list(dbx, "/templates")
+    second = index.list(dbx, "/templates")
+
+    assert len(first) == 2500 and first == second
+    assert dbx.calls == ["list", "continue", "continue"]
+    assert index.stats()["memory_hits"] == 1
+
+
+def test_invalidate_applies_only_deltas():
+    dbx = FakeDbx()
+    index = DropboxFolderIndex(ttl_seconds=3600)
+    index.list(dbx, "/templates")
+
+    dbx.changes = [_file("new.docx"), DeletedMetadata(name="t0000.docx", path_lower="/templates/t0000.docx")]
+    index.invalidate("/templates")
+    names = index.list(dbx, "/templates")
+
+    assert "new.docx" in names and "t0000.docx" not in names
+    assert len(names) == 2500
+    assert dbx.calls[3:] == ["continue"]
+    assert index.stats()["delta_syncs"] == 1
+
+
+def test_longpoll_watcher_applies_changes_in_background():
+    dbx = FakeDbx()
+    changed = threading.Event()
+
+    def longpoll(cursor, timeout):
+        if not changed.is_set():
+            dbx.changes = [_file("pushed.docx")]
+            changed.set()
+            return type("Result", (), {"changes": True, "backoff": None})()
+        time.sleep(0.05)
+        return type("Result", (), {"changes": False, "backoff": None})()
+
+    dbx.files_list_folder_longpoll = longpoll
+    index = DropboxFolderIndex(ttl_seconds=0, longpoll=True)
+    index.list(dbx, "/templates")
+
+    for _ in range(100):
+        if index.stats()["longpoll_changes"]:
+            break
+        time.sleep(0.01)
+
+    calls_before = len(dbx.calls)
+    assert "pushed.docx" in index.list(dbx, "/templates")
+    # While watched, listings are served from memory even with a zero TTL
+    assert len(dbx.calls) == calls_before
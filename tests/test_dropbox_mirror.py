@@ -0,0 +1,77 @@
+import os
+import pytest
+from services.dropbox_mirror import DropboxMirror, dropbox_content_hash
+
+
+class Meta:
+    def __init__(self, content, rev):
+        self.content_hash = dropbox_content_hash(content)
+        self.rev = rev
+
+
+class FakeDbx:
+    def __init__(self, files):
+        self.files = files
+        self.calls = []
+
+    def files_get_metadata(self, path):
+        self.calls.append("metadata")
+        content, rev = self.files[path]
+        return Meta(content, rev)
+
+    def files_download(self, path):
+        self.calls.append("download")
+        content, rev = self.files[path]
+        return Meta(content, rev), type("Response", (), {"content": content})()
+
+
+def test_unchanged_file_is_revalidated_not_downloaded(tmp_path):
+    dbx = FakeDbx({"/templates/demand/a.docx": (b"v1", "r1")})
+    mirror = DropboxMirror(root=str(tmp_path / "mirror"), ttl_seconds=0)
+    target = str(tmp_path / "a.docx")
+
+    mirror.export(dbx, "/templates/demand/a.docx", target)
+    mirror.export(dbx, "/templates/demand/a.docx", target)
+    assert dbx.calls == ["download", "metadata"]
+
+    dbx.files["/templates/demand/a.docx"] = (b"v2", "r2")
+    mirror.export(dbx, "/templates/demand/a.docx", target)
+    assert dbx.calls[-2:] == ["metadata", "download"]
+    with open(target, "rb") as f:
+        assert f.read() == b"v2"
+    assert mirror.stats()["revalidated"] == 1
+
+
+def test_ttl_skips_revalidation_and_index_survives_restart(tmp_path):
+    dbx = FakeDbx({"/examples/x.txt": (b"example", "r1")})
+    root = str(tmp_path / "mirror")
+
+    first = DropboxMirror(root=root, ttl_seconds=3600)
+    path = first.fetch(dbx, "/examples/x.txt")
+    assert first.fetch(dbx, "/examples/x.txt") == path
+
+    second = DropboxMirror(root=root, ttl_seconds=3600)
+    assert second.fetch(dbx, "/examples/x.txt") == path
+    assert dbx.calls == ["download"]
+
+
+def test_mirror_evicts_least_recently_used_files(tmp_path):
+    files = {f"/templates/t{i}.txt": (bytes([i]) * 100, "r1") for i in range(4)}
+    dbx = FakeDbx(files)
+    mirror = DropboxMirror(root=str(tmp_path / "mirror"), ttl_seconds=3600, max_bytes=250)
+
+    paths = [mirror.fetch(dbx, path) for path in files]
+
+    stats = mirror.stats()
+    assert stats["bytes"] <= 250
+    assert stats["evictions"] == 2
+    assert not os.path.exists(paths[0]) and os.path.exists(paths[3])
+
+
+def test_corrupted_download_is_rejected(tmp_path):
+    dbx = FakeDbx({"/templates/a.txt": (b"good", "r1")})
+    original = dbx.files_download
+    dbx.files_download = lambda path: (original(path)[0], type("Response", (), {"content": b"bad"})())
+
+    with pytest.raises(ValueError):
+        DropboxMirror(root=str(tmp_path / "mirror")).fetch(dbx, "/templates/a.txt")
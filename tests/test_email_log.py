@@ -0,0 +1,80 @@
+import asyncio
+import csv
+import io
+import json
+import sqlite3
+from email_automation.utils import email_log
+from email_automation.utils.email_log import EmailLogStore, EMAIL_LOG_FIELDS
+from services import email_service
+
+
+def _entry(i):
+    return {field: f"{field}-{i}" for field in EMAIL_LOG_FIELDS}
+
+
+def test_append_and_export_per_tenant(tmp_path):
+    store = EmailLogStore(str(tmp_path / "log.db"))
+    for i in range(3):
+        store.append("tenant-a", _entry(i))
+    store.append("tenant-b", _entry(99))
+
+    assert store.count("tenant-a") == 3
+    rows = list(csv.DictReader(io.StringIO(store.export("tenant-a", "csv").decode("utf-8"))))
+    assert [r["Case ID"] for r in rows] == ["Case ID-0", "Case ID-1", "Case ID-2"]
+    assert list(rows[0]) == EMAIL_LOG_FIELDS
+    assert json.loads(store.export("tenant-b", "json")) == [_entry(99)]
+
+
+def test_sent_case_ids_are_scoped_to_run(tmp_path):
+    path = str(tmp_path / "log.db")
+    # Logs created before runs were tracked get the run_id column added
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE sent_emails (id INTEGER PRIMARY KEY AUTOINCREMENT, tenant_id TEXT NOT NULL, "
+                     "case_id TEXT, timestamp TEXT NOT NULL, entry TEXT NOT NULL)")
+        conn.execute("INSERT INTO sent_emails (tenant_id, case_id, timestamp, entry) VALUES ('tenant-a', 'C0', '', '{}')")
+    store = EmailLogStore(path)
+    store.append("tenant-a", {"Case ID": "C1"}, run_id="run-1")
+    store.append("tenant-a", {"Case ID": "C2"}, run_id="run-2")
+
+    assert store.sent_case_ids("tenant-a", "run-1") == {"C1"}
+    assert store.sent_case_ids("tenant-b", "run-1") == set()
+    assert store.count("tenant-a") == 3
+
+
+def test_legacy_csv_is_imported_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(email_log, "EMAIL_LOG_DIR", str(tmp_path))
+    csv_path, _ = email_log.legacy_log_paths("tenant-a")
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=EMAIL_LOG_FIELDS)
+        writer.writeheader()
+        writer.writerow(_entry(0))
+
+    store = EmailLogStore(str(tmp_path / "log.db"))
+    store.append("tenant-a", _entry(1))
+    assert store.count("tenant-a") == 2
+
+    csv_out, json_out = store.compact("tenant-a")
+    assert EmailLogStore(str(tmp_path / "log.db")).count("tenant-a") == 2
+    with open(json_out) as f:
+        assert [e["Case ID"] for e in json.load(f)] == ["Case ID-0", "Case ID-1"]
+
+
+def test_concurrent_log_email_calls_all_land(tmp_path, monkeypatch):
+    store = EmailLogStore(str(tmp_path / "log.db"))
+    monkeypatch.setattr(email_service, "get_email_log_store", lambda: store)
+    monkeypatch.setattr(email_service, "log_audit_event", lambda *a, **k: None)
+    monkeypatch.setattr(email_service, "get_tenant_id", lambda: "tenant-a")
+
+    clients = [
+        {"CaseID": f"C{i}", "ClientName": f"Client {i}",
+         "Case Details First Party Details Default Email Account Address": f"c{i}@example.com"}
+        for i in range(25)
+    ]
+
+    async def main():
+        await asyncio.gather(*(
+            email_service.log_email(c, "Welcome", "Hello", "template.txt", []) for c in clients
+        ))
+
+    asyncio.run(main())
+    assert sorted(e["Case ID"] for e in store.iter_entries("tenant-a")) == sorted(f"C{i}" for i in range(25))
@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+from email_automation.utils.email_log import EmailLogStore
+from services import email_service
+from services.email_service import BulkEmailPipeline
+
+EMAIL_COLUMN = "Case Details First Party Details Default Email Account Address"
+
+
+class FakeGraph:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.batches = []
+        self.active = 0
+        self.peak = 0
+
+    async def send_emails_batch(self, messages):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self.batches.append(len(messages))
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return [
+            {"to": m["to"], "ok": m["to"] not in self.fail, "status": 400 if m["to"] in self.fail else 202,
+             "error": "Invalid recipient" if m["to"] in self.fail else None, "attempts": 1}
+            for m in messages
+        ]
+
+
+class FakeNeos:
+    def __init__(self):
+        self.updated = []
+
+    async def bulk_update_case_status(self, case_ids, status):
+        self.updated.extend(case_ids)
+        return {case_id: {"ok": True, "status": 200, "error": None} for case_id in case_ids}
+
+
+@pytest.fixture
+def pipeline_env(tmp_path, monkeypatch):
+    store = EmailLogStore(str(tmp_path / "log.db"))
+    graph, neos = FakeGraph(fail={"c3@example.com"}), FakeNeos()
+    monkeypatch.setattr(email_service, "graph", graph)
+    monkeypatch.setattr(email_service, "neos", neos)
+    monkeypatch.setattr(email_service, "get_email_log_store", lambda: store)
+    monkeypatch.setattr(email_service, "get_tenant_id", lambda: "tenant-a")
+    monkeypatch.setattr(email_service, "log_audit_event", lambda *a, **k: None)
+    monkeypatch.setattr(email_service, "log_usage", lambda *a, **k: None)
+    monkeypatch.setattr(email_service, "_resolve_template_path", lambda name: name)
+    return store, graph, neos
+
+
+def _rows(count):
+    rows = [
+        {"client": {"CaseID": f"C{i}", "ClientName": f"Client {i}", EMAIL_COLUMN: f"c{i}@example.com"},
+         "subject": "Welcome", "body": "Hello", "cc": []}
+        for i in range(count)
+    ]
+    rows[5]["client"][EMAIL_COLUMN] = "not-an-email"
+    return rows
+
+
+def test_pipeline_reports_per_row_status_and_stage_stats(pipeline_env):
+    store, graph, neos = pipeline_env
+    pipeline = BulkEmailPipeline("welcome.txt", concurrency={"send": 1})
+
+    results = asyncio.run(pipeline.run(_rows(50)))
+
+    assert [r["case_id"] for r in results] == [f"C{i}" for i in range(50)]
+    assert results[3]["status"] == "❌ Failed: HTTP 400" and results[3]["stage"] == "send"
+    assert results[5]["status"] == "❌ Failed: EMAIL_SEND_001" and results[5]["stage"] == "build"
+    assert sum(r["status"] == "✅ Sent" for r in results) == 48
+    assert sorted(neos.updated) == sorted(f"C{i}" for i in range(50) if i not in (3, 5))
+    assert store.count("tenant-a") == 48
+
+    # One send worker drains the queue into $batch requests of at most 20
+    assert graph.peak == 1
+    assert max(graph.batches) <= 20 and sum(graph.batches) == 49
+    stats = pipeline.stats()
+    assert stats["sent"] == 48
+    assert stats["stages"]["build"]["processed"] == 50
+    assert stats["stages"]["build"]["failed"] == 1
+    assert stats["stages"]["send"]["failed"] == 1
+    assert stats["stages"]["log"]["processed"] == 48
+
+
+def test_resumed_run_skips_case_ids_it_already_sent(pipeline_env):
+    store, graph, neos = pipeline_env
+    rows = _rows(10)
+
+    asyncio.run(BulkEmailPipeline("welcome.txt", run_id="run-1").run(rows[:6]))
+    graph.batches.clear()
+    pipeline = BulkEmailPipeline("welcome.txt", resume=True, run_id="run-1")
+    results = asyncio.run(pipeline.run(rows))
+
+    # C3 and C5 failed the first time, so they are attempted again
+    skipped = [r["case_id"] for r in results if r["stage"] == "resume"]
+    assert skipped == ["C0", "C1", "C2", "C4"]
+    assert sum(graph.batches) == 5
+    assert pipeline.stats()["skipped"] == 4
+
+    # Other runs (and runs that don't opt in to resume) send everything again
+    graph.batches.clear()
+    other = BulkEmailPipeline("welcome.txt", resume=True, run_id="run-2")
+    assert all(r["stage"] != "resume" for r in asyncio.run(other.run(rows[:6])))
+    fresh = BulkEmailPipeline("welcome.txt")
+    assert fresh.run_id not in ("run-1", "run-2")
+    assert all(r["stage"] != "resume" for r in asyncio.run(fresh.run(rows[:6])))
+
+
+def test_queue_bounds_limit_in_flight_rows(pipeline_env):
+    store, graph, neos = pipeline_env
+    pipeline = BulkEmailPipeline("welcome.txt", queue_size=5, concurrency={"build": 2, "send": 1})
+
+    asyncio.run(pipeline.run(_rows(60)))
+
+    assert all(s["queue_peak"] <= 5 for s in pipeline.stats()["stages"].values())
@@ -0,0 +1,174 @@
+import aiohttp
+import asyncio
+import pytest
+from aiohttp import web
+from services import graph_client
+from utils.http_pool import HTTPSessionPool
+
+SENDER = "intake@example.com"
+
+
+async def _start_batch_server(batches, throttled, rejected, singles=None):
+    """
+    Stub $batch endpoint: recipients in `throttled` get one 429, those in `rejected` always 400.
+    Direct sendMail calls are recorded in `singles`.
+    """
+    async def send_mail(request):
+        payload = await request.json()
+        singles.append(payload["message"]["toRecipients"][0]["emailAddress"]["address"])
+        return web.Response(status=202)
+
+    async def batch(request):
+        payload = await request.json()
+        batches.append([r["id"] for r in payload["requests"]])
+        responses = []
+        for sub in payload["requests"]:
+            to = sub["body"]["message"]["toRecipients"][0]["emailAddress"]["address"]
+            if to in rejected:
+                responses.append({"id": sub["id"], "status": 400,
+                                  "body": {"error": {"message": "Invalid recipient"}}})
+            elif to in throttled:
+                throttled.discard(to)
+                responses.append({"id": sub["id"], "status": 429, "headers": {"Retry-After": "0"}})
+            else:
+                responses.append({"id": sub["id"], "status": 202})
+        return web.json_response({"responses": responses})
+
+    app = web.Application()
+    app.router.add_post("/$batch", batch)
+    app.router.add_post("/users/{sender}/sendMail", send_mail)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+@pytest.fixture
+def batch_client(monkeypatch):
+    pool = HTTPSessionPool()
+    monkeypatch.setattr(graph_client, "get_session", pool.get_session)
+    monkeypatch.setattr(graph_client, "enforce_quota", lambda *a, **k: True)
+    monkeypatch.setattr(graph_client, "log_usage", lambda *a, **k: None)
+    monkeypatch.setattr(graph_client, "log_audit_event", lambda *a, **k: None)
+
+    async def fake_get_token(self, force_refresh=False, rejected_token=None):
+        return "token"
+
+    monkeypatch.setattr(graph_client.GraphClient, "_get_token", fake_get_token)
+    return graph_client.GraphClient(), pool
+
+
+def _run(client, pool, monkeypatch, messages, throttled=(), rejected=(), singles=None):
+    batches = []
+
+    async def main():
+        runner, base = await _start_batch_server(batches, set(throttled), set(rejected), singles)
+        monkeypatch.setattr(graph_client, "GRAPH_API_BASE", base)
+        monkeypatch.setattr(graph_client, "GRAPH_BATCH_URL", f"{base}/$batch")
+        try:
+            return await client.send_emails_batch(messages)
+        finally:
+            await pool.close_loop_sessions()
+            await runner.cleanup()
+
+    return asyncio.run(main()), batches
+
+
+def _messages(count):
+    return [
+        {"sender_address": SENDER, "to": f"client{i}@example.com", "subject": "Welcome", "body": "Hello"}
+        for i in range(count)
+    ]
+
+
+def test_messages_are_packed_twenty_per_batch(batch_client, monkeypatch):
+    client, pool = batch_client
+    results, batches = _run(client, pool, monkeypatch, _messages(45))
+
+    assert [len(b) for b in batches] == [20, 20, 5]
+    assert all(r["ok"] and r["status"] == 202 and r["attempts"] == 1 for r in results)
+    assert [r["to"] for r in results] == [m["to"] for m in _messages(45)]
+
+
+def test_only_failed_sub_requests_are_retried(batch_client, monkeypatch):
+    client, pool = batch_client
+    results, batches = _run(
+        client, pool, monkeypatch, _messages(5),
+        throttled={"client1@example.com", "client3@example.com"},
+        rejected={"client4@example.com"},
+    )
+
+    # Throttled items are re-sent alone; the 400 is permanent and not retried
+    assert batches == [["0", "1", "2", "3", "4"], ["1", "3"]]
+    assert [r["ok"] for r in results] == [True, True, True, True, False]
+    assert results[1]["attempts"] == 2
+    assert results[4]["status"] == 400
+    assert results[4]["error"] == "Invalid recipient"
+
+
+def test_invalid_messages_fail_without_being_sent(batch_client, monkeypatch):
+    client, pool = batch_client
+    messages = _messages(2) + [{"sender_address": SENDER, "to": "", "subject": "Welcome", "body": "Hello"}]
+    results, batches = _run(client, pool, monkeypatch, messages)
+
+    assert batches == [["0", "1"]]
+    assert results[2]["ok"] is False and results[2]["attempts"] == 0
+
+
+def test_batches_are_capped_by_payload_size(batch_client, monkeypatch):
+    client, pool = batch_client
+    messages = _messages(6)
+    for message in messages:
+        message["body"] = "x" * 1000
+    monkeypatch.setattr(graph_client, "GRAPH_BATCH_MAX_BYTES", 2500)
+    results, batches = _run(client, pool, monkeypatch, messages)
+
+    assert [len(b) for b in batches] == [2, 2, 2]
+    assert all(r["ok"] for r in results)
+
+
+def test_messages_with_attachments_are_sent_individually(batch_client, monkeypatch):
+    client, pool = batch_client
+    messages = _messages(3)
+    attachment = {"@odata.type": "#microsoft.graph.fileAttachment", "name": "intake.pdf", "contentBytes": "QUJD"}
+    messages[1]["attachments"] = [attachment]
+    singles = []
+    results, batches = _run(client, pool, monkeypatch, messages, singles=singles)
+
+    assert batches == [["0", "2"]]
+    assert singles == ["client1@example.com"]
+    assert all(r["ok"] and r["attempts"] == 1 for r in results)
+
+
+def test_request_errors_fail_only_their_own_items(batch_client, monkeypatch):
+    client, pool = batch_client
+    monkeypatch.setattr(graph_client, "GRAPH_BATCH_MAX_RETRIES", 1)
+    messages = _messages(25)
+    messages[24]["attachments"] = [
+        {"@odata.type": "#microsoft.graph.fileAttachment", "name": "intake.pdf", "contentBytes": "QUJD"}
+    ]
+    post_batch = graph_client.GraphClient._post_batch
+    failures = []
+
+    async def flaky_post_batch(self, indices, requests_by_index, token):
+        # The second chunk's connection drops once
+        if indices[0] == 20 and not failures:
+            failures.append(indices)
+            raise aiohttp.ClientConnectionError("Connection reset")
+        return await post_batch(self, indices, requests_by_index, token)
+
+    async def broken_post_single(self, index, requests_by_index, token):
+        raise ValueError("Malformed response")
+
+    monkeypatch.setattr(graph_client.GraphClient, "_post_batch", flaky_post_batch)
+    monkeypatch.setattr(graph_client.GraphClient, "_post_single", broken_post_single)
+    results, batches = _run(client, pool, monkeypatch, messages)
+
+    # The dropped chunk is retried; the first chunk's accepted sends are kept
+    assert batches == [[str(i) for i in range(20)], ["20", "21", "22", "23"]]
+    assert all(r["ok"] for r in results[:24])
+    assert [r["attempts"] for r in (results[0], results[20])] == [1, 2]
+    assert results[24]["ok"] is False and results[24]["status"] == 0
+    assert results[24]["attempts"] == 1
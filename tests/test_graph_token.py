@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from services import graph_client
+from utils.single_flight import SingleFlight
+
+
+@pytest.fixture
+def token_server(monkeypatch):
+    monkeypatch.setattr(graph_client, "_token_cache", {})
+    monkeypatch.setattr(graph_client, "_token_refresh", SingleFlight(name="graph_token_refresh"))
+    monkeypatch.setattr(graph_client, "_token_metrics", dict.fromkeys(graph_client._token_metrics, 0))
+    issued = []
+
+    async def fake_request_token(self):
+        await asyncio.sleep(0.02)
+        issued.append(f"token-{len(issued) + 1}")
+        return issued[-1], 3600
+
+    monkeypatch.setattr(graph_client.GraphClient, "_request_token", fake_request_token)
+    return issued
+
+
+def test_concurrent_callers_share_one_refresh(token_server):
+    client = graph_client.GraphClient()
+
+    async def main():
+        tokens = await asyncio.gather(*(client._get_token() for _ in range(10)))
+        tokens.append(await graph_client.GraphClient()._get_token())
+        return tokens
+
+    assert set(asyncio.run(main())) == {"token-1"}
+    metrics = graph_client.get_token_metrics()
+    assert metrics["refreshes"] == 1
+    assert metrics["coalesced_refreshes"] == 9
+    assert metrics["cache_hits"] == 1
+
+
+def test_expired_token_is_refreshed_with_margin(token_server, monkeypatch):
+    client = graph_client.GraphClient()
+    now = [1_000_000.0]
+    monkeypatch.setattr(graph_client.time, "time", lambda: now[0])
+
+    assert asyncio.run(client._get_token()) == "token-1"
+    # Inside the expiry margin the cached token is no longer handed out
+    now[0] += 3600 - graph_client.GRAPH_TOKEN_EXPIRY_MARGIN_SECONDS + 1
+    assert asyncio.run(client._get_token()) == "token-2"
+
+
+def test_token_is_refreshed_in_background_before_expiry(token_server, monkeypatch):
+    client = graph_client.GraphClient(background_refresh=True)
+    now = [1_000_000.0]
+    monkeypatch.setattr(graph_client.time, "time", lambda: now[0])
+
+    async def main():
+        await client._get_token()
+        now[0] += 3600 - graph_client.GRAPH_TOKEN_EXPIRY_MARGIN_SECONDS - 10
+        stale = await client._get_token()
+        await client._background_refresh
+        fresh = await client._get_token()
+        return stale, fresh
+
+    assert asyncio.run(main()) == ("token-1", "token-2")
+    assert graph_client.get_token_metrics()["background_refreshes"] == 1
+
+
+def test_short_lived_loops_refresh_ahead_inline(token_server, monkeypatch):
+    client = graph_client.GraphClient(background_refresh=False)
+    now = [1_000_000.0]
+    monkeypatch.setattr(graph_client.time, "time", lambda: now[0])
+
+    assert asyncio.run(client._get_token()) == "token-1"
+    now[0] += 3600 - graph_client.GRAPH_TOKEN_EXPIRY_MARGIN_SECONDS - 10
+    # No task is left behind for asyncio.run to cancel
+    assert asyncio.run(client._get_token()) == "token-2"
+    assert client._background_refresh is None
+    assert not graph_client._background_token_refreshes
+
+
+def test_rejected_token_refreshes_only_once(token_server):
+    client = graph_client.GraphClient()
+
+    async def main():
+        first = await client._get_token()
+        await client._get_token(rejected_token=first)
+        return await client._get_token(rejected_token=first)
+
+    assert asyncio.run(main()) == "token-2"
+    assert graph_client.get_token_metrics()["refreshes"] == 2
@@ -0,0 +1,63 @@
+import asyncio
+from aiohttp import web
+from utils.http_pool import HTTPSessionPool
+from services import neos_client
+
+
+async def _start_stub_server():
+    async def get_case(request):
+        return web.json_response({"caseId": request.match_info["case_id"]})
+
+    app = web.Application()
+    app.router.add_get("/cases/{case_id}", get_case)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_pool_reuses_connections_across_requests(monkeypatch):
+    pool = HTTPSessionPool(limit_per_host=4)
+    monkeypatch.setattr(neos_client, "get_session", pool.get_session)
+    monkeypatch.setattr(neos_client, "enforce_quota", lambda *a, **k: True)
+    monkeypatch.setattr(neos_client, "record_latency_metric", lambda *a, **k: None)
+
+    async def main():
+        runner, base_url = await _start_stub_server()
+        try:
+            client = neos_client.NeosClient()
+            client.base_url = base_url
+            results = await asyncio.gather(*(client.get_case(f"C{i}") for i in range(40)))
+            assert pool.get_session() is pool.get_session()
+        finally:
+            await pool.close_loop_sessions()
+            await runner.cleanup()
+        return results
+
+    results = asyncio.run(main())
+    stats = pool.stats()
+
+    assert [r["caseId"] for r in results] == [f"C{i}" for i in range(40)]
+    assert stats["requests"] == 40
+    assert stats["connections_created"] <= 4
+    assert stats["connections_reused"] >= 36
+    assert stats["in_flight"] == 0
+    assert stats["open_sessions"] == 0
+
+
+def test_pool_keeps_one_session_per_event_loop():
+    pool = HTTPSessionPool()
+
+    async def grab():
+        return pool.get_session()
+
+    first = asyncio.run(grab())
+    second = asyncio.run(grab())
+
+    assert first is not second
+    # The first loop is closed, so its session was dropped from the pool
+    assert pool.stats()["open_sessions"] == 1
+    pool.close_all()
+    assert pool.stats()["open_sessions"] == 0
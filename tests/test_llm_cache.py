@@ -0,0 +1,70 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+from core import llm_cache
+from core.llm_cache import LLMResponseCache, make_cache_key
+from services import openai_client
+
+
+def test_cache_key_is_stable_and_sensitive_to_inputs():
+    key = make_cache_key("gpt-4", "sys", "prompt", 0.4)
+    assert key == make_cache_key("gpt-4", "sys", "prompt", 0.40)
+    assert key != make_cache_key("gpt-4", "sys", "prompt", 0.7)
+    assert key != make_cache_key("gpt-4o", "sys", "prompt", 0.4)
+
+
+def test_cache_is_namespaced_per_tenant(tmp_path):
+    cache = LLMResponseCache(path=str(tmp_path / "cache.db"))
+    cache.set("tenant-a", "k", "answer")
+
+    assert cache.get("tenant-a", "k") == "answer"
+    assert cache.get("tenant-b", "k") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_cache_expires_entries_after_ttl(tmp_path, monkeypatch):
+    cache = LLMResponseCache(path=str(tmp_path / "cache.db"), ttl_seconds=60)
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache.set("t", "k", "answer")
+
+    now[0] += 61
+    assert cache.get("t", "k") is None
+
+
+def test_cache_evicts_least_recently_used_when_over_size(tmp_path, monkeypatch):
+    cache = LLMResponseCache(path=str(tmp_path / "cache.db"), max_bytes=25)
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+
+    for key in ("a", "b"):
+        now[0] += 1
+        cache.set("t", key, "x" * 10)
+    now[0] += 1
+    cache.get("t", "a")  # "b" is now least recently used
+    now[0] += 1
+    cache.set("t", "c", "x" * 10)
+
+    assert cache.get("t", "b") is None
+    assert cache.get("t", "a") and cache.get("t", "c")
+
+
+def test_client_cache_hit_skips_api_and_quota(tmp_path, monkeypatch):
+    client = openai_client.OpenAIClient()
+    client.response_cache = LLMResponseCache(path=str(tmp_path / "cache.db"))
+
+    message = MagicMock()
+    message.message.content = "Negligence is a failure of reasonable care."
+    client.client = MagicMock()
+    raw = MagicMock(headers={})
+    raw.parse.return_value = MagicMock(choices=[message], usage=None)
+    client.client.chat.completions.with_raw_response.create = AsyncMock(return_value=raw)
+    quota_checks = []
+    monkeypatch.setattr(openai_client, "check_quota", lambda *a, **k: quota_checks.append(a) or True)
+
+    first = asyncio.run(client.safe_generate("What is negligence?"))
+    second = asyncio.run(client.safe_generate("What is negligence?"))
+    asyncio.run(client.safe_generate("What is negligence?", bypass_cache=True))
+
+    assert first == second
+    assert client.client.chat.completions.with_raw_response.create.await_count == 2
+    assert len(quota_checks) == 2
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from services import neos_client
+from utils.http_pool import HTTPSessionPool
+
+
+@pytest.fixture
+def neos_env(monkeypatch):
+    pool = HTTPSessionPool()
+    monkeypatch.setattr(neos_client, "get_session", pool.get_session)
+    monkeypatch.setattr(neos_client, "enforce_quota", lambda *a, **k: True)
+    monkeypatch.setattr(neos_client, "record_latency_metric", lambda *a, **k: None)
+    monkeypatch.setattr(neos_client, "NEOS_BULK_RETRY_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(neos_client, "_bulk_endpoint_support", {})
+    return pool
+
+
+def _run(pool, neos_stub, case_ids, bulk_supported, concurrency=4, bulk_error_status=404,
+         bulk_path="/cases/class-code/bulk"):
+    async def main():
+        runner, base_url, state = await neos_stub(bulk_supported, bulk_error_status)
+        try:
+            client = neos_client.NeosClient()
+            client.base_url = base_url
+            client.bulk_concurrency = concurrency
+            client.bulk_update_path = bulk_path
+            results = await client.bulk_update_case_status(case_ids, "Questionnaire Sent")
+            return client, results, state
+        finally:
+            await pool.close_loop_sessions()
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_per_case_updates_are_bounded_and_reported(neos_env, neos_stub):
+    case_ids = [f"C{i}" for i in range(30)] + ["BAD", "FLAKY"]
+    client, results, state = _run(neos_env, neos_stub, case_ids, bulk_supported=False)
+
+    assert state["bulk_calls"] == 1
+    assert state["peak"] <= 4
+    assert set(results) == set(case_ids)
+    assert results["BAD"]["ok"] is False and results["BAD"]["status"] == 400
+    assert results["FLAKY"]["ok"] is True and state["puts"].count("FLAKY") == 2
+    assert state["puts"].count("BAD") == 1
+    assert client.last_bulk_stats["succeeded"] == 31
+    assert client.last_bulk_stats["failed"] == 1
+    assert client.last_bulk_stats["wall_seconds"] > 0
+
+
+def test_bulk_endpoint_is_used_when_supported(neos_env, neos_stub):
+    case_ids = [f"C{i}" for i in range(250)] + ["BAD"]
+    client, results, state = _run(neos_env, neos_stub, case_ids, bulk_supported=True)
+
+    assert state["bulk_calls"] == 3
+    assert state["puts"] == []
+    assert all(r["via"] == "bulk" for r in results.values())
+    assert results["BAD"]["ok"] is False
+    assert client.last_bulk_stats["bulk_endpoint"] is True
+
+
+def test_bulk_endpoint_is_opt_in(neos_env, neos_stub):
+    client, results, state = _run(neos_env, neos_stub, ["C1", "C2"], bulk_supported=True, bulk_path="")
+
+    assert neos_client.NeosClient().bulk_update_path == ""
+    assert state["bulk_calls"] == 0
+    assert sorted(state["puts"]) == ["C1", "C2"]
+    assert all(r["ok"] and r["via"] != "bulk" for r in results.values())
+
+
+def test_rejected_bulk_endpoint_is_not_retried_per_chunk(neos_env, neos_stub):
+    case_ids = [f"C{i}" for i in range(250)]
+    client, results, state = _run(neos_env, neos_stub, case_ids, bulk_supported=False, bulk_error_status=403)
+
+    assert state["bulk_calls"] == 1
+    assert neos_client._bulk_endpoint_support == {client.base_url: False}
+    assert all(r["ok"] for r in results.values())
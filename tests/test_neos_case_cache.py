@@ -0,0 +1,124 @@
+import asyncio
+import pytest
+from services import neos_client
+from utils.http_pool import HTTPSessionPool
+from utils.single_flight import SingleFlight
+from utils.ttl_cache import TTLCache
+
+
+@pytest.fixture
+def neos_env(monkeypatch):
+    pool = HTTPSessionPool()
+    cache = TTLCache(max_entries=100, ttl_seconds=60, stale_seconds=600)
+    monkeypatch.setattr(neos_client, "get_session", pool.get_session)
+    monkeypatch.setattr(neos_client, "enforce_quota", lambda *a, **k: True)
+    monkeypatch.setattr(neos_client, "record_latency_metric", lambda *a, **k: None)
+    monkeypatch.setattr(neos_client, "_case_cache", cache)
+    monkeypatch.setattr(neos_client, "_case_fetches", SingleFlight(name="neos_get_case_test"))
+    return pool, cache
+
+
+def _run(pool, neos_stub, scenario):
+    async def main():
+        runner, base_url, state = await neos_stub()
+        try:
+            client = neos_client.NeosClient()
+            client.base_url = base_url
+            return await scenario(client), state
+        finally:
+            await pool.close_loop_sessions()
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_repeated_lookups_hit_the_cache(neos_env, neos_stub):
+    pool, cache = neos_env
+
+    async def scenario(client):
+        first = await asyncio.gather(*(client.get_case("C1") for _ in range(5)))
+        again = [await client.get_case("C1") for _ in range(5)]
+        return first + again
+
+    results, state = _run(pool, neos_stub, scenario)
+
+    assert state["gets"] == 1
+    assert all(r == {"caseId": "C1", "version": 1} for r in results)
+    stats = cache.stats()
+    assert stats["hits"] == 5
+    assert stats["hit_ratio"] == pytest.approx(0.5)
+
+
+def test_stale_entry_is_served_while_revalidating(neos_env, neos_stub, monkeypatch):
+    pool, cache = neos_env
+    now = [1_000_000.0]
+    monkeypatch.setattr("utils.ttl_cache.time.time", lambda: now[0])
+
+    async def scenario(client):
+        await client.get_case("C1")
+        now[0] += 120
+        stale = await client.get_case("C1")
+        await asyncio.gather(*neos_client._background_refreshes)
+        fresh = await client.get_case("C1")
+        return stale, fresh
+
+    (stale, fresh), state = _run(pool, neos_stub, scenario)
+
+    assert stale["version"] == 1
+    assert fresh["version"] == 2
+    assert state["gets"] == 2
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_status_update_invalidates_cached_case(neos_env, neos_stub):
+    pool, cache = neos_env
+
+    async def scenario(client):
+        await client.get_case("C1")
+        await client.update_case_status("C1", "Questionnaire Sent")
+        return await client.get_case("C1")
+
+    result, state = _run(pool, neos_stub, scenario)
+
+    assert result["version"] == 2
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_fetch_started_before_invalidation_is_not_cached(neos_env, neos_stub):
+    pool, cache = neos_env
+
+    async def scenario(client):
+        in_flight = asyncio.create_task(client.get_case("C1"))
+        await asyncio.sleep(0.005)
+        client.invalidate_case("C1")
+        # Must not join the request that started before the invalidation
+        after = await client.get_case("C1")
+        before = await in_flight
+        return before, after, await client.get_case("C1")
+
+    (before, after, cached), state = _run(pool, neos_stub, scenario)
+
+    assert (before["version"], after["version"], cached["version"]) == (1, 2, 2)
+    assert state["gets"] == 2
+    assert cache.stats()["stale_sets"] == 1
+
+
+def test_set_with_outdated_generation_is_dropped():
+    cache = TTLCache(max_entries=10, ttl_seconds=60)
+    generation = cache.generation("a")
+    cache.invalidate("a")
+
+    assert cache.set("a", "old", generation=generation) is False
+    assert cache.get("a") == (None, None)
+    assert cache.set("a", "new", generation=cache.generation("a")) is True
+    assert cache.get("a") == ("new", "fresh")
+
+
+def test_cache_is_size_bounded():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+
+    assert cache.get("a") == (None, None)
+    assert cache.get("c") == ("c", "fresh")
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,86 @@
+import asyncio
+from unittest.mock import MagicMock
+from core.llm_cache import LLMResponseCache
+from services import openai_client, demand_service
+from utils.rate_limiter import ModelRateLimiter
+from utils.stream_utils import collect_stream
+
+
+def _chunk(content=None, usage=None):
+    choice = MagicMock()
+    choice.delta.content = content
+    return MagicMock(choices=[choice] if content is not None else [], usage=usage)
+
+
+def _streaming_client(monkeypatch, deltas, usage=None):
+    monkeypatch.setattr(openai_client, "check_quota", lambda *a, **k: True)
+    logged = []
+    monkeypatch.setattr(openai_client, "log_usage", lambda **kwargs: logged.append(kwargs))
+
+    async def events():
+        for delta in deltas:
+            yield _chunk(delta)
+        yield _chunk(usage=usage)
+
+    raw = MagicMock(headers={})
+    raw.parse.side_effect = lambda: events()
+    requests = []
+
+    async def create(**kwargs):
+        requests.append(kwargs)
+        return raw
+
+    client = openai_client.OpenAIClient()
+    client.response_cache = None
+    client.rate_limiter = ModelRateLimiter()
+    client.client = MagicMock()
+    client.client.chat.completions.with_raw_response.create = create
+    return client, requests, logged
+
+
+def test_stream_generate_yields_deltas_and_logs_usage(monkeypatch):
+    usage = MagicMock(total_tokens=42, prompt_tokens=30, completion_tokens=12)
+    client, requests, logged = _streaming_client(monkeypatch, ["Duty, ", "breach, ", "harm."], usage)
+
+    async def main():
+        return [delta async for delta in client.stream_generate("Elements of negligence?")]
+
+    assert asyncio.run(main()) == ["Duty, ", "breach, ", "harm."]
+    assert requests[0]["stream"] is True
+    assert logged[0]["amount"] == 42
+
+
+def test_stream_generate_serves_and_fills_cache(monkeypatch, tmp_path):
+    client, requests, _ = _streaming_client(monkeypatch, ["Polished ", "text."])
+    client.response_cache = LLMResponseCache(path=str(tmp_path / "cache.db"))
+
+    async def main():
+        return "".join([delta async for delta in client.stream_generate("Polish this.")])
+
+    assert asyncio.run(main()) == "Polished text."
+    assert asyncio.run(main()) == "Polished text."
+    assert len(requests) == 1
+
+
+def test_collect_stream_reports_progress():
+    async def deltas():
+        for part in ["a", "b", "c"]:
+            yield part
+
+    updates = []
+    text = asyncio.run(collect_stream(deltas(), on_update=updates.append, min_interval=0))
+    assert text == "abc"
+    assert updates[0] == "a" and updates[-1] == "abc"
+
+
+def test_polish_demand_text_streams_when_callback_given(monkeypatch):
+    async def fake_stream(prompt):
+        for part in ["Final ", "letter."]:
+            yield part
+
+    monkeypatch.setattr(demand_service, "stream_generate", fake_stream)
+    updates = []
+    polished = asyncio.run(demand_service.polish_demand_text("Draft letter", on_update=updates.append))
+
+    assert polished == "Final letter."
+    assert updates[-1] == "Final letter."
@@ -11,3 +11,16 @@ def test_build_prompt_includes_safety_notes():
     assert "Use the tone and clarity of a senior litigator." in prompt
     assert "Ban any phrasing that introduces speculation" in prompt
     assert "Every sentence must use active voice." in prompt
+
+
+def test_build_prompt_fits_token_budget(monkeypatch):
+    from prompts import prompt_factory
+    from utils.token_utils import count_tokens
+    monkeypatch.setattr(prompt_factory, "register_prompt", lambda *a, **k: None)
+
+    summary = "Plaintiff slipped on an unmarked wet floor. " * 300
+    prompt = build_prompt("demand", "Facts", summary, "Jane Roe", max_prompt_tokens=2500)
+
+    assert count_tokens(prompt) <= 2500
+    assert "Do not fabricate, assume, or infer any facts not provided." in prompt
+    assert "Plaintiff slipped on an unmarked wet floor." in prompt
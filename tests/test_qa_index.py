@@ -0,0 +1,33 @@
+from core.generators.qa_index import QAIndex, select_candidate_blocks, tokenize
+
+
+def _block(text):
+    return {"text": text, "page_start": 1, "line_start": None, "page_end": 1, "line_end": None}
+
+
+BLOCKS = [
+    _block("Q: What is your name?\nA: Jane Roe."),
+    _block("Q: Was there a warning sign near the spill?\nA: No, there was no sign and no caution cone."),
+    _block("Q: How is your back now?\nA: The pain is daily and I missed work for surgery."),
+    _block("Q: Did the store inspect the aisle?\nA: Nobody inspected it, the supervisor knew about the spill."),
+    _block("Q: Where do you live?\nA: Chicago."),
+]
+
+
+def test_tokenize_stems_and_drops_stopwords():
+    assert tokenize("The warnings were warned") == ["warn", "warn"]
+
+
+def test_bm25_ranks_relevant_blocks_first():
+    index = QAIndex(BLOCKS)
+    scores = index.score(tokenize("spill sign inspect"))
+
+    assert set(scores) == {1, 3}
+    assert index.top_n(tokenize("spill sign inspect"), 1) == [1]
+
+
+def test_select_candidate_blocks_per_category_in_transcript_order():
+    candidates = select_candidate_blocks(BLOCKS, ["Liability", "Damages"], top_n=2)
+
+    assert candidates["Liability"] == [BLOCKS[1], BLOCKS[3]]
+    assert candidates["Damages"] == [BLOCKS[2]]
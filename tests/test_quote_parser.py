@@ -0,0 +1,114 @@
+import asyncio
+from core.generators import quote_parser
+
+
+def test_generate_quotes_concurrent_merges_in_chunk_order(monkeypatch):
+    async def fake_generate(prompt, system_msg=None):
+        index = int(prompt.split("CHUNK-")[1].split()[0])
+        await asyncio.sleep(0.01 * (5 - index))  # later chunks finish first
+        return f'Category: Liability\n"Q: chunk {index}? A: Yes."'
+
+    monkeypatch.setattr(quote_parser.openai, "safe_generate", fake_generate)
+    progress = []
+    chunks = [f"CHUNK-{i} Q: ... A: ..." for i in range(5)]
+
+    result = quote_parser.generate_quotes_in_chunks(
+        chunks, ["Liability"], max_concurrency=5,
+        progress_callback=lambda done, total: progress.append((done, total)),
+    )
+
+    quotes = result["liability_quotes"].split("\n\n")
+    assert quotes == [f"Q: chunk {i}? A: Yes." for i in range(5)]
+    assert progress[-1] == (5, 5)
+
+
+def test_generate_quotes_retries_timed_out_chunk(monkeypatch):
+    calls = {"n": 0}
+
+    async def flaky_generate(prompt, system_msg=None):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            await asyncio.sleep(1)
+        return 'Category: Damages\n"Q: Pain? A: Daily."'
+
+    monkeypatch.setattr(quote_parser.openai, "safe_generate", flaky_generate)
+    monkeypatch.setattr(quote_parser.asyncio, "sleep", _no_wait(asyncio.sleep))
+
+    result = asyncio.run(quote_parser.generate_quotes_in_chunks_async(
+        ["Q: Pain? A: Daily."], ["Damages"], timeout=0.05, retries=2
+    ))
+
+    assert calls["n"] == 2
+    assert result["damages_quotes"] == "Q: Pain? A: Daily."
+
+
+def _no_wait(real_sleep):
+    async def sleep(seconds):
+        # Keep the fake API's slow first attempt, skip retry backoff
+        await real_sleep(seconds if seconds < 2 else 0)
+    return sleep
+
+
+SAMPLE_DEPO = """Page 12
+1 Q: Where were you standing
+2 when the shelf fell?
+3 A: Near the register.
+4 Q: Did anyone warn you?
+5 A: No. Nobody said
+6 anything to me.
+1 Q: Were you hurt?
+2 A: My back has hurt every day since.
+"""
+
+
+def test_parse_qa_blocks_tracks_page_and_line_provenance():
+    lines = quote_parser.normalize_deposition_lines(SAMPLE_DEPO)
+    blocks = quote_parser.parse_qa_blocks(lines)
+
+    assert [b["text"] for b in blocks] == [
+        "Q: Where were you standing when the shelf fell?\nA: Near the register.",
+        "Q: Did anyone warn you?\nA: No. Nobody said anything to me.",
+        "Q: Were you hurt?\nA: My back has hurt every day since.",
+    ]
+    assert quote_parser.format_provenance(blocks[1]) == "[12:4-6]"
+    assert quote_parser.format_provenance(blocks[2]) == "[13:1-2]"
+    assert quote_parser.merge_multiline_qas(lines) == "\n\n".join(b["text"] for b in blocks)
+
+
+def test_chunk_qa_blocks_never_splits_pairs_and_overlaps():
+    blocks = [
+        {"text": f"Q: Question {i}?\nA: " + "answer " * 40, "page_start": 1,
+         "line_start": i, "page_end": 1, "line_end": i}
+        for i in range(1, 11)
+    ]
+    chunks = quote_parser.chunk_qa_blocks(blocks, max_tokens=200, overlap_blocks=1)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        for block in chunk["blocks"]:
+            assert block["text"] in chunk["text"]
+    for previous, following in zip(chunks, chunks[1:]):
+        assert following["blocks"][0] is previous["blocks"][-1]
+    covered = {b["line_start"] for chunk in chunks for b in chunk["blocks"]}
+    assert covered == set(range(1, 11))
+
+
+def test_generate_category_quotes_asks_each_chunk_only_its_category(monkeypatch):
+    prompts = []
+
+    async def fake_generate(prompt, system_msg=None):
+        prompts.append(prompt)
+        return 'Category: Liability\n"Q: Sign? A: None."\nCategory: Damages\n"Q: Pain? A: Daily."'
+
+    monkeypatch.setattr(quote_parser.openai, "safe_generate", fake_generate)
+    result = asyncio.run(quote_parser.generate_category_quotes_async(
+        {"Liability": ["Q: Sign? A: None."], "Damages": ["Q: Pain? A: Daily."], "Facts": []}
+    ))
+
+    assert len(prompts) == 2
+    assert "from this list: Liability\n" in prompts[0]
+    assert result == {
+        "liability_quotes": "Q: Sign? A: None.",
+        "damages_quotes": "Q: Pain? A: Daily.",
+        "facts_quotes": "",
+    }
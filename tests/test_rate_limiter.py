@@ -0,0 +1,86 @@
+import asyncio
+from unittest.mock import MagicMock
+from openai import RateLimitError
+from utils import rate_limiter
+from utils.rate_limiter import ModelRateLimiter, parse_reset_duration
+from services import openai_client
+
+
+def test_parse_reset_duration_formats():
+    assert parse_reset_duration("1s") == 1
+    assert parse_reset_duration("6m0s") == 360
+    assert abs(parse_reset_duration("20ms") - 0.02) < 1e-9
+    assert parse_reset_duration("2") == 2
+    assert parse_reset_duration(None) == 0
+
+
+def test_acquire_queues_when_token_budget_is_spent(monkeypatch):
+    limiter = ModelRateLimiter(rpm=1000, tpm=600)
+    now = [100.0]
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", fake_sleep)
+
+    async def main():
+        await limiter.acquire("gpt-4", 600)
+        await limiter.acquire("gpt-4", 300)
+
+    asyncio.run(main())
+    # 600 TPM refills 10 tokens/s, so 300 tokens take 30s
+    assert abs(sum(sleeps) - 30) < 1e-6
+    assert limiter.stats()["waits"] == 1
+
+
+def test_headers_adapt_limits_and_remaining_budget():
+    limiter = ModelRateLimiter()
+    limiter.update_from_headers("gpt-4o", {
+        "x-ratelimit-limit-requests": "10000",
+        "x-ratelimit-limit-tokens": "2000000",
+        "x-ratelimit-remaining-requests": "9999",
+        "x-ratelimit-remaining-tokens": "1500",
+    })
+
+    model = limiter.stats()["models"]["gpt-4o"]
+    assert model["rpm_limit"] == 10000
+    assert model["tpm_limit"] == 2000000
+    assert model["tokens_available"] <= 1500
+
+
+def test_client_requeues_after_429(monkeypatch):
+    monkeypatch.setattr(openai_client, "check_quota", lambda *a, **k: True)
+    client = openai_client.OpenAIClient()
+    client.response_cache = None
+    client.rate_limiter = ModelRateLimiter()
+    pauses = []
+    monkeypatch.setattr(client.rate_limiter, "penalize", lambda model, seconds: pauses.append(seconds))
+
+    too_many = RateLimitError(
+        "rate limited",
+        response=MagicMock(status_code=429, headers={"retry-after-ms": "250"}),
+        body=None,
+    )
+    message = MagicMock()
+    message.message.content = "Ok."
+    raw = MagicMock(headers={"x-ratelimit-limit-requests": "60"})
+    raw.parse.return_value = MagicMock(choices=[message], usage=None)
+
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise too_many
+        return raw
+
+    client.client = MagicMock()
+    client.client.chat.completions.with_raw_response.create = create
+
+    assert asyncio.run(client.safe_generate("Summarize the deposition.")) == "Ok."
+    assert len(calls) == 2
+    assert pauses == [0.25]
+    assert client.get_rate_limit_stats()["models"][client.model]["rpm_limit"] == 60
@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+from utils.section_scheduler import run_section_graph
+
+
+def test_section_graph_respects_dependencies():
+    order = []
+
+    def node(name):
+        async def builder(results):
+            await asyncio.sleep(0.01)
+            order.append(name)
+            return name.upper()
+        return builder
+
+    sections = {
+        "a": ([], node("a")),
+        "b": ([], node("b")),
+        "summary": (["a", "b"], node("summary")),
+    }
+    results, timings = asyncio.run(run_section_graph(sections, max_concurrency=2))
+
+    assert results == {"a": "A", "b": "B", "summary": "SUMMARY"}
+    assert order[-1] == "summary"
+    assert set(timings) == {"a", "b", "summary"}
+
+
+def test_section_graph_caps_concurrency():
+    running = {"now": 0, "peak": 0}
+
+    async def builder(results):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return ""
+
+    sections = {f"s{i}": ([], builder) for i in range(8)}
+    asyncio.run(run_section_graph(sections, max_concurrency=3))
+
+    assert running["peak"] == 3
+
+
+def test_section_graph_rejects_cycles():
+    async def builder(results):
+        return ""
+
+    sections = {"a": (["b"], builder), "b": (["a"], builder)}
+    with pytest.raises(ValueError):
+        asyncio.run(run_section_graph(sections))
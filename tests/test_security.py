@@ -63,3 +63,23 @@ def test_mask_phi_fields():
     sample = "client: John Doe, email: test@example.com"
     masked = mask_phi(sample)
     assert "[REDACTED]" in masked
+
+
+def test_sanitize_dataframe_matches_sanitize_text_per_cell():
+    from core.security import sanitize_dataframe
+    df = pd.DataFrame({
+        "Case Type": pd.Categorical(["Auto", "<b>Slip</b> & Fall", None, "Auto"]),
+        "Notes": ["O'Brien \"quoted\" ", 1, True, None],
+        "Amount": [0.0, -0.0, 1.5, float("nan")],
+    })
+    expected = {col: [sanitize_text(str(x)) for x in df[col].tolist()] for col in df.columns}
+    cleaned = sanitize_dataframe(df)
+    assert {col: cleaned[col].tolist() for col in cleaned.columns} == expected
+    assert list(cleaned.index) == list(df.index)
+
+
+def test_sanitize_series_keeps_values_that_differ_after_nul():
+    from core.security import sanitize_series
+    values = ["", "\x00>", " (", " (\x00x", "a\x00<b>", "a\x00<i>"] * 2
+    cleaned = sanitize_series(pd.Series(values, dtype=object))
+    assert cleaned.tolist() == [sanitize_text(v) for v in values]
@@ -36,4 +36,18 @@ def test_generate_memo_fields_missing_template():
     with pytest.raises(Exception):
         memo_service.generate_memo_from_fields(
             data={}, template_path="missing.docx", output_dir="."
-        )
\ No newline at end of file
+        )
+
+def test_draft_memo_sections_keeps_memo_structure():
+    data = {
+        "plaintiff1": "Jane Roe",
+        "defendant1": "Acme Corp",
+        "complaint_narrative": "Plaintiff slipped on an unmarked wet floor.",
+        "liability_quotes": "Q: Was there a sign? A: No.",
+    }
+    memo_data, timings = asyncio.run(memo_service.draft_memo_sections(data, test_mode=True))
+
+    assert list(memo_data.keys()) == memo_service.MEMO_SECTION_ORDER
+    assert memo_data["Plaintiff_1"] and memo_data["Defendant_1"]
+    assert memo_data["Plaintiff_2"] == "" and memo_data["Defendant_7"] == ""
+    assert "Parties" in timings and "liability_quotes" in timings
@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from utils.single_flight import SingleFlight
+from services import openai_client
+
+
+def test_concurrent_calls_with_same_key_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return value * 2
+
+    async def main():
+        return await asyncio.gather(
+            flight.do("k", work, 21),
+            flight.do("k", work, 21),
+            flight.do("other", work, 5),
+        )
+
+    assert asyncio.run(main()) == [42, 42, 10]
+    assert calls == [21, 5]
+    assert flight.stats()["coalesced"] == 1
+    assert flight.stats()["executed"] == 2
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_followers_receive_leader_exception():
+    flight = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("api down")
+
+    async def main():
+        return await asyncio.gather(flight.do("k", boom), flight.do("k", boom), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    # The key is released so a later call runs again
+    with pytest.raises(RuntimeError):
+        asyncio.run(flight.do("k", boom))
+    assert flight.stats()["executed"] == 2
+
+
+def test_client_coalesces_identical_in_flight_prompts(monkeypatch):
+    monkeypatch.setattr(openai_client, "_inflight_requests", SingleFlight())
+    monkeypatch.setattr(openai_client, "check_quota", lambda *a, **k: True)
+    client = openai_client.OpenAIClient()
+    client.response_cache = None
+
+    message = MagicMock()
+    message.message.content = "Duty, breach, causation, damages."
+
+    async def slow_create(**kwargs):
+        await asyncio.sleep(0.05)
+        raw = MagicMock(headers={})
+        raw.parse.return_value = MagicMock(choices=[message], usage=None)
+        return raw
+
+    create = MagicMock(side_effect=slow_create)
+    client.client = MagicMock()
+    client.client.chat.completions.with_raw_response.create = create
+
+    async def main():
+        return await asyncio.gather(
+            client.safe_generate("Elements of negligence?"),
+            client.safe_generate("Elements of negligence?"),
+            client.safe_generate("Elements of negligence?", temperature=0.9),
+        )
+
+    results = asyncio.run(main())
+    assert results[0] == results[1] == "Duty, breach, causation, damages."
+    assert create.call_count == 2
+    assert client.get_coalescing_stats()["coalesced"] == 1
+
+
+def test_cancelled_leader_does_not_fail_followers():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def main():
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "ok"
+    # The follower re-ran the call instead of inheriting the cancellation
+    assert len(calls) == 2
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_follower_does_not_cancel_the_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def main():
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        other = asyncio.create_task(flight.do("k", work))
+        # A caller that gives up early, like a wait_for timeout
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(flight.do("k", work), timeout=0.01)
+        return await leader, await other
+
+    assert asyncio.run(main()) == ("ok", "ok")
+    assert len(calls) == 1
+    assert flight.stats()["in_flight"] == 0
@@ -1,6 +1,6 @@
 import os
 import pytest
-from email_automation.utils.template_engine import merge_template
+from email_automation.utils.template_engine import merge_template, get_template_cache_stats
 from core.usage_tracker import check_quota, get_usage_summary
 
 def test_merge_template_basic():
@@ -21,4 +21,29 @@ def test_merge_template_basic():
 def test_quota_enforcement(monkeypatch):
     monkeypatch.setattr("core.usage_tracker.get_usage_summary", lambda tenant_id, user_id: {"openai_tokens": 0})
     with pytest.raises(Exception):
-        check_quota("openai_tokens")
\ No newline at end of file
+        check_quota("openai_tokens")
+
+def test_merge_template_parses_once_until_file_changes(tmp_path):
+    template_path = tmp_path / "welcome.txt"
+    template_path.write_text("Subject: Hi {{name}}\nBody:\nDear {{name}}, case {{ID}} {{Unknown}}.", encoding="utf-8")
+    before = get_template_cache_stats()
+
+    rows = [merge_template(str(template_path), {"name": f"Client {i}", "ID": i}) for i in range(3)]
+
+    assert rows[2] == ("Hi Client 2", "Dear Client 2, case 2 {{Unknown}}.", [])
+    stats = get_template_cache_stats()
+    assert stats["misses"] - before["misses"] == 1
+    assert stats["hits"] - before["hits"] == 2
+
+    template_path.write_text("Subject: Hello {{name}}\nBody:\nBye {{name}}", encoding="utf-8")
+    os.utime(template_path, ns=(1, 1))
+    assert merge_template(str(template_path), {"name": "Jane"})[:2] == ("Hello Jane", "Bye Jane")
+
+
+def test_replacement_values_are_not_reinterpreted_as_placeholders(tmp_path):
+    template_path = tmp_path / "welcome.txt"
+    template_path.write_text("Subject: {{a}}\nBody:\n{{a}} {{b}}", encoding="utf-8")
+
+    subject, body, cc = merge_template(str(template_path), {"a": "{{b}}", "b": "x", "ReferringAttorneyEmail": "ra@x.com"})
+    assert body == "{{b}} x"
+    assert cc == ["ra@x.com"]
@@ -0,0 +1,72 @@
+from utils import token_utils
+from utils.token_utils import count_tokens, trim_to_token_limit, plan_prompt_budget, fit_prompt_parts
+
+TEXT = (
+    "The defendant failed to warn customers. She slipped on the wet floor!\n\n"
+    "Her damages are described in detail below. Medical bills exceed $40,000."
+)
+
+
+def test_count_tokens_uses_estimator_without_encoder(monkeypatch):
+    monkeypatch.setattr(token_utils, "get_encoder", lambda model=None: None)
+    token_utils.clear_token_count_cache()
+
+    assert count_tokens("") == 0
+    assert count_tokens("The wet floor.") == 4
+    # Long words cost more than one token
+    assert count_tokens("hospitalization") > count_tokens("floor")
+    token_utils.clear_token_count_cache()
+
+
+def test_trim_cuts_at_sentence_and_paragraph_boundaries():
+    assert trim_to_token_limit(TEXT, 10_000) == TEXT
+
+    first_paragraph = TEXT.split("\n\n")[0]
+    trimmed = trim_to_token_limit(TEXT, count_tokens(first_paragraph) + 2)
+    assert trimmed == first_paragraph
+
+    one_sentence = trim_to_token_limit(TEXT, count_tokens("The defendant failed to warn customers.") + 1)
+    assert one_sentence == "The defendant failed to warn customers."
+
+
+def test_trim_never_exceeds_limit():
+    for limit in (1, 3, 7, 15, 25):
+        assert count_tokens(trim_to_token_limit(TEXT * 3, limit)) <= limit
+
+
+def test_budget_keeps_fixed_parts_and_water_fills_the_rest():
+    parts = {"safety": "word " * 100, "facts": "fact " * 500, "example": "style " * 50}
+    allocation = plan_prompt_budget(parts, 400, fixed=("safety",), weights={"facts": 2})
+
+    assert allocation["safety"] == count_tokens(parts["safety"])
+    assert allocation["example"] == count_tokens(parts["example"])
+    assert allocation["facts"] == 400 - allocation["safety"] - allocation["example"]
+
+    fitted = fit_prompt_parts(parts, 400, fixed=("safety",), weights={"facts": 2})
+    assert fitted["safety"] == parts["safety"]
+    assert sum(count_tokens(text) for text in fitted.values()) <= 400
+
+
+def test_count_tokens_and_trim_use_bpe_encoder(monkeypatch):
+    import pytest
+    tiktoken = pytest.importorskip("tiktoken")
+
+    # A tiny byte-level BPE built in-process, so the test doesn't need the downloaded encoding files
+    ranks = {bytes([i]): i for i in range(256)}
+    for merge in (b"th", b"he", b"the", b"in", b"er"):
+        ranks[merge] = len(ranks)
+    encoder = tiktoken.Encoding(
+        name="test_bpe", pat_str=r"\s?\w+|\s+|[^\w\s]+", mergeable_ranks=ranks, special_tokens={}
+    )
+    monkeypatch.setattr(token_utils, "get_encoder", lambda model=None: encoder)
+    token_utils.clear_token_count_cache()
+
+    text = "the theater"
+    assert count_tokens(text) == len(encoder.encode(text))
+    assert count_tokens(text) < len(text)
+
+    long_text = "therein " * 400
+    trimmed = trim_to_token_limit(long_text, 37)
+    assert len(encoder.encode(trimmed)) <= 37
+    assert long_text.startswith(trimmed)
+    token_utils.clear_token_count_cache()
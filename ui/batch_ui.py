@@ -6,8 +6,7 @@ import json
 from datetime import datetime
 from io import BytesIO
 
-from utils.docx_utils import replace_text_in_docx_all
-from core.session_utils import get_session_temp_dir
+from utils.docx_utils import load_docx_template
 from utils.file_utils import clean_temp_dir
 from core.security import sanitize_text, redact_log, mask_phi
 from utils.file_utils import sanitize_filename
@@ -189,9 +188,10 @@ def run_ui():
                 if st.button("⚙️ Generate Documents"):
                     with st.spinner("Generating documents..."):
                         try:
-                            temp_dir = get_session_temp_dir()
                             zip_buffer = BytesIO()
                             total_success, total_fail = 0, 0
+                            # Parse each template once, not once per row
+                            compiled_templates = {path: load_docx_template(path) for path in template_paths}
 
                             with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_out:
                                 for i, row in df.iterrows():
@@ -213,12 +213,10 @@ def run_ui():
                                                 output_filename = output_filename.replace(f"{{{{{key}}}}}", val.strip())
                                             output_filename = sanitize_filename(output_filename.replace(".docx", "") + ".docx")
 
-                                            output_path = os.path.join(temp_dir, f"{folder_name}_{output_filename}")
-                                            replace_text_in_docx_all(template_path, replacements, output_path)
-
                                             zip_entry_path = os.path.join(folder_name, output_filename)
-                                            with open(output_path, "rb") as f:
-                                                zip_out.writestr(zip_entry_path, f.read())
+                                            zip_out.writestr(zip_entry_path, compiled_templates[template_path].render(
+                                                replacements, audit_name=zip_entry_path
+                                            ))
 
                                             total_success += 1
                                     except Exception as doc_err:
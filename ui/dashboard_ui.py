@@ -1,8 +1,9 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from services.dropbox_client import DropboxClient
-from core.security import sanitize_text, redact_log, mask_phi
+from services.dropbox_client import get_dropbox_client
+from services.dashboard_query import get_query_engine
+from core.security import sanitize_dataframe, redact_log, mask_phi
 from utils.file_utils import clean_temp_dir
 from core.error_handling import handle_error
 from logger import logger
@@ -10,12 +11,11 @@ import time
 
 clean_temp_dir()
 
-@st.cache_data(ttl=300)
 def load_dashboard_data():
     """
-    Download the dashboard data from Dropbox.
+    Load the dashboard data from its Dropbox-rev-validated columnar snapshot.
     """
-    client = DropboxClient()
+    client = get_dropbox_client()
     return client.download_dashboard_df()
 
 
@@ -61,24 +61,20 @@ def run_ui():
             if col not in df.columns:
                 df[col] = ""
 
-        # Sidebar filters
+        # Sidebar filters, answered from per-snapshot indexes
+        engine = get_query_engine(df)
         st.sidebar.header("🔍 Base Filters")
-        campaign_filter = st.sidebar.multiselect("📁 Campaign", sorted(df[CAMPAIGN_COL].dropna().unique()))
-        referring_filter = st.sidebar.multiselect("👤 Referring Attorney", sorted(df[REFERRAL_COL].dropna().unique()))
-        status_filter = st.sidebar.multiselect("📌 Case Status", sorted(df[STATUS_COL].dropna().unique()))
-
-        filtered_df = df.copy()
-        if campaign_filter:
-            filtered_df = filtered_df[filtered_df[CAMPAIGN_COL].isin(campaign_filter)]
-        if referring_filter:
-            filtered_df = filtered_df[filtered_df[REFERRAL_COL].isin(referring_filter)]
-        if status_filter:
-            filtered_df = filtered_df[filtered_df[STATUS_COL].isin(status_filter)]
+        filters = {
+            CAMPAIGN_COL: st.sidebar.multiselect("📁 Campaign", engine.options(CAMPAIGN_COL)),
+            REFERRAL_COL: st.sidebar.multiselect("👤 Referring Attorney", engine.options(REFERRAL_COL)),
+            STATUS_COL: st.sidebar.multiselect("📌 Case Status", engine.options(STATUS_COL)),
+        }
+        filter_start = time.perf_counter()
 
         # Status overview chart
         st.subheader("📌 Case Status Overview")
-        if STATUS_COL in filtered_df.columns:
-            status_counts = filtered_df[STATUS_COL].value_counts().reset_index()
+        if STATUS_COL in df.columns:
+            status_counts = engine.value_counts(STATUS_COL, filters).reset_index()
             status_counts.columns = ["Case Status", "Count"]
             st.plotly_chart(
                 px.bar(status_counts, x="Case Status", y="Count", text="Count"),
@@ -87,8 +83,8 @@ def run_ui():
 
         # Referring attorney chart
         st.subheader("👤 Referring Attorney Overview")
-        if REFERRAL_COL in filtered_df.columns:
-            referral_counts = filtered_df[REFERRAL_COL].value_counts().reset_index()
+        if REFERRAL_COL in df.columns:
+            referral_counts = engine.value_counts(REFERRAL_COL, filters).reset_index()
             referral_counts.columns = ["Referring Attorney", "Count"]
             st.plotly_chart(
                 px.bar(referral_counts, x="Referring Attorney", y="Count", text="Count"),
@@ -113,17 +109,21 @@ def run_ui():
             ]
             selected_display_cols = st.multiselect("📌 Choose columns to ADD to the table", candidate_cols)
 
+            text_filters = {}
             for col in selected_display_cols:
                 optional_display_cols.append(col)
-                if 1 < df[col].nunique() < 50:
-                    try:
-                        vals = df[col].dropna().astype(str).unique().tolist()
-                        selected_vals = st.multiselect(f"Filter values for {col}", sorted(vals), key=col)
+                try:
+                    vals = engine.options(col, as_text=True)
+                    if 1 < len(vals) < 50:
+                        selected_vals = st.multiselect(f"Filter values for {col}", vals, key=col)
                         if selected_vals:
-                            filtered_df = filtered_df[filtered_df[col].astype(str).isin(selected_vals)]
+                            text_filters[col] = selected_vals
                             optional_filtered_cols.append(col)
-                    except Exception as e:
-                        logger.warning(redact_log(mask_phi(f"⚠️ Could not filter column {col}: {e}")))
+                except Exception as e:
+                    logger.warning(redact_log(mask_phi(f"⚠️ Could not filter column {col}: {e}")))
+
+        filtered_df = engine.frame(filters, text_filters)
+        logger.debug(f"[METRICS] Dashboard filters applied in {(time.perf_counter() - filter_start) * 1000:.1f}ms")
 
         # Case table
         st.subheader(f"📋 Case Table ({len(filtered_df)} records)")
@@ -139,9 +139,7 @@ def run_ui():
         ]
 
         all_display_cols = [col for col in base_display_cols if col in filtered_df.columns] + optional_display_cols
-        clean_df = filtered_df[all_display_cols].copy()
-        for col in clean_df.columns:
-            clean_df[col] = clean_df[col].apply(lambda x: sanitize_text(str(x)))
+        clean_df = sanitize_dataframe(filtered_df[all_display_cols])
 
         st.dataframe(clean_df.reset_index(drop=True), use_container_width=True)
 
@@ -7,7 +7,7 @@ from datetime import datetime
 from core.session_utils import get_session_temp_dir
 from core.security import sanitize_text, sanitize_filename, redact_log, mask_phi
 from services.demand_service import generate_demand_letter
-from services.dropbox_client import DropboxClient
+from services.dropbox_client import get_dropbox_client
 from core.constants import DROPBOX_TEMPLATES_ROOT
 from core.usage_tracker import log_usage, check_quota, decrement_quota
 from core.auth import get_user_id, get_tenant_id
@@ -22,7 +22,7 @@ from utils.thread_utils import run_async  # To safely handle async tasks
 clean_temp_dir()
 
 # Dropbox client setup
-client = DropboxClient()
+client = get_dropbox_client()
 
 tenant_id = get_tenant_id()
 user_id = get_user_id()
@@ -112,6 +112,7 @@ def run_ui():
                     dropbox_path,
                     mode=client.dbx.files.WriteMode.overwrite
                 )
+                client.invalidate_listing(dropbox_path)
                 st.success(f"✅ Uploaded template: {template_filename}")
 
                 clear_caches()
@@ -203,6 +204,9 @@ def run_ui():
 
                     clear_caches()
 
+                    # Live preview of the polished letter while it streams in
+                    polish_preview = st.empty()
+
                     # Run async generation using thread helper
                     paths = run_async(
                         generate_demand_letter,
@@ -214,8 +218,10 @@ def run_ui():
                         damages=damages,
                         template_path=template_path,
                         output_path=os.path.join(temp_dir, "temp.docx"),
-                        example_text=example_text
+                        example_text=example_text,
+                        on_polish_update=lambda text: polish_preview.markdown(f"✨ **Polishing...**\n\n{text}")
                     )
+                    polish_preview.empty()
 
                     st.session_state.demand_cache[form_key] = paths
 
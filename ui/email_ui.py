@@ -2,10 +2,12 @@ import streamlit as st
 import pandas as pd
 import os
 import asyncio
+import uuid
 from datetime import datetime
 
-from services.email_service import build_email, send_email_and_update
+from services.email_service import build_email, send_email_and_update, send_bulk_emails
 from services.dropbox_client import download_dashboard_df, download_template_file
+from email_automation.utils.email_log import get_email_log_store, legacy_log_paths
 from core.security import redact_log, mask_phi
 from core.usage_tracker import log_usage, check_quota, get_usage_summary
 from core.auth import get_user_id, get_tenant_id, get_tenant_branding
@@ -13,6 +15,7 @@ from core.audit import log_audit_event
 from core.error_handling import handle_error, AppError
 from logger import logger
 from utils.file_utils import clean_temp_dir
+from utils.http_pool import run_pooled
 from core.db import get_templates
 
 clean_temp_dir()
@@ -163,6 +166,8 @@ def run_ui():
     if st.button("🔍 Preview Emails"):
         st.session_state.email_previews = []
         st.session_state.email_status = {}
+        # One bulk run per set of previews; sending them again resumes that run only
+        st.session_state.email_run_id = f"{selected_template_name}:{uuid.uuid4().hex}"
 
         for i, (_, row) in enumerate(
             filtered_df[filtered_df[NAME_COLUMN].isin(selected_clients)].iterrows()
@@ -205,7 +210,7 @@ def run_ui():
                         check_quota(tenant_id, get_user_id(), "emails_sent", 1)
                         cc_list = [email.strip() for email in st.session_state[cc_key].split(",") if email.strip()]
                         with st.spinner(f"📧 Sending email to {sanitized['name']}..."):
-                            status = asyncio.run(
+                            status = run_pooled(
                                 send_email_and_update(row_data, subject, body, cc_list, template_path, attachments)
                             )
                             st.session_state.email_status[status_key] = status
@@ -249,68 +254,70 @@ def run_ui():
     if st.session_state.email_previews and st.button("📤 Send All"):
         with st.spinner("📤 Sending all emails..."):
 
-            async def send_all():
-                tasks = []
-                for preview in st.session_state.email_previews:
-                    if "✅" in st.session_state.email_status.get(preview["status_key"], ""):
-                        continue
-
-                    client = preview["client"]
-                    subject = st.session_state.get(preview["subject_key"], "")
-                    body = st.session_state.get(preview["body_key"], "")
-                    cc_list = [
-                        email.strip()
-                        for email in st.session_state.get(preview["cc_key"], "").split(",")
-                        if email.strip()
-                    ]
-
-                    async def send_one(preview_item, client_data, subj, bod, cc_list):
-                        try:
-                            check_quota(tenant_id, get_user_id(), "emails_sent", 1)
-                            status = await send_email_and_update(
-                                client_data, subj, bod, cc_list, template_path, attachments
-                            )
-                            st.session_state.email_status[preview_item["status_key"]] = status
+            pending = []
+            items = []
+            for preview in st.session_state.email_previews:
+                if "✅" in st.session_state.email_status.get(preview["status_key"], ""):
+                    continue
 
-                            log_usage(
-                                "emails_sent",
-                                tenant_id,
-                                get_user_id(),
-                                1,
-                                {"template_path": template_path},
-                            )
+                subject = st.session_state.get(preview["subject_key"], "")
+                body = st.session_state.get(preview["body_key"], "")
+                cc_list = [
+                    email.strip()
+                    for email in st.session_state.get(preview["cc_key"], "").split(",")
+                    if email.strip()
+                ]
+                pending.append(preview)
+                items.append((preview["client"], subject, body, cc_list))
+
+            if items:
+                try:
+                    # Up to 20 emails per Graph $batch request; only failed sends are retried
+                    run_id = st.session_state.get("email_run_id")
+                    statuses = run_pooled(send_bulk_emails(items, template_path, attachments,
+                                                           resume=bool(run_id), run_id=run_id))
+                    for preview_item, status in zip(pending, statuses):
+                        st.session_state.email_status[preview_item["status_key"]] = status
+                        # Rows skipped by resume were audited when that run sent them
+                        if status == "✅ Sent":
                             log_audit_event(
                                 "Batch Email Sent",
                                 {
-                                    "client_name": client_data.get("Client Name", "Unknown"),
+                                    "client_name": preview_item["client"].get("Client Name", "Unknown"),
                                     "template_path": template_path,
                                     "tenant_id": tenant_id,
                                 },
                             )
-                        except Exception as e:
-                            err_msg = handle_error(e, code="EMAIL_UI_004")
-                            st.session_state.email_status[preview_item["status_key"]] = err_msg
-
-                    tasks.append(send_one(preview, client, subject, body, cc_list))
-
-                if tasks:
-                    await asyncio.gather(*tasks)
-
-            asyncio.run(send_all())
+                except Exception as e:
+                    err_msg = handle_error(e, code="EMAIL_UI_004")
+                    for preview_item in pending:
+                        st.session_state.email_status[preview_item["status_key"]] = err_msg
 
     # Export Logs
-    log_dir = os.path.join("email_automation", "logs")
-    csv_path = os.path.join(log_dir, f"{tenant_id}_sent_email_log.csv")
-    json_path = os.path.join(log_dir, f"{tenant_id}_sent_email_log.json")
+    csv_path, json_path = legacy_log_paths(tenant_id)
+    log_store = get_email_log_store()
 
     st.markdown("### 📂 Email Log Export")
-    if os.path.exists(csv_path):
-        with open(csv_path, "rb") as f:
+    log_count = log_store.count(tenant_id)
+    if log_count:
+        # Exports read the whole log, so build them on request and reuse them until new rows arrive
+        export_key = (tenant_id, log_count)
+        prepared = st.session_state.get("email_log_export")
+        if not prepared or prepared["key"] != export_key:
+            if st.button(f"📦 Prepare Email Log Export ({log_count} entries)"):
+                prepared = st.session_state.email_log_export = {
+                    "key": export_key,
+                    "csv": log_store.export(tenant_id, "csv"),
+                    "json": log_store.export(tenant_id, "json"),
+                }
+        if prepared and prepared["key"] == export_key:
             st.download_button(
-                "⬇️ Download Email Log (CSV)", f, file_name=os.path.basename(csv_path)
+                "⬇️ Download Email Log (CSV)",
+                prepared["csv"],
+                file_name=os.path.basename(csv_path),
             )
-    if os.path.exists(json_path):
-        with open(json_path, "rb") as f:
             st.download_button(
-                "⬇️ Download Email Log (JSON)", f, file_name=os.path.basename(json_path)
+                "⬇️ Download Email Log (JSON)",
+                prepared["json"],
+                file_name=os.path.basename(json_path),
             )
@@ -15,7 +15,7 @@ from utils.file_utils import clean_temp_dir
 from core.foia_constants import STATE_CITATIONS, STATE_RESPONSE_TIMES
 from core.cache_utils import clear_caches
 from core.error_handling import handle_error
-from services.dropbox_client import DropboxClient
+from services.dropbox_client import get_dropbox_client
 from core.constants import DROPBOX_TEMPLATES_ROOT
 
 # Clean global temp dir at startup, each user will use isolated dirs
@@ -34,7 +34,7 @@ def run_ui():
     try:
         tenant_id = get_tenant_id()
         user_id = get_user_id()
-        client = DropboxClient()
+        client = get_dropbox_client()
 
         # ==================== STYLE EXAMPLES ==================== #
         st.subheader("🎨 Optional Style Example")
@@ -89,6 +89,7 @@ def run_ui():
                     dropbox_path,
                     mode=client.dbx.files.WriteMode.overwrite
                 )
+                client.invalidate_listing(dropbox_path)
 
                 log_audit_event("FOIA Template Uploaded", {
                     "filename": uploaded_template.name,
@@ -19,7 +19,7 @@ from services.memo_service import (
     final_polish_memo
 )
 from utils.docx_utils import replace_text_in_docx_all
-from services.dropbox_client import DropboxClient
+from services.dropbox_client import get_dropbox_client
 from core.constants import DROPBOX_TEMPLATES_ROOT
 from dropbox.files import WriteMode
 
@@ -35,7 +35,7 @@ def run_ui():
     try:
         tenant_id = get_tenant_id()
         user_id = get_user_id()
-        client = DropboxClient()
+        client = get_dropbox_client()
 
         # === TEMPLATES (Dropbox) ===
         st.markdown("### 📄 Select Mediation Memo Template")
@@ -58,6 +58,7 @@ def run_ui():
                     dropbox_path,
                     mode=WriteMode.overwrite
                 )
+                client.invalidate_listing(dropbox_path)
                 st.success(f"✅ Uploaded template: {template_filename}")
 
                 clear_caches()
@@ -137,6 +138,9 @@ def run_ui():
                 options=["Liability", "Damages", "Additional Harms", "Facts", "Causation"],
                 default=["Liability", "Damages"]
             )
+            full_depo_scan = st.checkbox(
+                "Scan full transcript for every category (slower, more GPT calls)", value=False
+            )
 
             action = st.radio("Choose Action", ["🔍 Preview Party Paragraphs", "📂 Generate Memo"])
             submitted = st.form_submit_button("⚙️ Run")
@@ -179,7 +183,7 @@ def run_ui():
             tenant_id, user_id, court, case_number, complaint_narrative, party_info,
             settlement_summary, medical_summary, future_medical_bills, raw_depo,
             ",".join(plaintiffs), ",".join(defendants), ",".join(quote_categories),
-            example_text, template_path or ""
+            example_text, template_path or "", str(full_depo_scan)
         ])
         form_key = hashlib.md5(input_fingerprint.encode()).hexdigest()
 
@@ -192,7 +196,16 @@ def run_ui():
 
                     # ✅ Only parse quotes if depo text & categories present
                     if raw_depo.strip() and quote_categories:
-                        raw_quotes = generate_quotes_from_raw_depo(raw_depo, quote_categories)
+                        quote_progress = st.progress(0.0, text="📜 Extracting deposition quotes...")
+
+                        def update_quote_progress(done: int, total: int):
+                            quote_progress.progress(done / total, text=f"📜 Extracting quotes: chunk {done}/{total}")
+
+                        raw_quotes = generate_quotes_from_raw_depo(
+                            raw_depo, quote_categories, progress_callback=update_quote_progress,
+                            full_scan=full_depo_scan
+                        )
+                        quote_progress.empty()
                     else:
                         raw_quotes = {}
 
@@ -268,7 +281,11 @@ def run_ui():
 
         # === POLISHED DOCX DOWNLOAD ===
         with st.spinner("✨ Polishing full memo..."):
-            polished_data = final_polish_memo(memo_data)
+            polish_preview = st.empty()
+            polished_data = final_polish_memo(
+                memo_data, on_update=lambda text: polish_preview.markdown(text)
+            )
+            polish_preview.empty()
             polished_bytes = BytesIO()
             replace_text_in_docx_all(template_path, polished_data, polished_bytes)  # Write to BytesIO
             polished_bytes.seek(0)
@@ -11,7 +11,7 @@ from core.error_handling import handle_error
 from logger import logger
 from core.db import get_templates, get_examples
 from utils.docx_utils import replace_text_in_docx_all
-from services.dropbox_client import DropboxClient
+from services.dropbox_client import get_dropbox_client
 from core.constants import (
     DROPBOX_EMAIL_TEMPLATE_DIR,
     DROPBOX_DEMAND_TEMPLATE_DIR,
@@ -93,7 +93,7 @@ def run_ui():
         return
 
     tab1, tab2, tab3 = st.tabs(["📂 Templates", "🖋️ Style Examples", "🎨 Branding"])
-    client = DropboxClient()
+    client = get_dropbox_client()
 
     # ==================== Tab 1: Templates ==================== #
     with tab1:
@@ -122,6 +122,7 @@ def run_ui():
 
                     dropbox_path = f"{category_path}/{versioned_name}"
                     client.dbx.files_upload(uploaded_template.getvalue(), dropbox_path, mode=WriteMode.overwrite)
+                    client.invalidate_listing(dropbox_path)
 
                     st.success(f"✅ Uploaded template: {versioned_name}")
                     clear_caches()
@@ -189,6 +190,8 @@ def run_ui():
                                 new_path = f"{category_path}/{clean_new_name}"
 
                                 client.dbx.files_move_v2(old_path, new_path, autorename=False)
+                                client.invalidate_listing(old_path)
+                                client.invalidate_listing(new_path)
                                 st.success(f"✅ Renamed to {clean_new_name}")
                                 clear_caches()
 
@@ -201,6 +204,7 @@ def run_ui():
                         if st.button("🗑️ Delete", key=f"delete_{name}"):
                             try:
                                 client.dbx.files_delete_v2(f"{category_path}/{name}")
+                                client.invalidate_listing(f"{category_path}/{name}")
                                 st.success(f"✅ Deleted {name}")
                                 clear_caches()
 
@@ -235,6 +239,7 @@ def run_ui():
                     dropbox_path = f"{example_path}/{normalized_name}"
 
                     client.dbx.files_upload(uploaded_example.getvalue(), dropbox_path, mode=WriteMode.overwrite)
+                    client.invalidate_listing(dropbox_path)
 
                     st.success(f"✅ Uploaded example: {normalized_name}")
                     clear_caches()
@@ -276,6 +281,8 @@ def run_ui():
                                 new_path = f"{example_path}/{clean_new_name}"
 
                                 client.dbx.files_move_v2(old_path, new_path, autorename=False)
+                                client.invalidate_listing(old_path)
+                                client.invalidate_listing(new_path)
 
                                 st.success(f"✅ Renamed to {clean_new_name}")
                                 clear_caches()
@@ -294,6 +301,7 @@ def run_ui():
                         if st.button("🗑️ Delete", key=f"delete_ex_{filename}"):
                             try:
                                 client.dbx.files_delete_v2(f"{example_path}/{filename}")
+                                client.invalidate_listing(f"{example_path}/{filename}")
 
                                 st.success(f"✅ Deleted {filename}")
                                 clear_caches()
@@ -0,0 +1,143 @@
+import base64
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from logger import logger
+
+ATTACHMENT_CACHE_MAX_BYTES = int(os.getenv("ATTACHMENT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def _read_attachment(attachment) -> tuple:
+    """
+    Return (file_name, raw_bytes) for an uploaded file-like object or a path.
+    Uploaded files are read from the start every time, so they can be reused.
+    """
+    if hasattr(attachment, "getvalue"):
+        return attachment.name, attachment.getvalue()
+    if hasattr(attachment, "read"):
+        if hasattr(attachment, "seek"):
+            attachment.seek(0)
+        return attachment.name, attachment.read()
+    with open(attachment, "rb") as f:
+        return os.path.basename(attachment), f.read()
+
+
+class AttachmentCache:
+    """
+    Bounded LRU of base64-encoded attachment contents keyed by SHA-256 of the bytes.
+
+    Bulk sends attach the same files to every recipient; with the cache each
+    distinct file is encoded once and the encoded string is shared by all
+    messages. Paths are additionally keyed by (path, mtime, size) so unchanged
+    files aren't even re-read.
+    """
+
+    def __init__(self, max_bytes: int = ATTACHMENT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._path_hashes = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.metrics = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "bytes_read": 0,
+            "bytes_encoded": 0,
+        }
+
+    def _lookup_path(self, path: str):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None, None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        digest = self._path_hashes.get(path)
+        if digest and digest[0] == stamp:
+            return stamp, digest[1]
+        return stamp, None
+
+    def _get(self, digest: str):
+        encoded = self._entries.get(digest)
+        if encoded is not None:
+            self._entries.move_to_end(digest)
+        return encoded
+
+    def _put(self, digest: str, encoded: str):
+        self._entries[digest] = encoded
+        self._size += len(encoded)
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+            self.metrics["evictions"] += 1
+
+    def encode(self, attachment) -> tuple:
+        """
+        Return (file_name, base64_text) for one attachment, encoding only on a cache miss.
+        """
+        is_path = not hasattr(attachment, "read") and not hasattr(attachment, "getvalue")
+        if is_path:
+            stamp, digest = self._lookup_path(attachment)
+            if digest:
+                with self._lock:
+                    encoded = self._get(digest)
+                    if encoded is not None:
+                        self.metrics["hits"] += 1
+                        return os.path.basename(attachment), encoded
+
+        file_name, raw = _read_attachment(attachment)
+        digest = hashlib.sha256(raw).hexdigest()
+
+        with self._lock:
+            self.metrics["bytes_read"] += len(raw)
+            if is_path and stamp:
+                self._path_hashes[attachment] = (stamp, digest)
+            encoded = self._get(digest)
+            if encoded is not None:
+                self.metrics["hits"] += 1
+                return file_name, encoded
+
+        encoded = base64.b64encode(raw).decode("utf-8")
+        with self._lock:
+            self.metrics["misses"] += 1
+            self.metrics["bytes_encoded"] += len(raw)
+            self._put(digest, encoded)
+        logger.info(f"[ATTACHMENT_CACHE] Encoded {file_name} ({len(raw)} bytes)")
+        return file_name, encoded
+
+    def prepare(self, attachments: list = None) -> list:
+        """
+        Convert file-like objects or paths into Graph fileAttachment dicts.
+        """
+        prepared = []
+        for attachment in attachments or []:
+            file_name, encoded = self.encode(attachment)
+            prepared.append({
+                "@odata.type": "#microsoft.graph.fileAttachment",
+                "name": file_name,
+                "contentType": "application/octet-stream",
+                "contentBytes": encoded,
+            })
+        return prepared
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.metrics)
+            stats["entries"] = len(self._entries)
+            stats["cached_bytes"] = self._size
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["hits"] / lookups) if lookups else 0.0
+        return stats
+
+
+# Shared across sends so every recipient in a batch reuses the same encodings
+attachment_cache = AttachmentCache()
+
+
+def prepare_attachments(attachments: list = None) -> list:
+    return attachment_cache.prepare(attachments)
+
+
+def get_attachment_cache_stats() -> dict:
+    return attachment_cache.stats()
@@ -1,8 +1,13 @@
 import os
+import re
+import struct
+import threading
 import zipfile
+import zlib
 import html
 import datetime
 import hashlib
+from collections import OrderedDict
 from io import BytesIO
 from lxml import etree
 from utils.template_engine import render_docx_placeholders
@@ -25,6 +30,20 @@ TARGET_XML_FILES = [
     "word/vbaProject.bin"
 ]
 
+DOCX_TEMPLATE_CACHE_SIZE = int(os.getenv("DOCX_TEMPLATE_CACHE_SIZE", "32"))
+DOCX_PLACEHOLDER_PATTERN = re.compile(r"\{\{([^{}]*)\}\}")
+# Private-use characters mark placeholder slots while a part is serialized once at compile time
+SLOT_OPEN, SLOT_CLOSE = "\ue000", "\ue001"
+SLOT_PATTERN = re.compile(f"{SLOT_OPEN}(\\d+){SLOT_CLOSE}".encode("utf-8"))
+INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+W_T = f"{{{NAMESPACES['w']}}}t"
+W_P = f"{{{NAMESPACES['w']}}}p"
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+ZIP_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+ZIP_CENTRAL_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+ZIP_END_RECORD = struct.Struct("<4s4H2LH")
+
 
 def _hash_template_version(file_path: str) -> str:
     """Compute a SHA256 hash of the file for versioning."""
@@ -175,3 +194,237 @@ def replace_text_in_docx_all(docx_path: str, replacements: dict, save_path_or_bu
 
     except Exception as e:
         handle_error(e, code="DOCX_REPLACE_001", raise_it=True)
+
+
+class CompiledDocxPart:
+    """
+    One XML part serialized once with slot markers where placeholders were,
+    split into literal byte chunks and the slots between them.
+    """
+
+    def __init__(self, xml_bytes: bytes):
+        if SLOT_OPEN.encode("utf-8") in xml_bytes:
+            raise ValueError("Template part already contains slot marker characters")
+        root = etree.fromstring(xml_bytes)
+        self.slots = []
+
+        # Group text nodes by their own paragraph so placeholders split across runs are found
+        paragraphs = OrderedDict()
+        for node in root.iter(W_T):
+            paragraph = node.getparent()
+            while paragraph is not None and paragraph.tag != W_P:
+                paragraph = paragraph.getparent()
+            paragraphs.setdefault(paragraph, []).append(node)
+
+        for nodes in paragraphs.values():
+            self._mark_placeholders(nodes)
+
+        if self.slots:
+            serialized = etree.tostring(root, xml_declaration=True, encoding="utf-8")
+            parts = SLOT_PATTERN.split(serialized)
+            self.literals = parts[0::2]
+            self.slot_order = [self.slots[int(slot_id)] for slot_id in parts[1::2]]
+
+    def _mark_placeholders(self, nodes: list):
+        texts = [node.text or "" for node in nodes]
+        matches = list(DOCX_PLACEHOLDER_PATTERN.finditer("".join(texts)))
+        if not matches:
+            return
+
+        offset = 0
+        for node, text in zip(nodes, texts):
+            start, end = offset, offset + len(text)
+            offset = end
+            pieces, cursor, touched = [], start, False
+            for match in matches:
+                if match.end() <= start or match.start() >= end:
+                    continue
+                touched = True
+                pieces.append(text[cursor - start:max(match.start(), cursor) - start])
+                if match.start() >= start:
+                    # The whole value goes where the placeholder starts, keeping that run's formatting
+                    pieces.append(f"{SLOT_OPEN}{len(self.slots)}{SLOT_CLOSE}")
+                    self.slots.append((match.group(1), node.prefix or "w"))
+                cursor = min(match.end(), end)
+            if touched:
+                pieces.append(text[cursor - start:])
+                node.text = "".join(pieces)
+                node.set(XML_SPACE, "preserve")
+
+    @staticmethod
+    def _value_xml(value, prefix: str) -> bytes:
+        if isinstance(value, list):
+            line_break = f'</{prefix}:t><{prefix}:br/><{prefix}:t xml:space="preserve">'
+            return line_break.encode("utf-8").join(
+                CompiledDocxPart._value_xml(item, prefix) for item in value
+            )
+        text = INVALID_XML_CHARS.sub("", str(value))
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").encode("utf-8")
+
+    def render(self, replacements: dict) -> bytes:
+        out = [self.literals[0]]
+        for (name, prefix), literal in zip(self.slot_order, self.literals[1:]):
+            value = replacements[name] if name in replacements else f"{{{{{name}}}}}"
+            out.append(self._value_xml(value, prefix))
+            out.append(literal)
+        return b"".join(out)
+
+
+class CompiledDocxTemplate:
+    """
+    A DOCX template parsed once and rendered per row without lxml or python-docx.
+
+    Compiling reads the package, runs the macro and size checks, and records
+    every {{placeholder}} in the TARGET_XML_FILES parts, including ones split
+    across runs (the value is written into the run where the placeholder
+    starts). Rendering substitutes escaped values into the pre-serialized
+    parts and deflates only those; every other zip entry is copied as its
+    original compressed bytes. List values become line breaks within the run.
+    """
+
+    def __init__(self, docx_path: str):
+        try:
+            if not os.path.isfile(docx_path):
+                raise FileNotFoundError(f"Input DOCX file does not exist: {docx_path}")
+
+            validate_file_size(docx_path)
+            _scan_for_macros(docx_path)
+
+            with open(docx_path, "rb") as f:
+                package = f.read()
+
+            self.path = docx_path
+            self.placeholders = set()
+            self.entries = []
+            with zipfile.ZipFile(BytesIO(package)) as zin:
+                for info in zin.infolist():
+                    if info.flag_bits & 0x1:
+                        raise ValueError(f"Encrypted zip entry in template: {info.filename}")
+                    part = None
+                    if info.filename in TARGET_XML_FILES and info.filename.endswith(".xml"):
+                        part = CompiledDocxPart(zin.read(info.filename))
+                    if part is not None and part.slots:
+                        self.placeholders.update(name for name, _ in part.slots)
+                        self.entries.append((info, part, None))
+                    else:
+                        self.entries.append((info, None, self._raw_data(package, info)))
+
+            logger.info(
+                f"[DOCX_TEMPLATE] Compiled {os.path.basename(docx_path)}: "
+                f"{len(self.placeholders)} placeholders in "
+                f"{sum(1 for _, part, _ in self.entries if part)} parts"
+            )
+        except Exception as e:
+            handle_error(e, code="DOCX_COMPILE_001", raise_it=True)
+
+    @staticmethod
+    def _raw_data(package: bytes, info: zipfile.ZipInfo) -> bytes:
+        # Compressed bytes follow the local header, whose name/extra lengths may differ from the central directory
+        name_length, extra_length = struct.unpack("<HH", package[info.header_offset + 26:info.header_offset + 30])
+        start = info.header_offset + ZIP_LOCAL_HEADER.size + name_length + extra_length
+        return package[start:start + info.compress_size]
+
+    def render(self, replacements: dict, audit_name: str = None) -> bytes:
+        """
+        Render one row to DOCX bytes. Values are HTML-unescaped like
+        replace_text_in_docx_all; placeholders without a value are left as-is.
+        With audit_name, a "DOCX Replace Completed" event is logged for the
+        document, versioned by a hash of the rendered bytes.
+        """
+        try:
+            replacements = {
+                k: html.unescape(str(v)) if not isinstance(v, list)
+                else [html.unescape(str(x)) for x in v]
+                for k, v in replacements.items()
+            }
+
+            out = BytesIO()
+            central = []
+            for info, part, raw in self.entries:
+                if part is not None:
+                    content = part.render(replacements)
+                    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+                    data = compressor.compress(content) + compressor.flush()
+                    crc, size, method = zlib.crc32(content), len(content), zipfile.ZIP_DEFLATED
+                else:
+                    data, crc, size, method = raw, info.CRC, info.file_size, info.compress_type
+
+                try:
+                    name, flags = info.filename.encode("ascii"), 0
+                except UnicodeEncodeError:
+                    name, flags = info.filename.encode("utf-8"), 0x800
+                year, month, day, hour, minute, second = info.date_time
+                dos_date = (year - 1980) << 9 | month << 5 | day
+                dos_time = hour << 11 | minute << 5 | second // 2
+
+                offset = out.tell()
+                out.write(ZIP_LOCAL_HEADER.pack(
+                    b"PK\x03\x04", 20, 0, flags, method, dos_time, dos_date, crc, len(data), size, len(name), 0
+                ))
+                out.write(name)
+                out.write(data)
+                central.append(ZIP_CENTRAL_HEADER.pack(
+                    b"PK\x01\x02", 20, info.create_system, 20, 0, flags, method, dos_time, dos_date,
+                    crc, len(data), size, len(name), 0, 0, 0, info.internal_attr, info.external_attr, offset
+                ) + name)
+
+            central_offset = out.tell()
+            for record in central:
+                out.write(record)
+            out.write(ZIP_END_RECORD.pack(
+                b"PK\x05\x06", 0, 0, len(central), len(central), out.tell() - central_offset, central_offset, 0
+            ))
+            rendered = out.getvalue()
+
+            if audit_name:
+                version_hash = hashlib.sha256(rendered).hexdigest()
+                log_audit_event("DOCX Replace Completed", {
+                    "file": audit_name,
+                    "template": self.path,
+                    "timestamp": datetime.datetime.utcnow().isoformat(),
+                    "version_hash": version_hash,
+                    "tenant_id": get_tenant_id()
+                })
+                logger.info(redact_log(mask_phi(
+                    f"✅ DOCX replace completed for {audit_name}, version: {version_hash}"
+                )))
+            return rendered
+        except Exception as e:
+            handle_error(e, code="DOCX_RENDER_001", raise_it=True)
+
+
+_docx_template_cache = OrderedDict()
+_docx_template_cache_lock = threading.Lock()
+_docx_template_cache_stats = {"hits": 0, "misses": 0}
+
+
+def load_docx_template(docx_path: str) -> CompiledDocxTemplate:
+    """
+    Return the compiled DOCX template for a path, recompiling only when the
+    file's mtime or size changes.
+    """
+    stat = os.stat(docx_path)
+    key = os.path.abspath(docx_path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    with _docx_template_cache_lock:
+        cached = _docx_template_cache.get(key)
+        if cached and cached[0] == stamp:
+            _docx_template_cache.move_to_end(key)
+            _docx_template_cache_stats["hits"] += 1
+            return cached[1]
+
+    compiled = CompiledDocxTemplate(docx_path)
+
+    with _docx_template_cache_lock:
+        _docx_template_cache_stats["misses"] += 1
+        _docx_template_cache[key] = (stamp, compiled)
+        _docx_template_cache.move_to_end(key)
+        while len(_docx_template_cache) > DOCX_TEMPLATE_CACHE_SIZE:
+            _docx_template_cache.popitem(last=False)
+    return compiled
+
+
+def get_docx_template_cache_stats() -> dict:
+    with _docx_template_cache_lock:
+        return {**_docx_template_cache_stats, "entries": len(_docx_template_cache)}
@@ -0,0 +1,175 @@
+import asyncio
+import atexit
+import os
+import threading
+import aiohttp
+from logger import logger
+
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10"))
+HTTP_POOL_KEEPALIVE_SECONDS = float(os.getenv("HTTP_POOL_KEEPALIVE_SECONDS", "30"))
+HTTP_POOL_DNS_TTL_SECONDS = int(os.getenv("HTTP_POOL_DNS_TTL_SECONDS", "300"))
+
+
+class HTTPSessionPool:
+    """
+    Process-wide pool of keep-alive aiohttp sessions shared by the API clients.
+
+    aiohttp sessions are bound to the event loop they were created on, and this
+    app runs coroutines on several loops (Streamlit script threads, asyncio.run
+    per batch), so the pool keeps one lazily created session per loop. Each
+    session's connector reuses connections, caps connections per host and
+    caches DNS lookups. Sessions of loops that have been closed are dropped.
+    """
+
+    def __init__(self, limit: int = HTTP_POOL_LIMIT, limit_per_host: int = HTTP_POOL_LIMIT_PER_HOST,
+                 keepalive_timeout: float = HTTP_POOL_KEEPALIVE_SECONDS,
+                 dns_ttl: int = HTTP_POOL_DNS_TTL_SECONDS):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_ttl = dns_ttl
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self.metrics = {
+            "sessions_created": 0,
+            "requests": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "connections_queued": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        }
+
+    def _count(self, name: str, delta: int = 1):
+        with self._lock:
+            self.metrics[name] += delta
+            if name == "in_flight":
+                self.metrics["peak_in_flight"] = max(self.metrics["peak_in_flight"], self.metrics["in_flight"])
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        def counter(*names_and_deltas):
+            async def hook(session, ctx, params):
+                for name, delta in names_and_deltas:
+                    self._count(name, delta)
+            return hook
+
+        trace.on_request_start.append(counter(("requests", 1), ("in_flight", 1)))
+        trace.on_request_end.append(counter(("in_flight", -1)))
+        trace.on_request_exception.append(counter(("in_flight", -1)))
+        trace.on_connection_create_end.append(counter(("connections_created", 1)))
+        trace.on_connection_reuseconn.append(counter(("connections_reused", 1)))
+        trace.on_connection_queued_start.append(counter(("connections_queued", 1)))
+        trace.on_dns_cache_hit.append(counter(("dns_cache_hits", 1)))
+        trace.on_dns_cache_miss.append(counter(("dns_cache_misses", 1)))
+        return trace
+
+    def _prune_closed_loops(self):
+        for loop in [loop for loop in self._sessions if loop.is_closed()]:
+            session = self._sessions.pop(loop)
+            try:
+                # The loop is gone, so the session cannot be closed normally
+                session.detach()
+            except Exception:
+                pass
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """
+        Return the shared session for the running event loop, creating it on first use.
+        Callers must not close it; use close_all() at shutdown.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._prune_closed_loops()
+            session = self._sessions.get(loop)
+            if session is None or session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=self.dns_ttl,
+                    use_dns_cache=True,
+                )
+                session = aiohttp.ClientSession(connector=connector, trace_configs=[self._trace_config()])
+                self._sessions[loop] = session
+                self.metrics["sessions_created"] += 1
+                logger.info(
+                    f"[HTTP_POOL] Created session (limit={self.limit}, per_host={self.limit_per_host}, "
+                    f"dns_ttl={self.dns_ttl}s)"
+                )
+            return session
+
+    async def close_loop_sessions(self):
+        """
+        Close the session belonging to the running loop, e.g. before asyncio.run() returns.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.pop(loop, None)
+        if session and not session.closed:
+            await session.close()
+
+    def close_all(self):
+        """
+        Close every pooled session whose loop can still run (called at interpreter exit).
+        """
+        with self._lock:
+            sessions = list(self._sessions.items())
+            self._sessions.clear()
+        for loop, session in sessions:
+            try:
+                if session.closed:
+                    continue
+                if not loop.is_closed() and not loop.is_running():
+                    loop.run_until_complete(session.close())
+                else:
+                    session.detach()
+            except Exception as e:
+                logger.warning(f"[HTTP_POOL] Failed to close session cleanly: {e}")
+
+    def stats(self) -> dict:
+        """
+        Pool utilisation counters; reuse_ratio is reused / (created + reused) connections.
+        """
+        with self._lock:
+            stats = dict(self.metrics)
+            stats["open_sessions"] = sum(1 for s in self._sessions.values() if not s.closed)
+        acquired = stats["connections_created"] + stats["connections_reused"]
+        stats["reuse_ratio"] = (stats["connections_reused"] / acquired) if acquired else 0.0
+        return stats
+
+
+# Shared instance used by NeosClient and GraphClient
+http_pool = HTTPSessionPool()
+atexit.register(http_pool.close_all)
+
+
+def get_session() -> aiohttp.ClientSession:
+    return http_pool.get_session()
+
+
+async def close_loop_sessions():
+    await http_pool.close_loop_sessions()
+
+
+def get_pool_stats() -> dict:
+    return http_pool.stats()
+
+
+def run_pooled(coro):
+    """
+    asyncio.run() replacement that closes the loop's pooled session before the
+    loop shuts down, so one-off batches reuse connections and exit cleanly.
+    """
+    async def runner():
+        try:
+            return await coro
+        finally:
+            await close_loop_sessions()
+            logger.info(f"[HTTP_POOL] {get_pool_stats()}")
+
+    return asyncio.run(runner())
@@ -0,0 +1,180 @@
+import asyncio
+import re
+import threading
+import time
+from logger import logger
+
+# Conservative starting limits (requests/min, tokens/min); replaced by the
+# x-ratelimit-* headers as soon as the API reports the account's real limits.
+DEFAULT_MODEL_LIMITS = {
+    "gpt-3.5-turbo": (3500, 160000),
+    "gpt-4": (500, 10000),
+    "gpt-4-turbo": (500, 30000),
+    "gpt-4o": (500, 30000),
+}
+FALLBACK_LIMITS = (500, 10000)
+
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_reset_duration(value) -> float:
+    """
+    Parse OpenAI reset durations such as "1s", "6m0s" or "20ms" into seconds.
+    """
+    if value is None:
+        return 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    return sum(float(n) * DURATION_UNITS[unit] for n, unit in DURATION_PATTERN.findall(str(value)))
+
+
+class TokenBucket:
+    """
+    Continuous-refill bucket holding up to `capacity` units, refilled over one minute.
+    Not thread-safe on its own; ModelRateLimiter guards access.
+    """
+
+    def __init__(self, capacity: float, window_seconds: float = 60.0):
+        self.capacity = float(capacity)
+        self.window_seconds = window_seconds
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        rate = self.capacity / self.window_seconds
+        self.level = min(self.capacity, self.level + (now - self.updated) * rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until `amount` units are available (0 if available now).
+        Requests larger than the whole bucket only wait for a full bucket.
+        """
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * self.window_seconds / self.capacity
+
+    def set_capacity(self, capacity: float):
+        if capacity > 0 and capacity != self.capacity:
+            self.level = min(self.level, capacity)
+            self.capacity = float(capacity)
+
+
+class ModelRateLimiter:
+    """
+    Client-side requests-per-minute and tokens-per-minute limiter, one pair
+    of token buckets per model. Callers await acquire() and queue until the
+    request fits instead of triggering 429s; limits adapt from the
+    x-ratelimit-* response headers and Retry-After on 429s.
+    Safe to share across threads/event loops.
+    """
+
+    def __init__(self, rpm: int = None, tpm: int = None):
+        self.default_rpm = rpm
+        self.default_tpm = tpm
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._paused_until = {}
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.rate_limited = 0
+
+    def _get_buckets(self, model: str):
+        if model not in self._buckets:
+            rpm, tpm = DEFAULT_MODEL_LIMITS.get(model, FALLBACK_LIMITS)
+            self._buckets[model] = (
+                TokenBucket(self.default_rpm or rpm),
+                TokenBucket(self.default_tpm or tpm),
+            )
+        return self._buckets[model]
+
+    async def acquire(self, model: str, tokens: int):
+        """
+        Wait until one request costing `tokens` fits within the model's limits, then reserve it.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                requests_bucket, tokens_bucket = self._get_buckets(model)
+                now = time.monotonic()
+                requests_bucket.refill(now)
+                tokens_bucket.refill(now)
+                delay = max(
+                    requests_bucket.wait_time(1),
+                    tokens_bucket.wait_time(tokens),
+                    self._paused_until.get(model, 0.0) - now,
+                )
+                if delay <= 0:
+                    requests_bucket.level -= 1
+                    tokens_bucket.level -= min(tokens, tokens_bucket.capacity)
+                    if waited:
+                        self.waits += 1
+                        self.wait_seconds += waited
+                    return
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def settle(self, model: str, reserved_tokens: int, actual_tokens: int):
+        """
+        Correct the token bucket once the real usage of a request is known.
+        """
+        if actual_tokens is None:
+            return
+        with self._lock:
+            _, tokens_bucket = self._get_buckets(model)
+            tokens_bucket.level = min(
+                tokens_bucket.capacity, tokens_bucket.level + reserved_tokens - actual_tokens
+            )
+
+    def update_from_headers(self, model: str, headers):
+        """
+        Adopt the limits and remaining budget reported by the API.
+        """
+        if not headers:
+            return
+        with self._lock:
+            requests_bucket, tokens_bucket = self._get_buckets(model)
+            now = time.monotonic()
+            for bucket, kind in ((requests_bucket, "requests"), (tokens_bucket, "tokens")):
+                try:
+                    limit = headers.get(f"x-ratelimit-limit-{kind}")
+                    remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                    if limit:
+                        bucket.refill(now)
+                        bucket.set_capacity(float(limit))
+                    if remaining is not None:
+                        bucket.level = min(bucket.level, float(remaining))
+                except (TypeError, ValueError):
+                    logger.warning(f"[RATE_LIMIT] Ignoring malformed {kind} headers for {model}")
+
+    def penalize(self, model: str, retry_after: float):
+        """
+        Pause every caller for this model after a 429, for retry_after seconds.
+        """
+        with self._lock:
+            self.rate_limited += 1
+            until = time.monotonic() + max(retry_after, 0.0)
+            self._paused_until[model] = max(self._paused_until.get(model, 0.0), until)
+        logger.warning(f"[RATE_LIMIT] 429 for {model}; pausing requests for {retry_after:.2f}s")
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = {
+                model: {
+                    "rpm_limit": requests_bucket.capacity,
+                    "tpm_limit": tokens_bucket.capacity,
+                    "requests_available": round(requests_bucket.level, 2),
+                    "tokens_available": round(tokens_bucket.level, 2),
+                }
+                for model, (requests_bucket, tokens_bucket) in self._buckets.items()
+            }
+            return {
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "rate_limited": self.rate_limited,
+                "models": models,
+            }
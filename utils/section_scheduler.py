@@ -0,0 +1,82 @@
+import asyncio
+import time
+from logger import logger
+
+DEFAULT_SECTION_CONCURRENCY = 4
+
+
+def _validate_graph(sections: dict):
+    """
+    Ensure every dependency exists and the graph has no cycles.
+    """
+    for name, (deps, _) in sections.items():
+        missing = [d for d in deps if d not in sections]
+        if missing:
+            raise ValueError(f"Section '{name}' depends on unknown sections: {missing}")
+
+    visiting, done = set(), set()
+
+    def visit(name: str):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle detected at section '{name}'")
+        visiting.add(name)
+        for dep in sections[name][0]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in sections:
+        visit(name)
+
+
+async def run_section_graph(sections: dict, max_concurrency: int = DEFAULT_SECTION_CONCURRENCY) -> tuple:
+    """
+    Run a dependency graph of async section builders.
+
+    Args:
+        sections (dict): {name: (dependencies, builder)} where `builder` is an async
+            callable receiving the dict of finished results and returning the section value.
+        max_concurrency (int): Maximum number of builders running at the same time.
+
+    Returns:
+        tuple: (results, timings) — both keyed by section name; timings are seconds
+        spent running each builder (excluding time queued behind the concurrency cap).
+
+    Raises:
+        ValueError: If the graph references unknown sections or contains a cycle.
+        Reraises the first builder exception after cancelling outstanding sections.
+    """
+    _validate_graph(sections)
+
+    semaphore = asyncio.Semaphore(max(1, int(max_concurrency or 1)))
+    results, timings, tasks = {}, {}, {}
+
+    async def run_one(name: str):
+        deps, builder = sections[name]
+        if deps:
+            await asyncio.gather(*(tasks[d] for d in deps))
+        async with semaphore:
+            start = time.perf_counter()
+            value = await builder(results)
+            timings[name] = time.perf_counter() - start
+        results[name] = value
+        return value
+
+    for name in sections:
+        tasks[name] = asyncio.ensure_future(run_one(name))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except Exception:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    logger.info(
+        f"[SECTION_GRAPH] Completed {len(results)} sections "
+        f"(concurrency={max_concurrency}, busy={sum(timings.values()):.2f}s)"
+    )
+    return results, timings
@@ -0,0 +1,101 @@
+import asyncio
+import concurrent.futures
+import threading
+from logger import logger
+
+
+class _LeaderAbandoned(Exception):
+    """
+    Set on the shared future when the leader was cancelled; followers retry.
+    """
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one in-flight execution.
+
+    The first caller for a key (the leader) runs the coroutine; callers that
+    arrive while it is still running await the leader's result instead of
+    starting their own. Works across threads and event loops (e.g. separate
+    Streamlit sessions) because the shared result is a concurrent.futures.Future.
+    """
+
+    def __init__(self, name: str = "single_flight"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key, coro_fn, *args, **kwargs):
+        """
+        Run coro_fn(*args, **kwargs) unless an identical call (same key) is in flight,
+        in which case wait for and return its result (or re-raise its exception).
+        """
+        while True:
+            with self._lock:
+                future = self._inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = concurrent.futures.Future()
+                    self._inflight[key] = future
+                    self.leaders += 1
+                else:
+                    self.coalesced += 1
+
+            if leader:
+                break
+            logger.info(f"[{self.name.upper()}] Coalesced call onto in-flight request")
+            try:
+                # Shielded: cancelling this follower (e.g. a wait_for timeout) must not
+                # cancel the shared future the leader and other followers depend on
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except _LeaderAbandoned:
+                # The leader's caller was cancelled (e.g. a wait_for timeout in another
+                # session); that is not this caller's failure, so run the call again
+                continue
+
+        try:
+            result = await coro_fn(*args, **kwargs)
+        except Exception as e:
+            self._release(key)
+            self._settle(future, exception=e)
+            raise
+        except BaseException:
+            # Cancellation belongs to the leader's caller only: release the key
+            # before waking followers so one of them becomes the new leader
+            self._release(key)
+            self._settle(future, exception=_LeaderAbandoned())
+            raise
+        else:
+            self._release(key)
+            self._settle(future, result=result)
+            return result
+
+    def _release(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    @staticmethod
+    def _settle(future: concurrent.futures.Future, result=None, exception: BaseException = None):
+        # The leader's own outcome must not turn into InvalidStateError if the future was already settled
+        if future.done():
+            return
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except concurrent.futures.InvalidStateError:
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._inflight)
+        total = self.leaders + self.coalesced
+        return {
+            "executed": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": (self.coalesced / total) if total else 0.0,
+            "in_flight": in_flight,
+        }
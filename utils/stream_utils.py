@@ -1,3 +1,4 @@
+import time
 from io import BytesIO
 
 def stream_bytesio(buffer: BytesIO, chunk_size: int = 8192):
@@ -7,3 +8,23 @@ def stream_bytesio(buffer: BytesIO, chunk_size: int = 8192):
         if not data:
             break
         yield data
+
+
+async def collect_stream(chunks, on_update=None, min_interval: float = 0.2) -> str:
+    """
+    Consume an async iterator of text deltas and return the full text.
+    on_update(text_so_far) is called at most every min_interval seconds
+    (and once at the end) so UI placeholders can render progressively.
+    """
+    parts = []
+    last_update = 0.0
+    async for chunk in chunks:
+        parts.append(chunk)
+        if on_update and time.monotonic() - last_update >= min_interval:
+            on_update("".join(parts))
+            last_update = time.monotonic()
+
+    text = "".join(parts)
+    if on_update:
+        on_update(text)
+    return text
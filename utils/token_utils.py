@@ -1,7 +1,222 @@
-def trim_to_token_limit(text: str, max_tokens: int = 4000) -> str:
+import hashlib
+import math
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from logger import logger
+
+DEFAULT_PROMPT_TOKEN_LIMIT = 4000
+DEFAULT_TOKENIZER_MODEL = "gpt-4"
+
+# Models we call map to their BPE encodings; unknown models use cl100k_base.
+MODEL_ENCODINGS = {
+    "gpt-3.5-turbo": "cl100k_base",
+    "gpt-4": "cl100k_base",
+    "gpt-4-turbo": "cl100k_base",
+    "gpt-4o": "o200k_base",
+}
+
+# Estimator used when no BPE encoder can be loaded (tiktoken missing or its
+# encoding files unavailable offline). Pre-splits text the way cl100k does and
+# charges each piece by length; tuned to land slightly above the real count on
+# English legal prose so budgets err on the safe side.
+PIECE_PATTERN = re.compile(r"[A-Za-z]+|\d{1,3}|\n+|[^\sA-Za-z\d]")
+CHARS_PER_WORD_TOKEN = 4.5
+SHORT_WORD_LENGTH = 6
+
+# Counts are memoized by a digest of the text, never the text itself (prompts carry PHI)
+TOKEN_COUNT_CACHE_SIZE = 2048
+
+PARAGRAPH_SPLIT = re.compile(r"(\n\s*\n)")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])(\s+)")
+WORD_SPLIT = re.compile(r"(\s+)")
+
+
+@lru_cache(maxsize=8)
+def _load_encoding(encoding_name: str):
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.info(f"[TOKEN_UTILS] BPE encoder '{encoding_name}' unavailable, using estimator: {e}")
+        return None
+
+
+def get_encoder(model: str = None):
     """
-    Naive token limiter for GPT-3.5/4. Assumes 4 characters ≈ 1 token.
-    Truncates the input string if estimated tokens exceed the limit.
+    Return the cached BPE encoder for a model, or None when tiktoken (or its
+    encoding files) are not available.
     """
-    max_chars = max_tokens * 4
-    return text[:max_chars]
+    return _load_encoding(MODEL_ENCODINGS.get(model or DEFAULT_TOKENIZER_MODEL, "cl100k_base"))
+
+
+def _estimate_piece_tokens(text: str) -> int:
+    tokens = 0
+    for piece in PIECE_PATTERN.findall(text):
+        if len(piece) <= SHORT_WORD_LENGTH or not piece[0].isalpha():
+            tokens += 1
+        else:
+            tokens += math.ceil(len(piece) / CHARS_PER_WORD_TOKEN)
+    return tokens
+
+
+def _count_uncached(text: str, model: str) -> int:
+    encoder = get_encoder(model)
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return _estimate_piece_tokens(text)
+
+
+_token_counts = OrderedDict()
+_token_counts_lock = threading.Lock()
+
+
+def clear_token_count_cache():
+    with _token_counts_lock:
+        _token_counts.clear()
+
+
+def count_tokens(text: str, model: str = None) -> int:
+    """
+    Count tokens with the model's BPE encoder, falling back to the calibrated estimator.
+    Results are memoized by text digest, so repeated safety notes/examples are counted once.
+    """
+    if not text:
+        return 0
+    model = model or DEFAULT_TOKENIZER_MODEL
+    key = (hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest(), model)
+    with _token_counts_lock:
+        count = _token_counts.get(key)
+        if count is not None:
+            _token_counts.move_to_end(key)
+            return count
+
+    count = _count_uncached(text, model)
+    with _token_counts_lock:
+        _token_counts[key] = count
+        while len(_token_counts) > TOKEN_COUNT_CACHE_SIZE:
+            _token_counts.popitem(last=False)
+    return count
+
+
+def _split_keep(pattern, text: str) -> list:
+    """
+    Split text into segments, keeping each separator attached to the segment before it.
+    """
+    parts = pattern.split(text)
+    return [parts[i] + (parts[i + 1] if i + 1 < len(parts) else "") for i in range(0, len(parts), 2)]
+
+
+def _take_segments(segments: list, max_tokens: int, model: str, splitters: list) -> str:
+    kept, used = [], 0
+    for segment in segments:
+        cost = count_tokens(segment, model)
+        if used + cost <= max_tokens:
+            kept.append(segment)
+            used += cost
+            continue
+        # Only break the overflowing segment further if nothing at this level fits yet
+        if not kept:
+            if splitters:
+                kept.append(_take_segments(_split_keep(splitters[0], segment), max_tokens, model, splitters[1:]))
+            else:
+                # A single word longer than the budget: hard cut, refined by the caller
+                kept.append(segment[: max_tokens * 4])
+        break
+    return "".join(kept)
+
+
+def trim_to_token_limit(text: str, max_tokens: int = DEFAULT_PROMPT_TOKEN_LIMIT, model: str = None) -> str:
+    """
+    Trim text to at most max_tokens, cutting at paragraph, then sentence, then word boundaries.
+    Text already within the limit is returned unchanged.
+    """
+    if not text or count_tokens(text, model) <= max_tokens:
+        return text
+
+    trimmed = _take_segments(
+        _split_keep(PARAGRAPH_SPLIT, text), max_tokens, model, [SENTENCE_SPLIT, WORD_SPLIT]
+    ).rstrip()
+
+    # Per-segment counts can undercount merges across boundaries; shave until it fits
+    if trimmed and _count_uncached(trimmed, model) > max_tokens:
+        word_ends = [match.start() for match in re.finditer(r"\s+", trimmed)]
+        shaved = _longest_fitting_prefix(trimmed, word_ends, max_tokens, model)
+        if not shaved:
+            # Not even the first word fits: cut it by characters
+            first_word = trimmed.split(None, 1)[0]
+            shaved = _longest_fitting_prefix(first_word, range(1, len(first_word)), max_tokens, model)
+        trimmed = shaved
+    return trimmed
+
+
+def _longest_fitting_prefix(text: str, cuts, max_tokens: int, model: str) -> str:
+    """
+    Binary search over ascending cut offsets for the longest text[:cut] within max_tokens.
+    Intermediate prefixes are counted uncached so they don't crowd out real entries.
+    """
+    best, lo, hi = "", 0, len(cuts)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        candidate = text[:cuts[mid]].rstrip()
+        if _count_uncached(candidate, model) <= max_tokens:
+            best, lo = candidate, mid + 1
+        else:
+            hi = mid
+    return best
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Legacy 4 characters ≈ 1 token heuristic; prefer count_tokens().
+    """
+    return (len(text or "") + 3) // 4
+
+
+def plan_prompt_budget(parts: dict, budget: int, fixed: tuple = (), weights: dict = None,
+                       overhead: int = 0, model: str = None) -> dict:
+    """
+    Allocate a prompt token budget across named parts.
+
+    Parts listed in `fixed` (e.g. safety notes) always keep their full size.
+    The remainder is water-filled across the other parts in proportion to
+    `weights` (default 1): parts smaller than their share keep everything and
+    their unused share is redistributed to the larger ones.
+
+    Returns {part_name: token_allowance}.
+    """
+    weights = weights or {}
+    sizes = {name: count_tokens(text, model) for name, text in parts.items()}
+    allocation = {name: sizes[name] for name in fixed if name in parts}
+    remaining = max(0, budget - overhead - sum(allocation.values()))
+
+    flexible = {name for name in parts if name not in allocation}
+    while flexible:
+        total_weight = sum(weights.get(name, 1) for name in flexible)
+        shares = {name: remaining * weights.get(name, 1) / total_weight for name in flexible}
+        satisfied = {name for name in flexible if sizes[name] <= shares[name]}
+        if not satisfied:
+            for name in flexible:
+                allocation[name] = int(shares[name])
+            break
+        for name in satisfied:
+            allocation[name] = sizes[name]
+            remaining -= sizes[name]
+        flexible -= satisfied
+
+    return allocation
+
+
+def fit_prompt_parts(parts: dict, budget: int, fixed: tuple = (), weights: dict = None,
+                     overhead: int = 0, model: str = None) -> dict:
+    """
+    Trim each part to its plan_prompt_budget allowance at natural boundaries.
+    """
+    allocation = plan_prompt_budget(parts, budget, fixed, weights, overhead, model)
+    fitted = {name: trim_to_token_limit(text, allocation[name], model) for name, text in parts.items()}
+
+    trimmed = [name for name in parts if fitted[name] != parts[name]]
+    if trimmed:
+        logger.info(f"[TOKEN_BUDGET] Trimmed {trimmed} to fit {budget} tokens: {allocation}")
+    return fitted
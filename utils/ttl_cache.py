@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+
+FRESH = "fresh"
+STALE = "stale"
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU with a freshness TTL and a stale window.
+
+    Entries younger than ttl_seconds are fresh. Until ttl_seconds +
+    stale_seconds they are still returned, marked stale, so callers can serve
+    them while refreshing in the background (stale-while-revalidate). Older
+    entries count as misses.
+
+    invalidate() also bumps a per-key generation. A loader reads generation()
+    before fetching and passes it to set(), so a value fetched before an
+    invalidation is discarded instead of overwriting the newer state.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 300, stale_seconds: float = 0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._entries = OrderedDict()
+        # Only invalidated keys are tracked; bounded like the entries (absent means generation 0)
+        self._generations = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {
+            "hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "stale_sets": 0,
+        }
+
+    def get(self, key) -> tuple:
+        """
+        Return (value, FRESH | STALE) or (None, None) on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.metrics["misses"] += 1
+                return None, None
+            value, stored_at = entry
+            age = now - stored_at
+            if age > self.ttl_seconds + self.stale_seconds:
+                del self._entries[key]
+                self.metrics["misses"] += 1
+                return None, None
+            self._entries.move_to_end(key)
+            if age > self.ttl_seconds:
+                self.metrics["stale_hits"] += 1
+                return value, STALE
+            self.metrics["hits"] += 1
+            return value, FRESH
+
+    def generation(self, key) -> int:
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def set(self, key, value, generation: int = None) -> bool:
+        """
+        Store a value; with generation, only if the key wasn't invalidated since it was read.
+        """
+        with self._lock:
+            if generation is not None and generation != self._generations.get(key, 0):
+                self.metrics["stale_sets"] += 1
+                return False
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.metrics["evictions"] += 1
+            return True
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._generations.move_to_end(key)
+            while len(self._generations) > self.max_entries:
+                self._generations.popitem(last=False)
+            if self._entries.pop(key, None) is not None:
+                self.metrics["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.metrics)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = ((stats["hits"] + stats["stale_hits"]) / lookups) if lookups else 0.0
+        return stats